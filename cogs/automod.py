@@ -0,0 +1,174 @@
+# /cogs/automod.py
+import discord
+from discord.ext import commands
+from db.database import add_automod_rule, remove_automod_rule, get_automod_rules, get_guild_config, set_flood_config
+from utils.automod import AutomodFilter, ACTION_SEVERITY
+from utils.antiflood import FloodDetector, HASH_RING_SIZE
+
+AUTOMOD_KINDS = ("word", "link")
+MAX_PATTERN_LENGTH = 100
+
+
+class AutoMod(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.filter = AutomodFilter()
+        self.flood = FloodDetector()
+
+    @commands.Cog.listener()
+    async def on_db_ready(self):
+        rules = await get_automod_rules(self.bot)
+        self.filter.load(rules)
+        print(f"✅ Loaded {len(rules)} automod rules for {len(self.filter.rules)} guilds.")
+
+    async def reload_rules(self, guild_id):
+        self.filter.set_rules(guild_id, await get_automod_rules(self.bot, guild_id))
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+        # Moderators are trusted to quote banned words, e.g. when explaining a rule
+        if message.author.guild_permissions.manage_messages:
+            return
+        guild_id = message.guild.id
+
+        config = await get_guild_config(self.bot, guild_id)
+        if config.get("flood_rate"):
+            verdict = self.flood.check(guild_id, message.author.id, message.content, config["flood_rate"],
+                                       config["flood_seconds"], config["flood_duplicates"])
+            if verdict:
+                what = "repeated messages" if verdict == "duplicate" else "message flood"
+                await self.enforce(message, config["flood_action"] or "delete", config["flood_duration"], f"Anti-flood: {what}")
+                return
+
+        if guild_id in self.filter.rules:
+            rule = self.filter.check(guild_id, message.content)
+            if rule:
+                await self.enforce(message, rule["action"], rule["duration"], f"Automod: blocked {rule['kind']} `{rule['pattern']}`")
+
+    async def enforce(self, message, action, duration, reason):
+        guild, member = message.guild, message.author
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            print(f"⚠️ Automod could not delete a message in #{message.channel} ({guild.name}): {e}")
+
+        moderation = self.bot.get_cog("Moderation")
+        if action == "delete" or moderation is None:
+            await message.channel.send(f"🚫 {member.mention}, that message isn't allowed here. {reason}", delete_after=5)
+            return
+
+        if action == "mute":
+            try:
+                await moderation.mute_member(guild, member, duration, reason, message.channel)
+            except discord.HTTPException as e:
+                print(f"⚠️ Automod could not mute {member} in {guild.name}: {e}")
+                return
+            await message.channel.send(f"🔇 {member.mention} has been muted for {duration or 'indefinitely'}. {reason}")
+            await moderation.log_action(guild, guild.me, "Muted", member, reason, duration, message.channel)
+        else:
+            await message.channel.send(f"⚠️ {member.mention} has been warned. {reason}")
+            await moderation.log_action(guild, guild.me, "Warned", member, reason, channel=message.channel)
+
+    # ---------------- Automod Rules ----------------
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def automod(self, ctx):
+        await ctx.send("ℹ️ Usage: `.automod add <word/link> <pattern> [delete/warn/mute] [duration]`, "
+                       "`.automod list`, `.automod remove <id>`, `.automod stats`")
+
+    @automod.command(name="add")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_add(self, ctx, kind: str, pattern: str, action: str = "delete", duration: str = None):
+        kind, action, pattern = kind.lower(), action.lower(), pattern.strip().lower()
+        if kind == "link":
+            pattern = pattern.removeprefix("https://").removeprefix("http://").split("/")[0]
+        if kind not in AUTOMOD_KINDS or action not in ACTION_SEVERITY or not pattern or len(pattern) > MAX_PATTERN_LENGTH:
+            await ctx.send("❌ Example: `.automod add word badword warn`, `.automod add link example.com mute 10m` "
+                           "or `.automod add link * delete` to block all links.", delete_after=5)
+            return
+        if action != "mute":
+            duration = None
+
+        await add_automod_rule(self.bot, ctx.guild.id, kind, pattern, action, duration)
+        await self.reload_rules(ctx.guild.id)
+        until = f" for {duration}" if duration else ""
+        await ctx.send(f"✅ Automod: {kind} `{pattern}` → {action}{until}.")
+
+    @automod.command(name="list")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_list(self, ctx):
+        rules = await get_automod_rules(self.bot, ctx.guild.id)
+        if not rules:
+            await ctx.send("ℹ️ No automod rules set.")
+            return
+        lines = []
+        for r in rules:
+            until = f" for {r['duration']}" if r["duration"] else ""
+            lines.append(f"`#{r['id']}` {r['kind']} `{r['pattern']}` → {r['action']}{until}")
+        # Long word lists can exceed one message
+        chunk = "🛡️ Automod rules:"
+        for line in lines:
+            if len(chunk) + len(line) + 1 > 2000:
+                await ctx.send(chunk)
+                chunk = ""
+            chunk += "\n" + line
+        await ctx.send(chunk)
+
+    @automod.command(name="remove")
+    @commands.has_permissions(manage_guild=True)
+    async def automod_remove(self, ctx, rule_id: int):
+        if not await remove_automod_rule(self.bot, ctx.guild.id, rule_id):
+            await ctx.send("❌ No rule with that id.", delete_after=5)
+            return
+        await self.reload_rules(ctx.guild.id)
+        await ctx.send(f"✅ Removed automod rule `#{rule_id}`.")
+
+    @automod.command(name="stats")
+    @commands.is_owner()
+    async def automod_stats(self, ctx):
+        stats = self.filter.stats()
+        flood = self.flood.stats()
+        await ctx.send(f"🛡️ {stats['rules']} rules in {stats['guilds']} guilds ({stats['compiled']} compiled, "
+                       f"{stats['compiles']} builds) | {stats['checked']} messages checked, avg `{stats['avg_check_us']}µs`\n"
+                       f"🌊 Anti-flood: {flood['tracked']} users tracked ({flood['evicted']} evicted) | "
+                       f"{flood['checked']} messages checked, {flood['flagged']} flagged, avg `{flood['avg_check_us']}µs`")
+
+    # ---------------- Anti-Flood ----------------
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def antiflood(self, ctx):
+        config = await get_guild_config(self.bot, ctx.guild.id)
+        if not config.get("flood_rate"):
+            await ctx.send("ℹ️ Anti-flood is off. Usage: `.antiflood set <messages> <seconds> [duplicates] [delete/warn/mute] [duration]`, `.antiflood off`")
+            return
+        dupes = f", {config['flood_duplicates']} identical messages" if config["flood_duplicates"] else ""
+        until = f" for {config['flood_duration']}" if config["flood_duration"] else ""
+        await ctx.send(f"🌊 Anti-flood: more than {config['flood_rate']} messages in {config['flood_seconds']}s{dupes} "
+                       f"→ {config['flood_action']}{until}.")
+
+    @antiflood.command(name="set")
+    @commands.has_permissions(manage_guild=True)
+    async def antiflood_set(self, ctx, rate: int, seconds: int, duplicates: int = 0, action: str = "delete", duration: str = None):
+        action = action.lower()
+        if rate < 1 or seconds < 1 or action not in ACTION_SEVERITY or duplicates == 1 or not 0 <= duplicates <= HASH_RING_SIZE:
+            await ctx.send(f"❌ Example: `.antiflood set 5 5 3 mute 10m` (5 messages per 5s, 3 repeats; repeats 2-{HASH_RING_SIZE} or 0 to skip).", delete_after=5)
+            return
+        if action != "mute":
+            duration = None
+        await set_flood_config(self.bot, ctx.guild.id, rate, seconds, duplicates or None, action, duration)
+        until = f" for {duration}" if duration else ""
+        await ctx.send(f"✅ Anti-flood: more than {rate} messages in {seconds}s → {action}{until}.")
+
+    @antiflood.command(name="off")
+    @commands.has_permissions(manage_guild=True)
+    async def antiflood_off(self, ctx):
+        await set_flood_config(self.bot, ctx.guild.id, None, None, None, None)
+        await ctx.send("✅ Anti-flood disabled.")
+
+
+async def setup(bot):
+    await bot.add_cog(AutoMod(bot))
@@ -1,92 +1,95 @@
 # /cogs/events.py
 import discord
-from discord.utils import utcnow
 from discord.ext import commands
-from db.database import get_channel_id
-from db.database import get_autoroles
+from db.database import get_channel_id, get_guild_config
+from db.database import get_autoroles, warm_guild_caches, set_join_burst_config
+from utils.joinburst import BurstQueue
+from utils.templates import member_list, welcome_embed, goodbye_embed
+
+JOIN_BURST_THRESHOLD = 5   # joins per window before welcomes are batched
+JOIN_BURST_WINDOW = 10     # seconds
 
 
 class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.joins = BurstQueue(self.send_welcomes)
+        self.leaves = BurstQueue(self.send_goodbyes)
+
+    def burst_settings(self, config):
+        return (config.get("join_burst_threshold") or JOIN_BURST_THRESHOLD,
+                config.get("join_burst_window") or JOIN_BURST_WINDOW)
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
         guild = member.guild
-        guild_id = guild.id
-
-        # Get autoroles
-        role_ids = await get_autoroles(self.bot, member.guild.id)
-        roles = [member.guild.get_role(rid) for rid in role_ids]
-        roles = [r for r in roles if r is not None]
-        try:
-            await member.add_roles(*roles)
-        except Exception as e:
-            print(f"⚠️ Could not assign autoroles to {member.name}: {e}")
-
-        # Send welcome message
-        welcome_channel_id = await get_channel_id(self.bot, guild_id, "welcome_channel")
-        rules_channel_id = await get_channel_id(self.bot, guild_id, "rules_channel")
-        roles_channel_id = await get_channel_id(self.bot, guild_id, "role_channel")
-        introduction_channel_id = await get_channel_id(self.bot, guild_id, "introduction_channel")
+
+        # Listed raid/scam accounts are banned or quarantined before any welcome
+        sharedbans = self.bot.get_cog("SharedBans")
+        if sharedbans and await sharedbans.check_join(member):
+            return
+
+        # Autoroles are assigned by a background worker with retries
+        self.bot.autorole_worker.enqueue(member, await get_autoroles(self.bot, guild.id))
+
+        config = await get_guild_config(self.bot, guild.id)
+        if self.joins.submit(guild, member, *self.burst_settings(config)):
+            await self.send_welcomes(guild, [member])
+
+    async def send_welcomes(self, guild, members):
+        """One welcome embed and one rules ping, for a single join or a whole batch."""
+        config = await get_guild_config(self.bot, guild.id)
+        welcome_channel_id = config.get("welcome_channel")
+        rules_channel_id = config.get("rules_channel")
 
         if welcome_channel_id:
             welcome_channel = self.bot.get_channel(welcome_channel_id)
             if welcome_channel:
-                now = utcnow()
-                unix_ts = int(now.timestamp())
-
-                rules_text = f"<a:exclamation:1350752095720177684> Read the rules in <#{rules_channel_id}>" if rules_channel_id else "<a:exclamation:1350752095720177684> Read the rules in the rules channel."
-                roles_text = f"<a:exclamation:1350752095720177684> Get yourself a role on <#{roles_channel_id}>" if roles_channel_id else "<a:exclamation:1350752095720177684> Get yourself a role in the roles channel."
-                intro_text = f"<a:exclamation:1350752095720177684> Introduce yourself in <#{introduction_channel_id}>" if introduction_channel_id else "<a:exclamation:1350752095720177684> Introduce yourself in the introduction channel."
-
-                embed = discord.Embed(
-                    title=f"👋 Welcome, {member.name}!",
-                    description=f"We're excited to see you here!\n\n"
-                                f"`Welcome to {guild.name}`\n\n"
-                                f"{rules_text}\n\n"
-                                f"{roles_text}\n\n"
-                                f"{intro_text}\n\n"
-                                f"**Start having fun!** 🎉\n\n"
-                                f"Enjoy your stay! If you have any questions, feel free to ask. | Today at <t:{unix_ts}:t>",
-                    color=discord.Color.green()
-                )
-                embed.set_author(name=guild.name, icon_url=guild.icon.url if guild.icon else None)
-                embed.set_thumbnail(url=member.display_avatar.url)
-
+                embed = await welcome_embed(self.bot, guild, members)
                 await welcome_channel.send(embed=embed)
 
         if rules_channel_id:
             rules_channel = self.bot.get_channel(rules_channel_id)
             if rules_channel:
-                msg = await rules_channel.send(f"📜 {member.mention}, please read the rules!")
+                # Mentions in one message, kept under Discord's 2000 character limit
+                msg = await rules_channel.send(f"📜 {member_list(members, limit=50)}, please read the rules!")
                 await msg.delete(delay=1)
 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
-        guild = member.guild
-        guild_id = guild.id
-
-            # Get goodbye channel
-        goodbye_channel_id = await get_channel_id(self.bot, guild_id, "goodbye_channel")
-
+        config = await get_guild_config(self.bot, member.guild.id)
+        if not config.get("goodbye_channel"):
+            return
+        if self.leaves.submit(member.guild, member, *self.burst_settings(config)):
+            await self.send_goodbyes(member.guild, [member])
+
+    async def send_goodbyes(self, guild, members):
+        goodbye_channel_id = await get_channel_id(self.bot, guild.id, "goodbye_channel")
         if goodbye_channel_id:
             goodbye_channel = self.bot.get_channel(goodbye_channel_id)
             if goodbye_channel:
-
-                embed = discord.Embed(
-                    title=f"👋 Farewell, {member.name}",
-                    description=f"{member.mention} has left **{guild.name}**.\n\n"
-                                f"Thanks for being part of our community.\n"
-                                f"Wish you the best wherever you go! ✨\n\n",
-                    color=discord.Color.red()
-                )
-                embed.set_thumbnail(url=member.display_avatar.url)
-
-                await goodbye_channel.send(embed=embed)
+                await goodbye_channel.send(embed=await goodbye_embed(self.bot, guild, members))
+
+    @commands.command()
+    @commands.has_permissions(manage_guild=True)
+    async def joinburst(self, ctx, threshold: int = None, seconds: int = None):
+        if threshold is None:
+            config = await get_guild_config(self.bot, ctx.guild.id)
+            threshold, window = self.burst_settings(config)
+            stats = self.joins.stats()
+            await ctx.send(f"ℹ️ Welcomes are combined once more than **{threshold}** members join within **{window}s**. "
+                           f"Change it with `.joinburst <joins> <seconds>`. ({stats['batched']} joins batched since start)")
+            return
+        if threshold < 1 or not seconds or not 1 <= seconds <= 300:
+            await ctx.send("❌ Example: `.joinburst 5 10` (more than 5 joins in 10 seconds, window up to 300s).", delete_after=5)
+            return
+        await set_join_burst_config(self.bot, ctx.guild.id, threshold, seconds)
+        await ctx.send(f"✅ Welcomes and goodbyes will be combined above {threshold} per {seconds}s.")
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
+        await warm_guild_caches(self.bot, [guild.id])
+
         channel = guild.system_channel
         if channel is None:
             for c in guild.text_channels:
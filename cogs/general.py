@@ -1,69 +1,131 @@
 # /cogs/general.py
-import discord, random, asyncio, time, re
+import discord, asyncio, time, re
 from discord.ext import commands
-from discord.ui import View, Button
-from discord import TextChannel
-from discord.utils import utcnow, format_dt
+from discord.utils import format_dt
+from db.database import db_stats, cache_stats
+from utils.serverstats import ServerStatsCache, channel_kind
+from utils.dice import DiceError, simulate, summarize, format_histogram, roll as roll_dice_expression
+
+DICE_SHOW_LIMIT = 30
+DICE_MAX_RUNS = 100_000
 
 class General(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bully_surdi_active = False
-        self.surdi_user_id = 609342457301303308
-
-    @commands.command()
-    async def bully(self, ctx, target: str = None, toggle: str = None):
-        excluded_user_id = 609342457301303308
-
-        if ctx.author.id == excluded_user_id:
-            await ctx.send("idih ngapain sur")
-            return
-    
-        if target and target.lower() == "surdi":
-            if toggle and toggle.lower() == "on":
-                self.bully_surdi_active = True
-                await ctx.send("👀 Bully Surdi is now **ON**.")
-            elif toggle and toggle.lower() == "off":
-                self.bully_surdi_active = False
-                await ctx.send("😇 Bully Surdi is now **OFF**.")
-            else:
-                await ctx.send("❓ Use `.bully surdi on` or `.bully surdi off`")
-        else:
-            await ctx.send("❓ Use `.bully surdi on` or `.bully surdi off`")
-
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot:
-            return
-
-        if self.bully_surdi_active:
-            for user in message.mentions:
-                if user.id == self.surdi_user_id:
-                    await message.channel.send("sst gausah ping. surdi itu gay, kriminal wanita, narsis pula, mending jauh jauh deh")
-                    break
-
-
-
+        self.server_stats = ServerStatsCache()
 
     @commands.command()
     async def ping(self, ctx):
         await ctx.send(f"🏓 \n Pong! Latency: `{round(self.bot.latency * 1000)}`ams")
 
     @commands.command()
+    @commands.is_owner()
+    async def dbstats(self, ctx):
+        stats = db_stats(self.bot)
+        embed = discord.Embed(title="🗄️ Database Stats", color=discord.Color.blurple())
+        embed.add_field(name="Pool", value=f"{stats['size']} open / {stats['idle']} idle / {stats['max_size']} max", inline=False)
+        embed.add_field(name="Queries", value=f"{stats['queries']} ({stats['errors']} errors, {stats['reconnects']} reconnects)", inline=False)
+        embed.add_field(name="Query Latency", value=f"avg `{stats['avg_query_ms']}ms` | max `{stats['max_query_ms']}ms`", inline=False)
+        embed.add_field(name="Pool Wait", value=f"avg `{stats['avg_wait_ms']}ms` | max `{stats['max_wait_ms']}ms`", inline=False)
+        writer = stats["infractions"]
+        embed.add_field(
+            name="Infraction Writer",
+            value=f"{writer['pending']} pending | {writer['written']} written in {writer['flushes']} flushes | {writer['failures']} failures | {writer['rejected']} rejected",
+            inline=False
+        )
+        autoroles = self.bot.autorole_worker.stats()
+        embed.add_field(
+            name="Autorole Worker",
+            value=f"{autoroles['queued']} queued | {autoroles['assigned']} assigned | {autoroles['failures']} failures | {autoroles['pending_retry']} awaiting retry",
+            inline=False
+        )
+        for name, cache in cache_stats(self.bot).items():
+            embed.add_field(
+                name=f"Cache: {name}",
+                value=f"{cache['size']}/{cache['max_size']} entries | {cache['hits']} hits / {cache['misses']} misses ({cache['hit_rate']}%)",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
+    @commands.group(invoke_without_command=True)
     async def serverinfo(self, ctx):
-        guild = ctx.guild
+        await ctx.send(embed=self.serverinfo_embed(ctx.guild, self.server_stats.get(ctx.guild)))
+
+    @serverinfo.command(name="refresh")
+    @commands.has_permissions(manage_guild=True)
+    async def serverinfo_refresh(self, ctx):
+        await ctx.send(embed=self.serverinfo_embed(ctx.guild, self.server_stats.get(ctx.guild, refresh=True)))
+
+    def serverinfo_embed(self, guild, stats):
         embed = discord.Embed(title=f"📌 Server Info - {guild.name}", color=discord.Color.green())
         embed.add_field(name="Owner", value=guild.owner, inline=False)
         embed.add_field(name="Created On", value=guild.created_at.strftime("%B %d, %Y"), inline=False)
-        embed.add_field(name="Members", value=guild.member_count, inline=False)
-        embed.add_field(name="Roles", value=len(guild.roles), inline=False)
-        embed.add_field(name="Text Channels", value=len([ch for ch in guild.channels if isinstance(ch, discord.TextChannel)]), inline=True)
-        embed.add_field(name="Voice Channels", value=len([ch for ch in guild.channels if isinstance(ch, discord.VoiceChannel)]), inline=True)
+        embed.add_field(name="Members", value=f"{guild.member_count} ({stats.humans} humans, {stats.bots} bots)", inline=False)
+        embed.add_field(name="Roles", value=stats.roles, inline=False)
+        embed.add_field(name="Text Channels", value=stats.text, inline=True)
+        embed.add_field(name="Voice Channels", value=stats.voice + stats.stage, inline=True)
+        embed.add_field(name="Categories", value=stats.categories, inline=True)
+        embed.add_field(name="Forums", value=stats.forums, inline=True)
+        embed.add_field(name="Active Threads", value=stats.threads, inline=True)
+        embed.add_field(name="Boosts", value=f"{stats.boosts} (level {guild.premium_tier})", inline=True)
+        embed.set_footer(text="Snapshot updated live" + (" • member list still loading" if stats.partial else ""))
 
         if guild.icon:
             embed.set_thumbnail(url=guild.icon.url)
+        return embed
 
-        await ctx.send(embed=embed)
+    # Keep the .serverinfo snapshots current instead of rescanning the guild per call
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.server_stats.channel(channel, 1)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.server_stats.channel(channel, -1)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if channel_kind(before) != channel_kind(after):
+            self.server_stats.channel(before, -1)
+            self.server_stats.channel(after, 1)
+
+    @commands.Cog.listener()
+    async def on_thread_create(self, thread):
+        self.server_stats.thread(thread, 1)
+
+    @commands.Cog.listener()
+    async def on_thread_delete(self, thread):
+        if not thread.archived:
+            self.server_stats.thread(thread, -1)
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before, after):
+        if before.archived != after.archived:
+            self.server_stats.thread(after, -1 if after.archived else 1)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.server_stats.role(role, 1)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.server_stats.role(role, -1)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.server_stats.member(member, 1)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.server_stats.member(member, -1)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        self.server_stats.guild_update(after)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.server_stats.discard(guild.id)
 
     @commands.command()
     async def help(self, ctx):
@@ -74,10 +136,11 @@ class General(commands.Cog):
         )
         embed.add_field(name=".help", value="Displays this help menu.", inline=False)
         embed.add_field(name=".ping", value="Checks the bot's latency.", inline=False)
-        embed.add_field(name=".serverinfo", value="Provides server information.", inline=False)
+        embed.add_field(name=".serverinfo [refresh]", value="Provides server information.", inline=False)
         embed.add_field(name=".gamehelp", value="List of Game's commands.", inline=False)
         embed.add_field(name=".modhelp", value="List of admin's commands help.", inline=False)
-        embed.add_field(name=".giveaway", value="To create a Giveaway.", inline=False)
+        embed.add_field(name=".roll <dice>", value="To roll dice, e.g. `d20`, `8d6+4`, `4d6kh3`, `3d6!` or `3d6 stats 10000`.", inline=False)
+        embed.add_field(name=".giveaway <create/end/reroll>", value="To create, end early or reroll a Giveaway.", inline=False)
         await ctx.send(embed=embed)
 
     @commands.command()
@@ -88,11 +151,24 @@ class General(commands.Cog):
         )
         embed.add_field(name=".channelhelp", value="(Admin) Set welcome, rules, or heartbeat channels.", inline=False)
         embed.add_field(name=".infraction", value="To see Member's list of infractions.", inline=False)
+        embed.add_field(name=".infraction search <query> [since] [action]", value="To search infraction reasons across the server.", inline=False)
         embed.add_field(name=".clearinfractions", value="To clear member's infractions.", inline=False)
+        embed.add_field(name=".infractions export [csv/jsonl] [since]", value="To download the server's infractions as a file.", inline=False)
         embed.add_field(name=".mute", value="To mute a member.", inline=False)
+        embed.add_field(name=".muterole <set/sync>", value="To set the Muted role or re-apply its channel overwrites.", inline=False)
         embed.add_field(name=".kick", value="To kick a member.", inline=False)
         embed.add_field(name=".ban", value="To ban a member.", inline=False)
-        embed.add_field(name=".ar <add/remove/list>", value="To add, remove or see autorole list ", inline=False)
+        embed.add_field(name=".massban/.masskick/.massmute <ids|joined:10m> [reason]", value="To action many users at once. IDs can also come from an attached file; massmute takes `duration:1h`.", inline=False)
+        embed.add_field(name=".purge <amount> [@member] [bots/links/attachments] [regex:] [after:] [before:] [dry]", value="To delete messages in bulk. `dry` only counts matches.", inline=False)
+        embed.add_field(name=".escalation <add/list/remove>", value="To set automatic punishments, e.g. 3 warns in 1d → mute 1h.", inline=False)
+        embed.add_field(name=".automod <add/list/remove>", value="To filter banned words or link domains, e.g. `.automod add word badword warn`.", inline=False)
+        embed.add_field(name=".antiflood set <messages> <seconds> [repeats] [action] [duration]", value="To act on message floods and repeated spam, e.g. `.antiflood set 5 5 3 mute 10m`.", inline=False)
+        embed.add_field(name=".trigger <add/list/remove>", value="To auto-reply, react or delete on a mention, keyword or regex.", inline=False)
+        embed.add_field(name=".welcometemplate <set/show/reset>", value="To customize the welcome or goodbye text with placeholders like `{member}` and `{rules}`.", inline=False)
+        embed.add_field(name=".joinburst [joins] [seconds]", value="To combine welcomes and goodbyes during mass joins or raids.", inline=False)
+        embed.add_field(name=".sharedban mode <off/ban/quarantine>", value="To ban or mute accounts from the network-wide raid/scam list when they join.", inline=False)
+        embed.add_field(name=".rolemenu <create/add/remove/publish/list/delete>", value="To post self-assign role menus as buttons, a select menu or reactions, in the role channel by default.", inline=False)
+        embed.add_field(name=".ar <add/remove/list/backfill>", value="To add, remove or see autorole list, or give it to existing members.", inline=False)
         embed.add_field(name=".say", value="To send a message using Bot's embed feature.", inline=False)
         await ctx.send(embed=embed)
 
@@ -138,85 +214,42 @@ class General(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    def parse_time(self, timestr: str) -> int:
-        """Parses time like 1h30m into seconds"""
-        time_units = {"m": 60, "h": 3600, "d": 86400, "mo": 2592000, "y": 31536000}
-        pattern = r"(\d+)([a-zA-Z]+)"
-        matches = re.findall(pattern, timestr)
-        total_seconds = 0
-        for value, unit in matches:
-            unit = unit.lower()
-            if unit in time_units:
-                total_seconds += int(value) * time_units[unit]
-        return total_seconds
-
-    class GiveawayView(View):
-        def __init__(self, timeout):
-            super().__init__(timeout=timeout)
-            self.participants = set()
-
-        @discord.ui.button(label="🎉 Join Giveaway", style=discord.ButtonStyle.green)
-        async def join_button(self, interaction: discord.Interaction, button: Button):
-            if interaction.user.id not in self.participants:
-                self.participants.add(interaction.user.id)
-                await interaction.response.send_message("✅ You've joined the giveaway!", ephemeral=True)
-            else:
-                await interaction.response.send_message("⚠️ You already joined!", ephemeral=True)
-
-    @commands.group()
-    @commands.has_permissions(manage_messages=True)
-    async def giveaway(self, ctx):
-        if ctx.invoked_subcommand is None:
-            await ctx.send("❌ Usage: `.giveaway create <#channel> <winners> <duration> <prize>`")
-
-    @giveaway.command()
-    async def create(self, ctx, channel: TextChannel, winners: int, duration: str, *, prize: str):
-        total_seconds = self.parse_time(duration)
-        if total_seconds < 30:
-            await ctx.send("❌ Duration must be at least 30 seconds.")
+    @commands.command()
+    async def roll(self, ctx, *, dice: str):
+        # `.roll 3d6 stats 10000` simulates the expression instead of rolling it once
+        stats = re.fullmatch(r"(.+?)\s+stats(?:\s+(\d+))?", dice.strip(), re.IGNORECASE)
+        try:
+            if stats:
+                runs = min(int(stats.group(2) or 10000), DICE_MAX_RUNS)
+                totals = await asyncio.to_thread(simulate, stats.group(1), runs)
+                summary = summarize(totals)
+                await ctx.send(f"🎲 `{stats.group(1)}` x{runs}: min **{summary['min']}** | max **{summary['max']}** | "
+                               f"mean **{summary['mean']:.2f}**\n```\n{format_histogram(summary['histogram'])}\n```")
+                return
+            result = roll_dice_expression(dice)
+        except DiceError as e:
+            await ctx.send(f"❌ Invalid roll: {e}. Try `.roll d20`, `.roll 8d6+4`, `.roll 4d6kh3`, `.roll 3d6!` or `.roll 3d6 stats 10000`")
             return
 
-        now = utcnow()
-        end_timestamp = int((now.timestamp()) + total_seconds)
-
-        embed = discord.Embed(
-            title="🎉 New Giveaway!",
-            description=(
-                f"**Prize:** {prize}\n"
-                f"**Winners:** {winners}\n"
-                f"**Hosted by:** {ctx.author.mention}\n"
-                f"**Time Remaining:** <t:{end_timestamp}:R>\n"
-                f"**Ends at:** <t:{end_timestamp}:t>"
-            ),
-            color=discord.Color.gold()
-        )
-
-        view = self.GiveawayView(timeout=total_seconds)
-        await channel.send(embed=embed, view=view)
-        await ctx.send(f"✅ Giveaway started in {channel.mention} for **{prize}**!")
-
-        await asyncio.sleep(total_seconds)
-        view.stop()
-
-        if view.participants:
-            winner_ids = random.sample(list(view.participants), min(winners, len(view.participants)))
-            winner_mentions = ", ".join(ctx.guild.get_member(w).mention for w in winner_ids if ctx.guild.get_member(w))
-            await channel.send(f"🎉 Congratulations {winner_mentions}! You won **{prize}**!")
-        else:
-            await channel.send("No one joined the giveaway 😢.")
-
-    @commands.command()
-    async def roll(self, ctx, dice: str):
-        if dice.startswith('d') and dice[1:].isdigit():
-            max_num = int(dice[1:])
-            if max_num > 0:
-                result = random.randint(1, max_num)
-                await ctx.send(f'🎲 {ctx.author.mention} You rolled **{result}**!')
-            else:
-                await ctx.send('❌ Please use a number greater than 0!')
+        parts = result.parts
+        if len(parts) == 1 and parts[0][0].count == 1 and not parts[0][2] and len(parts[0][1]) == 1:
+            await ctx.send(f'🎲 {ctx.author.mention} You rolled **{result.total}**!')
+            return
+        if sum(len(kept) + len(dropped) for term, kept, dropped in parts if term.sides) <= DICE_SHOW_LIMIT:
+            shown = []
+            for term, kept, dropped in parts:
+                sign = "-" if term.sign < 0 else "+"
+                if not term.sides:
+                    shown.append(f"{sign} {term.count}")
+                    continue
+                dropped_text = " " + " ".join(f"~~{d}~~" for d in dropped) if dropped else ""
+                shown.append(f"{sign} `{term.text}` {kept}{dropped_text}")
+            breakdown = " ".join(shown).removeprefix("+ ")
+            await ctx.send(f'🎲 {ctx.author.mention} You rolled **{result.total}**! {breakdown}')
         else:
-            await ctx.send('❌ Invalid format! Use `.roll d<number>`')
-
+            summary = summarize([v for term, kept, _ in parts if term.sides for v in kept])
+            await ctx.send(f"🎲 {ctx.author.mention} You rolled **{result.total}**! ({summary['count']} dice: min {summary['min']}, "
+                           f"max {summary['max']}, mean {summary['mean']:.2f})\n```\n{format_histogram(summary['histogram'])}\n```")
 
 async def setup(bot):
     await bot.add_cog(General(bot))
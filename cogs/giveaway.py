@@ -0,0 +1,233 @@
+# /cogs/giveaway.py
+import discord, random, re, time
+from discord.ext import commands, tasks
+from discord.ui import View, Button
+from discord import TextChannel
+from db.database import create_giveaway, set_giveaway_message, get_giveaway, get_active_giveaways, finish_giveaway
+from db.database import add_giveaway_entries, get_giveaway_entries
+from utils.idset import CompactIdSet
+
+ENTRY_FLUSH_SECONDS = 2
+# Random picks to try per winner before giving up on entrants who left the server
+DRAWS_PER_WINNER = 5
+
+
+class GiveawayView(View):
+    """Persistent join button; the giveaway is looked up from the message it is attached to."""
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="🎉 Join Giveaway", style=discord.ButtonStyle.green, custom_id="giveaway:join")
+    async def join_button(self, interaction: discord.Interaction, button: Button):
+        await self.cog.join(interaction)
+
+
+class Giveaways(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.active = {}    # message_id -> giveaway row
+        self.entries = {}   # giveaway_id -> CompactIdSet of entrants
+        self.pending = {}   # giveaway_id -> entrant ids not yet written
+        self.loaded = False
+        self.view = GiveawayView(self)
+        # Buttons on giveaway messages from before a restart route here by custom_id
+        bot.add_view(self.view)
+        bot.scheduler.register("giveaway_end", self.expire_giveaway)
+
+    async def cog_load(self):
+        self.flush_entries.start()
+
+    async def cog_unload(self):
+        self.flush_entries.cancel()
+        await self.write_entries()
+
+    @commands.Cog.listener()
+    async def on_db_ready(self):
+        giveaways = await get_active_giveaways(self.bot)
+        total = 0
+        for giveaway in giveaways:
+            entries = CompactIdSet.from_sorted(await get_giveaway_entries(self.bot, giveaway["id"]))
+            self.entries[giveaway["id"]] = entries
+            if giveaway["message_id"]:
+                self.active[giveaway["message_id"]] = giveaway
+            total += len(entries)
+        self.loaded = True
+        print(f"✅ Loaded {len(giveaways)} running giveaways with {total} entries.")
+
+    # ---------------- Entries ----------------
+    async def join(self, interaction):
+        if not self.loaded:
+            await interaction.response.send_message("⏳ Giveaways are still loading, try again in a moment.", ephemeral=True)
+            return
+        giveaway = self.active.get(interaction.message.id)
+        if giveaway is None:
+            await interaction.response.send_message("⌛ This giveaway has ended.", ephemeral=True)
+            return
+        if self.entries[giveaway["id"]].add(interaction.user.id):
+            self.pending.setdefault(giveaway["id"], []).append(interaction.user.id)
+            await interaction.response.send_message("✅ You've joined the giveaway!", ephemeral=True)
+        else:
+            await interaction.response.send_message("⚠️ You already joined!", ephemeral=True)
+
+    @tasks.loop(seconds=ENTRY_FLUSH_SECONDS)
+    async def flush_entries(self):
+        await self.write_entries()
+
+    async def write_entries(self):
+        """Writes buffered entries with one batched insert per giveaway."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        try:
+            await add_giveaway_entries(self.bot, batch)
+        except Exception as e:
+            print(f"⚠️ Could not save {sum(len(v) for v in batch.values())} giveaway entries, retrying: {e}")
+            for giveaway_id, user_ids in batch.items():
+                self.pending.setdefault(giveaway_id, []).extend(user_ids)
+
+    # ---------------- Drawing ----------------
+    def draw(self, guild, entries, count, exclude=()):
+        """Picks up to `count` entrants still in the guild by random index into the sorted ids."""
+        size = len(entries)
+        exclude = set(exclude)
+        winners = []
+        # sample() over a range picks indices without materialising the range
+        for index in random.sample(range(size), min(size, count * DRAWS_PER_WINNER + len(exclude))):
+            user_id = entries[index]
+            if user_id not in exclude and guild.get_member(user_id):
+                winners.append(user_id)
+                if len(winners) == count:
+                    break
+        return winners
+
+    def make_embed(self, giveaway, winner_ids=None):
+        host = f"<@{giveaway['host_id']}>"
+        if winner_ids is None:
+            return discord.Embed(
+                title="🎉 New Giveaway!",
+                description=(
+                    f"**Prize:** {giveaway['prize']}\n"
+                    f"**Winners:** {giveaway['winners']}\n"
+                    f"**Hosted by:** {host}\n"
+                    f"**Time Remaining:** <t:{giveaway['ends_at']}:R>\n"
+                    f"**Ends at:** <t:{giveaway['ends_at']}:t>"
+                ),
+                color=discord.Color.gold()
+            )
+        winners = ", ".join(f"<@{w}>" for w in winner_ids) or "No valid entrants"
+        return discord.Embed(
+            title="🎉 Giveaway Ended",
+            description=(
+                f"**Prize:** {giveaway['prize']}\n"
+                f"**Winners:** {winners}\n"
+                f"**Hosted by:** {host}\n"
+                f"**Ended:** <t:{int(time.time())}:R>"
+            ),
+            color=discord.Color.dark_grey()
+        )
+
+    async def expire_giveaway(self, entry):
+        await self.end_giveaway(entry["guild_id"], entry["target_id"])
+
+    async def end_giveaway(self, guild_id, giveaway_id):
+        """Draws winners and closes the giveaway; returns the row, or None if it was not running."""
+        giveaway = await get_giveaway(self.bot, guild_id, giveaway_id)
+        if giveaway is None or giveaway["ended"]:
+            return None
+        self.active.pop(giveaway["message_id"], None)
+        await self.write_entries()
+        entries = self.entries.pop(giveaway["id"], None)
+        if entries is None:
+            entries = CompactIdSet.from_sorted(await get_giveaway_entries(self.bot, giveaway["id"]))
+
+        guild = self.bot.get_guild(guild_id)
+        winner_ids = self.draw(guild, entries, giveaway["winners"]) if guild else []
+        await finish_giveaway(self.bot, giveaway["id"], winner_ids)
+
+        channel = self.bot.get_channel(giveaway["channel_id"])
+        if channel is None:
+            return giveaway
+        if giveaway["message_id"]:
+            try:
+                await channel.get_partial_message(giveaway["message_id"]).edit(embed=self.make_embed(giveaway, winner_ids), view=None)
+            except discord.HTTPException:
+                pass
+        if winner_ids:
+            mentions = ", ".join(f"<@{w}>" for w in winner_ids)
+            await channel.send(f"🎉 Congratulations {mentions}! You won **{giveaway['prize']}**!")
+        else:
+            await channel.send("No one joined the giveaway 😢.")
+        return giveaway
+
+    def parse_time(self, timestr: str) -> int:
+        """Parses time like 1h30m into seconds"""
+        time_units = {"m": 60, "h": 3600, "d": 86400, "mo": 2592000, "y": 31536000}
+        pattern = r"(\d+)([a-zA-Z]+)"
+        matches = re.findall(pattern, timestr)
+        total_seconds = 0
+        for value, unit in matches:
+            unit = unit.lower()
+            if unit in time_units:
+                total_seconds += int(value) * time_units[unit]
+        return total_seconds
+
+    # ---------------- Commands ----------------
+    @commands.group()
+    @commands.has_permissions(manage_messages=True)
+    async def giveaway(self, ctx):
+        if ctx.invoked_subcommand is None:
+            await ctx.send("❌ Usage: `.giveaway create <#channel> <winners> <duration> <prize>`, "
+                           "`.giveaway end <message id>`, `.giveaway reroll <message id> [winners]`")
+
+    @giveaway.command()
+    async def create(self, ctx, channel: TextChannel, winners: int, duration: str, *, prize: str):
+        total_seconds = self.parse_time(duration)
+        if total_seconds < 30:
+            await ctx.send("❌ Duration must be at least 30 seconds.")
+            return
+        if winners < 1:
+            await ctx.send("❌ There must be at least one winner.")
+            return
+
+        end_timestamp = int(time.time()) + total_seconds
+        giveaway = await create_giveaway(self.bot, ctx.guild.id, channel.id, ctx.author.id, prize, winners, end_timestamp)
+        message = await channel.send(embed=self.make_embed(giveaway), view=self.view)
+        await set_giveaway_message(self.bot, giveaway["id"], message.id)
+        giveaway["message_id"] = message.id
+
+        self.entries[giveaway["id"]] = CompactIdSet()
+        self.active[message.id] = giveaway
+        await self.bot.scheduler.schedule(ctx.guild.id, giveaway["id"], "giveaway_end", end_timestamp, channel.id)
+        await ctx.send(f"✅ Giveaway started in {channel.mention} for **{prize}**!")
+
+    @giveaway.command()
+    async def end(self, ctx, giveaway_id: int):
+        giveaway = await self.end_giveaway(ctx.guild.id, giveaway_id)
+        if giveaway is None:
+            await ctx.send("❌ No running giveaway with that message id.", delete_after=5)
+            return
+        await self.bot.scheduler.cancel(ctx.guild.id, giveaway["id"], "giveaway_end")
+        await ctx.send(f"✅ Ended the giveaway for **{giveaway['prize']}**.")
+
+    @giveaway.command()
+    async def reroll(self, ctx, giveaway_id: int, winners: int = 1):
+        giveaway = await get_giveaway(self.bot, ctx.guild.id, giveaway_id)
+        if giveaway is None or not giveaway["ended"]:
+            await ctx.send("❌ No finished giveaway with that message id.", delete_after=5)
+            return
+
+        entries = CompactIdSet.from_sorted(await get_giveaway_entries(self.bot, giveaway["id"]))
+        new_winners = self.draw(ctx.guild, entries, max(1, winners), exclude=giveaway["winner_ids"])
+        if not new_winners:
+            await ctx.send("😢 No other eligible entrants to reroll.")
+            return
+        await finish_giveaway(self.bot, giveaway["id"], list(giveaway["winner_ids"]) + new_winners)
+        mentions = ", ".join(f"<@{w}>" for w in new_winners)
+        channel = self.bot.get_channel(giveaway["channel_id"]) or ctx.channel
+        await channel.send(f"🎉 Reroll! Congratulations {mentions}! You won **{giveaway['prize']}**!")
+
+
+async def setup(bot):
+    await bot.add_cog(Giveaways(bot))
@@ -1,15 +1,128 @@
 # /cogs/moderation.py
-import discord, time, re, asyncio
+import discord, time, re, asyncio, os, csv, gzip, json, tempfile
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone, timedelta
 from discord.ext import commands
 from discord import app_commands
 from discord.ui import View, Button
 from discord.utils import utcnow
-from db.database import get_channel_id, set_channel_id, remove_channel_id, ensure_guild_exists, log_infraction, get_infractions
+from db.database import get_channel_id, get_guild_config, set_channel_id, remove_channel_id, ensure_guild_exists, log_infraction, count_infractions, get_infractions_page, clear_infractions, stream_infractions, search_infractions, log_infractions
 from db.database import add_autorole, remove_autorole, get_autoroles
+from db.database import add_escalation_rule, remove_escalation_rule, get_escalation_rules, get_recent_infractions
+from db.database import get_welcome_template, set_welcome_template, remove_welcome_template
+from utils.concurrency import run_bounded, with_backoff
+from utils.purge import PurgeFilter, purge_channel
+from utils.escalation import EscalationEngine
+from utils.templates import welcome_embed, goodbye_embed, check_template, TemplateError
+from utils.templates import DEFAULT_TEMPLATES, DYNAMIC_PLACEHOLDERS, CHANNEL_PLACEHOLDERS, TEMPLATE_KINDS, MAX_TEMPLATE_LENGTH
+
+INFRACTION_PAGE_SIZE = 5
+MUTE_OVERWRITE = discord.PermissionOverwrite(send_messages=False, speak=False, add_reactions=False)
+PURGE_LIMIT = 10000
+PURGE_SCAN_LIMIT = 50000
+MASS_ACTION_LIMIT = 1000
+MASS_CONCURRENCY = 5
+MASS_FILE_LIMIT = 1_048_576
+MASS_TARGET_PATTERN = re.compile(r"<@!?(\d{15,20})>|(\d{15,20})")
+ACTION_NAMES = {"warn": "Warned", "mute": "Muted", "kick": "Kicked", "ban": "Banned"}
+MAX_ESCALATION_DEPTH = 3
+
+
+def format_duration(seconds):
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+class InfractionPaginator(View):
+    """⬅️/➡️ paginator that fetches each page on demand and keeps the last few in an LRU."""
+
+    def __init__(self, total, fetch_page, make_embed, page_size=INFRACTION_PAGE_SIZE, cache_size=8, first_page=None):
+        super().__init__()
+        self.page = 0
+        self.page_count = max(1, -(-total // page_size))
+        self.fetch_page = fetch_page
+        self.make_embed = make_embed
+        self.cache_size = cache_size
+        self._pages = OrderedDict()
+        if first_page is not None:
+            self._pages[0] = first_page
+
+    async def get_page(self, page):
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+        records = await self.fetch_page(page)
+        self._pages[page] = records
+        if len(self._pages) > self.cache_size:
+            self._pages.popitem(last=False)
+        return records
+
+    async def render(self, page):
+        records = await self.get_page(page)
+        self.page = page
+        return self.make_embed(page, self.page_count, records)
+
+    @discord.ui.button(label="⬅️", style=discord.ButtonStyle.grey)
+    async def previous(self, interaction: discord.Interaction, button: Button):
+        if self.page > 0:
+            await interaction.response.edit_message(embed=await self.render(self.page - 1))
+
+    @discord.ui.button(label="➡️", style=discord.ButtonStyle.grey)
+    async def next(self, interaction: discord.Interaction, button: Button):
+        if self.page < self.page_count - 1:
+            await interaction.response.edit_message(embed=await self.render(self.page + 1))
+
+
+class ConfirmView(View):
+    def __init__(self, author):
+        super().__init__(timeout=60)
+        self.author = author
+        self.confirmed = False
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user != self.author:
+            await interaction.response.send_message("This is not your confirmation!", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: Button):
+        self.confirmed = True
+        await interaction.response.defer()
+        self.stop()
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.grey)
+    async def cancel(self, interaction: discord.Interaction, button: Button):
+        await interaction.response.defer()
+        self.stop()
+
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.muted_role_locks = defaultdict(asyncio.Lock)
+        self.escalation = EscalationEngine()
+        bot.scheduler.register("unmute", self.expire_mute)
+
+    @commands.Cog.listener()
+    async def on_db_ready(self):
+        rules = await get_escalation_rules(self.bot)
+        guild_ids = {r["guild_id"] for r in rules}
+        history = []
+        if guild_ids:
+            window = max(r["window_seconds"] for r in rules)
+            history = await get_recent_infractions(self.bot, guild_ids, int(time.time()) - window)
+        self.escalation.load(rules, history)
+        print(f"✅ Loaded {len(rules)} escalation rules and {len(history)} recent infractions.")
+
+    async def reload_escalation(self, guild_id):
+        """Applies changed rules and recounts the guild's recent infractions against them."""
+        self.escalation.set_rules(guild_id, await get_escalation_rules(self.bot, guild_id))
+        window = self.escalation.guild_window(guild_id)
+        history = await get_recent_infractions(self.bot, [guild_id], int(time.time()) - window) if window else []
+        self.escalation.rebuild(guild_id, history)
 
 # ---------------- Slash Commands ----------------
     @app_commands.command(name="setchannel", description="(Admin) Set moderation or system channels.")
@@ -105,48 +218,57 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command()
-    async def welcomepreview(self, ctx):
+    async def welcomepreview(self, ctx, kind: str = "welcome"):
         if not ctx.author.guild_permissions.manage_guild:
             await ctx.send("You need the 'Manage Server' permission to use this command!", delete_after=5)
             return
 
-        guild = ctx.guild
-        guild_id = guild.id
-        member = ctx.author
-
-        welcome_channel_id = await get_channel_id(self.bot, guild_id, "welcome_channel")
-        rules_channel_id = await get_channel_id(self.bot, guild_id, "rules_channel")
-        roles_channel_id = await get_channel_id(self.bot, guild_id, "role_channel")
-        introduction_channel_id = await get_channel_id(self.bot, guild_id, "introduction_channel")
-
-        now = utcnow()
-        unix_ts = int(now.timestamp())  # "Today at" is added manually below
-
-        rules_text = f"<a:exclamation:1350752095720177684> Read the rules in <#{rules_channel_id}>" if rules_channel_id else "<a:exclamation:1350752095720177684> Read the rules in the rules channel."
-        roles_text = f"<a:exclamation:1350752095720177684> Get yourself a role on <#{roles_channel_id}>" if roles_channel_id else "<a:exclamation:1350752095720177684> Get yourself a role in the roles channel."
-        intro_text = f"<a:exclamation:1350752095720177684> Introduce yourself in <#{introduction_channel_id}>" if introduction_channel_id else "<a:exclamation:1350752095720177684> Introduce yourself in the introduction channel."
-
-        description_text = (
-            f"We're excited to see you here!\n\n"
-            f"`Welcome to {guild.name}`\n\n"
-            f"{rules_text}\n\n"
-            f"{roles_text}\n\n"
-            f"{intro_text}\n\n"
-            f"Enjoy your stay! If you have any questions, feel free to ask. | Today at <t:{unix_ts}:t>"
-        )
-
-        embed = discord.Embed(
-            title=f"👋 Welcome, {member.name}!",
-            description=description_text,
-            color=discord.Color.green()
-        )
+        # Same cached renderer as the live join/leave path
+        if kind.lower() == "goodbye":
+            embed = await goodbye_embed(self.bot, ctx.guild, [ctx.author])
+        else:
+            embed = await welcome_embed(self.bot, ctx.guild, [ctx.author])
+        await ctx.send(embed=embed)
 
-        embed.set_author(name=guild.name, icon_url=guild.icon.url if guild.icon else None)
-        embed.set_thumbnail(url=member.display_avatar.url)
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def welcometemplate(self, ctx):
+        placeholders = ", ".join(f"`{{{p}}}`" for p in (*DYNAMIC_PLACEHOLDERS, *CHANNEL_PLACEHOLDERS))
+        await ctx.send("ℹ️ Usage: `.welcometemplate set <welcome/goodbye> <text>`, `.welcometemplate show <welcome/goodbye>`, "
+                       f"`.welcometemplate reset <welcome/goodbye>`. Placeholders: {placeholders}")
 
-        await ctx.send(embed=embed)
+    @welcometemplate.command(name="set")
+    @commands.has_permissions(manage_guild=True)
+    async def welcometemplate_set(self, ctx, kind: str, *, template: str):
+        kind = kind.lower()
+        if kind not in TEMPLATE_KINDS or len(template) > MAX_TEMPLATE_LENGTH:
+            await ctx.send(f"❌ Example: `.welcometemplate set welcome Hi {{member}}, welcome to {{guild}}! Read {{rules}}.` "
+                           f"(up to {MAX_TEMPLATE_LENGTH} characters)", delete_after=5)
+            return
+        try:
+            check_template(template)
+        except TemplateError as e:
+            await ctx.send(f"❌ Invalid template: {e}", delete_after=5)
+            return
+        await set_welcome_template(self.bot, ctx.guild.id, kind, template)
+        await ctx.send(f"✅ {kind.capitalize()} template updated. Preview it with `.welcomepreview {kind}`.")
 
+    @welcometemplate.command(name="show")
+    @commands.has_permissions(manage_guild=True)
+    async def welcometemplate_show(self, ctx, kind: str = "welcome"):
+        kind = kind.lower() if kind.lower() in TEMPLATE_KINDS else "welcome"
+        template = await get_welcome_template(self.bot, ctx.guild.id, kind)
+        label = "Custom" if template else "Default"
+        await ctx.send(f"📝 {label} {kind} template:\n```\n{(template or DEFAULT_TEMPLATES[kind])[:1900]}\n```")
 
+    @welcometemplate.command(name="reset")
+    @commands.has_permissions(manage_guild=True)
+    async def welcometemplate_reset(self, ctx, kind: str):
+        if kind.lower() not in TEMPLATE_KINDS:
+            await ctx.send("❌ Use `welcome` or `goodbye`.", delete_after=5)
+            return
+        await remove_welcome_template(self.bot, ctx.guild.id, kind.lower())
+        await ctx.send(f"✅ {kind.capitalize()} template reset to the default.")
 
     @commands.command()
     @commands.has_permissions(manage_messages=True)
@@ -154,46 +276,82 @@ class Moderation(commands.Cog):
         if not ctx.author.guild_permissions.manage_messages:
             await ctx.send("❌ You need the `Manage Messages` permission to use this command.", delete_after=5)
             return
-        
-        if len(args) == 0:
-            await ctx.send("❌ Usage: `.purge [@member] <amount>`", delete_after=5)
+
+        usage = ("❌ Usage: `.purge <amount> [@member...] [bots] [links] [attachments] "
+                 "[regex:<pattern>] [after:<2h>] [before:<1d>] [dry]`")
+        limit = None
+        author_ids, pattern = [], None
+        flags = {"bots": False, "links": False, "attachments": False, "dry": False}
+        after = before = None
+        for arg in args:
+            lowered = arg.lower()
+            target = MASS_TARGET_PATTERN.fullmatch(arg)
+            if target:
+                author_ids.append(int(target.group(1) or target.group(2)))
+            elif arg.isdigit():
+                limit = int(arg)
+            elif lowered in flags:
+                flags[lowered] = True
+            elif lowered in ("files", "images"):
+                flags["attachments"] = True
+            elif lowered.startswith("regex:"):
+                try:
+                    pattern = re.compile(arg[6:], re.IGNORECASE)
+                except re.error as e:
+                    await ctx.send(f"❌ Invalid regex: {e}", delete_after=5)
+                    return
+            elif lowered.startswith(("after:", "before:")):
+                key, value = lowered.split(":", 1)
+                seconds = self.parse_time(value)
+                if not seconds:
+                    await ctx.send(usage, delete_after=5)
+                    return
+                when = utcnow() - timedelta(seconds=seconds)
+                if key == "after":
+                    after = when
+                else:
+                    before = when
+            else:
+                try:
+                    member = await commands.MemberConverter().convert(ctx, arg)
+                except commands.BadArgument:
+                    await ctx.send(usage, delete_after=5)
+                    return
+                author_ids.append(member.id)
+
+        if not limit:
+            await ctx.send(usage, delete_after=5)
+            return
+        if limit > PURGE_LIMIT:
+            await ctx.send(f"❌ You can only purge up to {PURGE_LIMIT} messages at a time.", delete_after=5)
             return
 
+        purge_filter = PurgeFilter(author_ids, pattern, flags["attachments"], flags["links"], flags["bots"], after, before)
+        dry_run = flags["dry"]
+        verb = "Counting" if dry_run else "Purging"
+        status = await ctx.send(f"🧹 {verb} messages {purge_filter.describe()}...")
 
-        if len(args) == 1:
-            try:
-                limit = int(args[0])
-            except ValueError:
-                await ctx.send("❌ Please provide a valid number of messages to purge.", delete_after=5)
-                return
-            member = None
+        async def progress(result):
+            await status.edit(content=f"🧹 {verb}... scanned {result.scanned}, matched {result.matched}, deleted {result.deleted}")
 
-        else:
-            try:
-                member = await commands.MemberConverter().convert(ctx, args[0])
-                limit = int(args[1])
-            except (commands.BadArgument, ValueError):
-                await ctx.send("❌ Usage: `.purge [@member] <amount>`", delete_after=5)
-                return
+        result = await purge_channel(
+            ctx.channel, purge_filter, limit, PURGE_SCAN_LIMIT,
+            dry_run=dry_run, skip_ids={ctx.message.id, status.id}, on_progress=progress
+        )
 
-        if limit > 100:
-            await ctx.send("❌ You can only purge up to 100 messages at a time.", delete_after=5)
+        if dry_run:
+            await status.edit(content=f"🔎 {result.matched} of {result.scanned} scanned messages match ({purge_filter.describe()}).")
             return
-
-        def check(m):
-            return m.author == member if member else True
-
-        deleted = await ctx.channel.purge(limit=limit, check=check)
-        if member:
-            await ctx.send(f"✅ Deleted {len(deleted)} messages from {member.mention}.", delete_after=5)
-        else:
-            await ctx.send(f"✅ Deleted {len(deleted)} messages.", delete_after=5)
+        failed = f" {result.failed} could not be deleted." if result.failed else ""
+        await status.edit(content=f"✅ Deleted {result.deleted} messages ({purge_filter.describe()}).{failed}")
+        await status.delete(delay=5)
+        await ctx.message.delete()
 
 
     # Utility for time parsing
     def parse_time(self, time_str):
         time_units = {"m": 60, "h": 3600, "d": 86400, "mo": 2592000, "y": 31536000}
-        pattern = r"(\\d+)([a-zA-Z]+)"
+        pattern = r"(\d+)([a-zA-Z]+)"
         matches = re.findall(pattern, time_str)
         total_seconds = 0
         for value, unit in matches:
@@ -202,64 +360,176 @@ class Moderation(commands.Cog):
                 total_seconds += int(value) * time_units[unit]
         return total_seconds
 
-    # Centralized log function
+    def parse_since(self, since):
+        """Parses `30d`-style durations or YYYY-MM-DD dates into a unix timestamp"""
+        if not since:
+            return None
+        try:
+            return int(datetime.strptime(since, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+        except ValueError:
+            seconds = self.parse_time(since)
+            return int(time.time()) - seconds if seconds else None
+
+    # Centralized log function; channel posts go through the outbox so the command never waits on them
     async def mod_log(self, ctx, action: str, member: discord.Member, reason: str, duration: str = None):
-        guild_id = ctx.guild.id
-        log_channel_id = await get_channel_id(self.bot, guild_id, "log_channel")
-        list_channel_id = await get_channel_id(self.bot, guild_id, "list_channel")
+        await self.log_action(ctx.guild, ctx.author, action, member, reason, duration, ctx.channel)
+
+    async def log_action(self, guild, moderator, action, member, reason, duration=None, channel=None, depth=0):
+        guild_id = guild.id
+        config = await get_guild_config(self.bot, guild_id)
+        now = int(time.time())
 
         # ✅ DB logging here
-        await log_infraction(self.bot, guild_id, member.id, ctx.author.id, action, reason, int(time.time()))
+        await log_infraction(self.bot, guild_id, member.id, moderator.id, action, reason, now)
 
         # Mod Log Text
-        if log_channel_id:
-            log_channel = ctx.guild.get_channel(log_channel_id)
-            await log_channel.send(f"{action} | {member} | by {ctx.author} | Reason: {reason}")
+        self.bot.outbox.enqueue(guild_id, config.get("log_channel"), content=f"{action} | {member} | by {moderator} | Reason: {reason}")
 
         # Infractions Embed
-        if list_channel_id:
-            now = int(time.time())
-            list_channel = ctx.guild.get_channel(list_channel_id)
+        if config.get("list_channel"):
             embed = discord.Embed(
                 title=f"Infraction: {action} User",
                 color=discord.Color.red() if action in ["Banned", "Muted"] else discord.Color.orange()
             )
             embed.add_field(name="User", value=f"{member} | {member.mention}", inline=False)
-            embed.add_field(name="Mod", value=f"{ctx.author} | {ctx.author.mention}", inline=False)
+            embed.add_field(name="Mod", value=f"{moderator} | {moderator.mention}", inline=False)
             embed.add_field(name="Time/Duration", value=f"<t:{now}:F>{f' | Expires: {duration}' if duration else ''}", inline=False)
             embed.add_field(name="Reason", value=reason, inline=False)
-            await list_channel.send(embed=embed)
+            self.bot.outbox.enqueue(guild_id, config["list_channel"], embed=embed)
+
+        rule = self.escalation.record(guild_id, member.id, action, now)
+        if rule and depth < MAX_ESCALATION_DEPTH:
+            await self.escalate(guild, member, rule, channel, depth + 1)
+
+    async def escalate(self, guild, member, rule, channel, depth):
+        """Applies an escalation rule through the same mute/kick/ban paths as the commands."""
+        target = rule["escalate_to"]
+        reason = (f"Auto-escalation: {rule['threshold']}x {rule['action']} "
+                  f"within {format_duration(rule['window_seconds'])}")
+        try:
+            if target == "Muted":
+                await self.mute_member(guild, member, rule["duration"], reason, channel)
+            elif target == "Kicked":
+                await member.kick(reason=reason)
+            elif target == "Banned":
+                await member.ban(reason=reason)
+        except discord.HTTPException as e:
+            print(f"⚠️ Could not escalate {member} to {target} in {guild.name}: {e}")
+            return
+        if channel:
+            await channel.send(f"⏫ {member.mention} has been automatically {target.lower()}. {reason}")
+        await self.log_action(guild, guild.me, target, member, reason, rule["duration"], channel, depth)
+
+    async def get_muted_role(self, guild, create=True):
+        """Resolves the guild's Muted role from the cached config, creating it if needed."""
+        config = await get_guild_config(self.bot, guild.id)
+        role = guild.get_role(config.get("muted_role") or 0)
+        if role:
+            return role
+
+        async with self.muted_role_locks[guild.id]:
+            # Another .mute may have created it while we waited
+            config = await get_guild_config(self.bot, guild.id)
+            role = guild.get_role(config.get("muted_role") or 0)
+            if role:
+                return role
+            # Servers set up before the id was stored still have a role called "Muted"
+            role = discord.utils.get(guild.roles, name="Muted")
+            if role is None:
+                if not create:
+                    return None
+                role = await guild.create_role(name="Muted", reason="Role used by .mute")
+                await self.apply_mute_overwrites(guild, role, guild.channels)
+            await ensure_guild_exists(self.bot, guild.id)
+            await set_channel_id(self.bot, guild.id, "muted_role", role.id)
+            return role
+
+    async def apply_mute_overwrites(self, guild, role, channels, on_progress=None):
+        """Sets the mute overwrite on `channels` concurrently; returns the channels that failed."""
+        async def apply(channel):
+            await with_backoff(channel.set_permissions, role, overwrite=MUTE_OVERWRITE, reason="Muted role setup")
+        failures = await run_bounded(channels, apply, limit=5, on_progress=on_progress)
+        for channel, error in failures:
+            print(f"⚠️ Could not set Muted overwrite in #{channel} ({guild.name}): {error}")
+        return [channel for channel, _ in failures]
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        config = await get_guild_config(self.bot, channel.guild.id)
+        role = channel.guild.get_role(config.get("muted_role") or 0)
+        if role:
+            await self.apply_mute_overwrites(channel.guild, role, [channel])
 
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_roles=True)
+    async def muterole(self, ctx):
+        role = await self.get_muted_role(ctx.guild, create=False)
+        if role:
+            await ctx.send(f"🔇 Muted role is {role.mention}. Use `.muterole sync` to fix channel overwrites.")
+        else:
+            await ctx.send("ℹ️ No Muted role yet. It is created on the first `.mute`, or use `.muterole set <role>`.")
+
+    @muterole.command(name="set")
+    @commands.has_permissions(manage_roles=True)
+    async def muterole_set(self, ctx, role: discord.Role):
+        await ensure_guild_exists(self.bot, ctx.guild.id)
+        await set_channel_id(self.bot, ctx.guild.id, "muted_role", role.id)
+        await ctx.send(f"✅ Muted role set to {role.mention}. Run `.muterole sync` to apply channel overwrites.")
+
+    @muterole.command(name="sync")
+    @commands.has_permissions(manage_roles=True)
+    async def muterole_sync(self, ctx):
+        role = await self.get_muted_role(ctx.guild)
+        stale = [ch for ch in ctx.guild.channels if ch.overwrites_for(role) != MUTE_OVERWRITE]
+        if not stale:
+            await ctx.send(f"✅ All {len(ctx.guild.channels)} channels already have the Muted overwrite.")
+            return
+
+        status = await ctx.send(f"🔧 Updating {len(stale)} of {len(ctx.guild.channels)} channels...")
+
+        async def progress(done, total):
+            await status.edit(content=f"🔧 Updating channels... {done}/{total}")
+
+        failed = await self.apply_mute_overwrites(ctx.guild, role, stale, on_progress=progress)
+        note = f" {len(failed)} failed (check my permissions there)." if failed else ""
+        await status.edit(content=f"✅ Synced Muted overwrite on {len(stale) - len(failed)} channels.{note}")
 
     # MUTE Command
     @commands.command()
     @commands.has_permissions(manage_roles=True)
     async def mute(self, ctx, member: discord.Member, duration: str = None, *, reason="No reason provided"):
-        guild = ctx.guild
-        muted_role = discord.utils.get(guild.roles, name="Muted")
-
-        if not muted_role:
-            muted_role = await guild.create_role(name="Muted")
-            for channel in guild.channels:
-                await channel.set_permissions(muted_role, send_messages=False, speak=False, add_reactions=False)
+        await self.mute_member(ctx.guild, member, duration, reason, ctx.channel)
+        await ctx.send(f"🔇 {member.mention} has been muted for {duration or 'indefinitely'}. Reason: {reason}")
+        await self.mod_log(ctx, "Muted", member, reason, duration)
 
+    async def mute_member(self, guild, member, duration, reason, channel=None):
+        muted_role = await self.get_muted_role(guild)
         await member.add_roles(muted_role, reason=reason)
-        await ctx.send(f"🔇 {member.mention} has been muted for {duration or 'indefinitely'}. Reason: {reason}")
 
-        await self.mod_log(ctx, "Muted", member, reason, duration)
+        # Auto unmute if timed; the scheduler persists it across restarts
+        seconds = self.parse_time(duration) if duration else 0
+        if seconds:
+            await self.bot.scheduler.schedule(guild.id, member.id, "unmute", int(time.time()) + seconds, channel.id if channel else None)
+        else:
+            await self.bot.scheduler.cancel(guild.id, member.id, "unmute")
 
-        # Auto unmute if timed
-        if duration:
-            seconds = self.parse_time(duration)
-            await asyncio.sleep(seconds)
-            if muted_role in member.roles:
-                await member.remove_roles(muted_role)
-                await ctx.send(f"🔊 {member.mention} has been automatically unmuted.")
+    async def expire_mute(self, entry):
+        guild = self.bot.get_guild(entry["guild_id"])
+        if not guild:
+            return
+        member = guild.get_member(entry["target_id"])
+        muted_role = await self.get_muted_role(guild, create=False)
+        if member and muted_role in member.roles:
+            await member.remove_roles(muted_role, reason="Mute expired")
+            channel = guild.get_channel(entry["channel_id"]) if entry["channel_id"] else None
+            if channel:
+                await channel.send(f"🔊 {member.mention} has been automatically unmuted.")
 
     @commands.command()
     @commands.has_permissions(manage_roles=True)
     async def unmute(self, ctx, member: discord.Member):
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
+        await self.bot.scheduler.cancel(ctx.guild.id, member.id, "unmute")
+        muted_role = await self.get_muted_role(ctx.guild, create=False)
         if muted_role in member.roles:
             await member.remove_roles(muted_role)
             await ctx.send(f"🔊 {member.mention} has been unmuted.")
@@ -289,64 +559,329 @@ class Moderation(commands.Cog):
         await ctx.send(f"⚠️ {member.mention} has been warned. Reason: {reason}")
         await self.mod_log(ctx, "Warned", member, reason)
 
-    @commands.command(name="infraction")
+    # ---------------- Mass Actions ----------------
+    async def collect_targets(self, ctx, args):
+        """Parses IDs/mentions, `joined:<duration>`, `duration:<duration>` and uploaded ID files.
+
+        Returns (user_ids, duration, reason); everything that is not a target is the reason.
+        """
+        ids, reason_words = [], []
+        duration = None
+        joined_within = 0
+        for token in args.split():
+            match = MASS_TARGET_PATTERN.fullmatch(token)
+            if match:
+                ids.append(int(match.group(1) or match.group(2)))
+            elif token.lower().startswith("joined:"):
+                joined_within = self.parse_time(token[7:])
+            elif token.lower().startswith("duration:"):
+                duration = token[9:]
+            else:
+                reason_words.append(token)
+
+        for attachment in ctx.message.attachments:
+            if attachment.size <= MASS_FILE_LIMIT:
+                data = await attachment.read()
+                ids.extend(int(i) for i in re.findall(rb"\d{15,20}", data))
+
+        if joined_within:
+            cutoff = utcnow() - timedelta(seconds=joined_within)
+            ids.extend(m.id for m in ctx.guild.members if m.joined_at and m.joined_at >= cutoff)
+
+        protected = {ctx.author.id, ctx.guild.owner_id, self.bot.user.id}
+        user_ids = [i for i in dict.fromkeys(ids) if i not in protected]
+        return user_ids, duration, " ".join(reason_words) or "No reason provided"
+
+    def can_act_on(self, ctx, member):
+        """Role hierarchy check for members; IDs of users not in the server are always allowed."""
+        if member is None:
+            return True
+        if member.top_role >= ctx.guild.me.top_role:
+            return False
+        return ctx.author == ctx.guild.owner or member.top_role < ctx.author.top_role
+
+    async def run_mass_action(self, ctx, action, args, perform, needs_member=True):
+        user_ids, duration, reason = await self.collect_targets(ctx, args)
+        if not user_ids:
+            await ctx.send("❌ No targets. Pass IDs/mentions, `joined:<duration>` or attach a file of IDs.", delete_after=5)
+            return
+        if len(user_ids) > MASS_ACTION_LIMIT:
+            await ctx.send(f"❌ Too many targets ({len(user_ids)}). The limit is {MASS_ACTION_LIMIT} per command.", delete_after=5)
+            return
+
+        guild = ctx.guild
+        targets, skipped = [], 0
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if (needs_member and member is None) or not self.can_act_on(ctx, member):
+                skipped += 1
+                continue
+            targets.append(member or discord.Object(id=user_id))
+        if not targets:
+            await ctx.send(f"❌ None of the {len(user_ids)} targets can be {action.lower()} by you.", delete_after=5)
+            return
+
+        confirm = ConfirmView(ctx.author)
+        prompt = await ctx.send(
+            f"⚠️ {action} **{len(targets)}** users? ({skipped} skipped) Reason: {reason}",
+            view=confirm
+        )
+        await confirm.wait()
+        if not confirm.confirmed:
+            await prompt.edit(content="❎ Cancelled.", view=None)
+            return
+        await prompt.edit(content=f"⏳ {action} {len(targets)} users...", view=None)
+
+        async def progress(done, total):
+            await prompt.edit(content=f"⏳ {action} users... {done}/{total}")
+
+        async def worker(target):
+            await with_backoff(perform, target, reason, duration)
+
+        failures = await run_bounded(targets, worker, limit=MASS_CONCURRENCY, on_progress=progress)
+        failed_ids = {target.id for target, _ in failures}
+        done = [t for t in targets if t.id not in failed_ids]
+
+        now = int(time.time())
+        await log_infractions(self.bot, [(guild.id, t.id, ctx.author.id, action, reason, now) for t in done])
+        # Keep rolling counts in step with the rows just written, as log_action does
+        for target in done:
+            rule = self.escalation.record(guild.id, target.id, action, now)
+            if rule and isinstance(target, discord.Member):
+                await self.escalate(guild, target, rule, ctx.channel, 1)
+
+        embed = discord.Embed(
+            title=f"Mass Action: {action} {len(done)} Users",
+            color=discord.Color.red() if action in ["Banned", "Muted"] else discord.Color.orange()
+        )
+        shown = " ".join(f"<@{t.id}>" for t in done[:40])
+        if len(done) > 40:
+            shown += f" and {len(done) - 40} others"
+        embed.add_field(name="Users", value=shown or "None", inline=False)
+        embed.add_field(name="Mod", value=f"{ctx.author} | {ctx.author.mention}", inline=False)
+        embed.add_field(name="Time/Duration", value=f"<t:{now}:F>{f' | Expires: {duration}' if duration else ''}", inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        if failures or skipped:
+            embed.add_field(name="Not Actioned", value=f"{len(failures)} failed | {skipped} skipped", inline=False)
+
+        await prompt.edit(content=None, embed=embed)
+        config = await get_guild_config(self.bot, guild.id)
+        for column in ("log_channel", "list_channel"):
+            self.bot.outbox.enqueue(guild.id, config.get(column), embed=embed)
+
+    @commands.command()
+    @commands.has_permissions(ban_members=True)
+    async def massban(self, ctx, *, args: str = ""):
+        async def perform(target, reason, duration):
+            await ctx.guild.ban(target, reason=reason, delete_message_seconds=0)
+        await self.run_mass_action(ctx, "Banned", args, perform, needs_member=False)
+
+    @commands.command()
+    @commands.has_permissions(kick_members=True)
+    async def masskick(self, ctx, *, args: str = ""):
+        async def perform(member, reason, duration):
+            await member.kick(reason=reason)
+        await self.run_mass_action(ctx, "Kicked", args, perform)
+
+    @commands.command()
+    @commands.has_permissions(manage_roles=True)
+    async def massmute(self, ctx, *, args: str = ""):
+        await self.get_muted_role(ctx.guild)
+
+        async def perform(member, reason, duration):
+            await self.mute_member(ctx.guild, member, duration, reason, ctx.channel)
+        await self.run_mass_action(ctx, "Muted", args, perform)
+
+    @commands.group(name="infraction", invoke_without_command=True)
     async def infraction(self, ctx, member: discord.Member):
         if not ctx.author.guild_permissions.moderate_members:
             await ctx.send("❌ You need the `Manage Members` permission to use this command.", delete_after=5)
             return
 
-        records = await get_infractions(self.bot, ctx.guild.id, member.id)
-        if not records:
+        guild_id = ctx.guild.id
+        total = await count_infractions(self.bot, guild_id, member.id)
+        if not total:
             await ctx.send(f"No infractions found for {member}.")
             return
 
-        pages = [records[i:i+5] for i in range(0, len(records), 5)]
+        # Page i starts right after the last record of page i-1
+        cursors = {0: (None, None)}
 
-        class InfractionView(View):
-            def __init__(self):
-                super().__init__()
-                self.page = 0
+        async def fetch_page(page):
+            before_ts, before_id = cursors[page]
+            records = await get_infractions_page(self.bot, guild_id, member.id, before_ts, before_id, limit=INFRACTION_PAGE_SIZE)
+            if records:
+                cursors[page + 1] = (records[-1]["timestamp"], records[-1]["id"])
+            return records
 
-            @discord.ui.button(label="⬅️", style=discord.ButtonStyle.grey)
-            async def previous(self, interaction: discord.Interaction, button: Button):
-                if self.page > 0:
-                    self.page -= 1
-                    await interaction.response.edit_message(embed=make_embed(self.page))
+        def make_embed(page, page_count, records):
+            embed = discord.Embed(
+                title=f"Infractions for {member} (Page {page+1}/{page_count})",
+                color=discord.Color.blurple()
+            )
+            for idx, inf in enumerate(records, start=1):
+                embed.add_field(
+                    name=f"{idx}. {inf['action']}",
+                    value=f"Reason: {inf['reason']} | Mod: <@{inf['mod_id']}> | Date: <t:{inf['timestamp']}:F>",
+                    inline=False
+                )
+            return embed
+
+        view = InfractionPaginator(total, fetch_page, make_embed)
+        await ctx.send(embed=await view.render(0), view=view)
+
+    @infraction.command(name="search")
+    async def infraction_search(self, ctx, query: str, since: str = None, action: str = None):
+        if not ctx.author.guild_permissions.moderate_members:
+            await ctx.send("❌ You need the `Manage Members` permission to use this command.", delete_after=5)
+            return
+
+        since_ts = self.parse_since(since)
+        if since and since_ts is None:
+            await ctx.send("❌ Invalid `since`. Use a duration like `30d` or a date like `2024-01-31`.", delete_after=5)
+            return
+        if action:
+            action = next((name for prefix, name in ACTION_NAMES.items() if action.lower().startswith(prefix)), action.capitalize())
 
-            @discord.ui.button(label="➡️", style=discord.ButtonStyle.grey)
-            async def next(self, interaction: discord.Interaction, button: Button):
-                if self.page < len(pages) - 1:
-                    self.page += 1
-                    await interaction.response.edit_message(embed=make_embed(self.page))
+        guild_id = ctx.guild.id
+
+        async def fetch_page(page):
+            records, _ = await search_infractions(
+                self.bot, guild_id, query, since_ts, action,
+                limit=INFRACTION_PAGE_SIZE, offset=page * INFRACTION_PAGE_SIZE
+            )
+            return records
 
-        def make_embed(page):
+        def make_embed(page, page_count, records):
             embed = discord.Embed(
-                title=f"Infractions for {member} (Page {page+1}/{len(pages)})",
+                title=f"Infractions matching \"{query}\" ({total} found, Page {page+1}/{page_count})",
                 color=discord.Color.blurple()
             )
-            for idx, inf in enumerate(pages[page], start=1):
+            for idx, inf in enumerate(records, start=page * INFRACTION_PAGE_SIZE + 1):
                 embed.add_field(
-                    name=f"{idx}. {inf['action']}",
+                    name=f"{idx}. {inf['action']} | <@{inf['user_id']}>",
                     value=f"Reason: {inf['reason']} | Mod: <@{inf['mod_id']}> | Date: <t:{inf['timestamp']}:F>",
                     inline=False
                 )
             return embed
 
-        await ctx.send(embed=make_embed(0), view=InfractionView())
+        first_page, total = await search_infractions(self.bot, guild_id, query, since_ts, action, limit=INFRACTION_PAGE_SIZE)
+        if not total:
+            await ctx.send(f"No infractions found matching \"{query}\".")
+            return
+
+        view = InfractionPaginator(total, fetch_page, make_embed, first_page=first_page)
+        await ctx.send(embed=await view.render(0), view=view)
 
     @commands.command(name="clearinfractions")
     @commands.has_permissions(manage_guild=True)
     async def clearinfractions(self, ctx, member: discord.Member):
-        await self.bot.db.execute("""
-            DELETE FROM infractions WHERE guild_id = $1 AND user_id = $2
-        """, ctx.guild.id, member.id)
+        await clear_infractions(self.bot, ctx.guild.id, member.id)
+        self.escalation.reset(ctx.guild.id, member.id)
 
         await ctx.send(f"✅ Cleared all infractions for {member}.")
 
+    @commands.group(name="infractions", invoke_without_command=True)
+    async def infractions(self, ctx):
+        await ctx.send("ℹ️ Usage: `.infractions export [csv/jsonl] [since]` (since: `30d` or `2024-01-31`)")
+
+    @infractions.command(name="export")
+    @commands.has_permissions(manage_guild=True)
+    async def infractions_export(self, ctx, fmt: str = "csv", since: str = None):
+        fmt = fmt.lower()
+        if fmt not in ("csv", "jsonl"):
+            await ctx.send("❌ Format must be `csv` or `jsonl`.", delete_after=5)
+            return
+        since_ts = self.parse_since(since)
+        if since and since_ts is None:
+            await ctx.send("❌ Invalid `since`. Use a duration like `30d` or a date like `2024-01-31`.", delete_after=5)
+            return
+
+        columns = ["id", "user_id", "mod_id", "action", "reason", "timestamp"]
+        status = await ctx.send("📦 Exporting infractions...")
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}.gz")
+        os.close(fd)
+        exported = 0
+        last_update = time.monotonic()
+        try:
+            # Rows go straight from the cursor into the gzip stream, so memory stays flat
+            with gzip.open(path, "wt", encoding="utf-8", newline="") as out:
+                writer = csv.writer(out) if fmt == "csv" else None
+                if writer:
+                    writer.writerow(columns)
+                async for rows in stream_infractions(self.bot, ctx.guild.id, since_ts):
+                    if writer:
+                        writer.writerows(tuple(r) for r in rows)
+                    else:
+                        out.writelines(json.dumps(dict(r), ensure_ascii=False) + "\n" for r in rows)
+                    exported += len(rows)
+                    if time.monotonic() - last_update >= 5:
+                        last_update = time.monotonic()
+                        await status.edit(content=f"📦 Exporting infractions... {exported} rows so far")
+
+            if not exported:
+                await status.edit(content="ℹ️ No infractions to export.")
+                return
+            size = os.path.getsize(path)
+            if size > ctx.guild.filesize_limit:
+                await status.edit(content=f"❌ Export is {size / 1_048_576:.1f} MB, above this server's upload limit. Try a shorter `since`.")
+                return
+            filename = f"infractions-{ctx.guild.id}-{int(time.time())}.{fmt}.gz"
+            await ctx.send(f"✅ Exported **{exported}** infractions.", file=discord.File(path, filename=filename))
+            await status.delete()
+        finally:
+            os.remove(path)
+
+    # ---------------- Escalation Rules ----------------
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def escalation(self, ctx):
+        await ctx.send("ℹ️ Usage: `.escalation add <count> <warn/mute/kick> <window> <mute/kick/ban> [duration]`, "
+                       "`.escalation list`, `.escalation remove <id>`")
+
+    @escalation.command(name="add")
+    @commands.has_permissions(manage_guild=True)
+    async def escalation_add(self, ctx, threshold: int, action: str, window: str, escalate_to: str, duration: str = None):
+        action = ACTION_NAMES.get(action.lower())
+        escalate_to = ACTION_NAMES.get(escalate_to.lower())
+        window_seconds = self.parse_time(window)
+        if not action or escalate_to not in ("Muted", "Kicked", "Banned") or threshold < 1 or not window_seconds:
+            await ctx.send("❌ Example: `.escalation add 3 warn 1d mute 1h` or `.escalation add 5 warn 7d kick`", delete_after=5)
+            return
+        if escalate_to != "Muted":
+            duration = None
+
+        await add_escalation_rule(self.bot, ctx.guild.id, action, threshold, window_seconds, escalate_to, duration)
+        await self.reload_escalation(ctx.guild.id)
+        until = f" for {duration}" if duration else ""
+        await ctx.send(f"✅ {threshold}x {action} within {format_duration(window_seconds)} → {escalate_to}{until}.")
+
+    @escalation.command(name="list")
+    @commands.has_permissions(manage_guild=True)
+    async def escalation_list(self, ctx):
+        rules = await get_escalation_rules(self.bot, ctx.guild.id)
+        if not rules:
+            await ctx.send("ℹ️ No escalation rules set.")
+            return
+        lines = []
+        for r in rules:
+            until = f" for {r['duration']}" if r["duration"] else ""
+            lines.append(f"`#{r['id']}` {r['threshold']}x {r['action']} within {format_duration(r['window_seconds'])} → {r['escalate_to']}{until}")
+        await ctx.send("⏫ Escalation rules:\n" + "\n".join(lines))
+
+    @escalation.command(name="remove")
+    @commands.has_permissions(manage_guild=True)
+    async def escalation_remove(self, ctx, rule_id: int):
+        if not await remove_escalation_rule(self.bot, ctx.guild.id, rule_id):
+            await ctx.send("❌ No rule with that id.", delete_after=5)
+            return
+        await self.reload_escalation(ctx.guild.id)
+        await ctx.send(f"✅ Removed escalation rule `#{rule_id}`.")
+
     @commands.group(invoke_without_command=True)
     async def ar(self, ctx):
         if ctx.invoked_subcommand is None:
-            await ctx.send("ℹ️ Please specify a subcommand. `.ar list`, `.ar add` `.ar remove`")
+            await ctx.send("ℹ️ Please specify a subcommand. `.ar list`, `.ar add` `.ar remove` `.ar backfill`")
 
     @ar.command(name="list")
     async def ar_list(self, ctx):
@@ -370,5 +905,30 @@ class Moderation(commands.Cog):
         await ctx.send(f"❌ Removed {role.mention} from autorole list.")
 
 
+    @ar.command(name="backfill")
+    @commands.has_permissions(manage_roles=True)
+    async def autorole_backfill(self, ctx):
+        role_ids = await get_autoroles(self.bot, ctx.guild.id)
+        roles = [r for r in (ctx.guild.get_role(rid) for rid in role_ids) if r is not None]
+        if not roles:
+            await ctx.send("ℹ️ No autoroles set.")
+            return
+        missing = [m for m in ctx.guild.members if any(r not in m.roles for r in roles)]
+        if not missing:
+            await ctx.send(f"✅ All {ctx.guild.member_count} members already have the autoroles.")
+            return
+
+        status = await ctx.send(f"⏳ Adding autoroles to {len(missing)} members...")
+
+        async def progress(done, total):
+            await status.edit(content=f"⏳ Adding autoroles... {done}/{total}")
+
+        worker = self.bot.autorole_worker
+        failures = await run_bounded(missing, lambda m: worker.assign(m, role_ids), limit=MASS_CONCURRENCY, on_progress=progress)
+        if failures:
+            await worker.record_failures([(ctx.guild.id, m.id, role_ids, str(e)) for m, e in failures])
+        note = f" {len(failures)} failed and will be retried automatically." if failures else ""
+        await status.edit(content=f"✅ Added autoroles to {len(missing) - len(failures)} members.{note}")
+
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -0,0 +1,366 @@
+# /cogs/rolemenus.py
+import discord
+from typing import Optional
+from discord.ext import commands
+from discord import TextChannel
+from db.database import create_role_menu, set_role_menu_message, delete_role_menu, add_role_menu_item
+from db.database import remove_role_menu_item, get_role_menus, get_channel_id
+from utils.concurrency import with_backoff
+from utils.rolemenus import RoleMenuIndex, MENU_STYLES, MAX_MENU_ITEMS, normalize_emoji
+
+MAX_TITLE_LENGTH = 200
+MAX_LABEL_LENGTH = 80
+
+
+class RoleMenuButton(discord.ui.DynamicItem[discord.ui.Button], template=r"rolemenu:(?P<menu>\d+):(?P<role>\d+)"):
+    """One role toggle; menu and role ids live in the custom_id, so clicks work after a restart."""
+
+    def __init__(self, menu_id, role_id, label=None, emoji=None):
+        super().__init__(discord.ui.Button(
+            label=label, emoji=emoji, style=discord.ButtonStyle.secondary, custom_id=f"rolemenu:{menu_id}:{role_id}"
+        ))
+        self.menu_id = menu_id
+        self.role_id = role_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["menu"]), int(match["role"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("RoleMenus")
+        if cog:
+            await cog.toggle(interaction, self.menu_id, self.role_id)
+
+
+class RoleMenuSelect(discord.ui.DynamicItem[discord.ui.Select], template=r"rolemenu:(?P<menu>\d+)"):
+    """Pick-any select; whatever is chosen is what the member keeps from this menu."""
+
+    def __init__(self, menu_id, options=()):
+        options = list(options)
+        super().__init__(discord.ui.Select(
+            custom_id=f"rolemenu:{menu_id}", placeholder="Pick your roles",
+            min_values=0, max_values=max(1, len(options)), options=options
+        ))
+        self.menu_id = menu_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["menu"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("RoleMenus")
+        if cog:
+            chosen = {int(v) for v in interaction.data.get("values", ())}
+            await cog.select(interaction, self.menu_id, chosen)
+
+
+class RoleMenus(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.index = RoleMenuIndex()
+        # Components on menus from before a restart route here by custom_id pattern
+        bot.add_dynamic_items(RoleMenuButton, RoleMenuSelect)
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(RoleMenuButton, RoleMenuSelect)
+
+    @commands.Cog.listener()
+    async def on_db_ready(self):
+        menus = await get_role_menus(self.bot)
+        self.index.load(menus)
+        stats = self.index.stats()
+        print(f"✅ Loaded {stats['menus']} role menus with {stats['roles']} roles.")
+
+    async def reload_menus(self, guild_id):
+        for menu in self.index.guild_menus(guild_id):
+            self.index.remove_menu(menu["id"])
+        for menu in await get_role_menus(self.bot, guild_id):
+            self.index.set_menu(menu)
+
+    def get_menu(self, guild_id, menu_id):
+        menu = self.index.menus.get(menu_id)
+        return menu if menu and menu["guild_id"] == guild_id else None
+
+    # ---------------- Role Changes ----------------
+    async def apply(self, member, add=(), remove=()):
+        """Adds and removes roles with retries; returns an error message or None."""
+        try:
+            if add:
+                await with_backoff(member.add_roles, *add, reason="Role menu")
+            if remove:
+                await with_backoff(member.remove_roles, *remove, reason="Role menu")
+        except discord.HTTPException as e:
+            print(f"⚠️ Role menu could not update {member} in {member.guild.name}: {e}")
+            return "I couldn't update your roles. Ask a moderator to check my permissions."
+        return None
+
+    async def loading(self, interaction):
+        """Component clicks bypass event dispatch, so they check for startup themselves."""
+        if self.bot.startup_done.is_set():
+            return False
+        await interaction.response.send_message("⏳ Role menus are still loading, try again in a moment.", ephemeral=True)
+        return True
+
+    async def toggle(self, interaction, menu_id, role_id):
+        if await self.loading(interaction):
+            return
+        role = interaction.guild.get_role(role_id) if self.index.has_role(menu_id, role_id) else None
+        if role is None:
+            await interaction.response.send_message("⚠️ This role is no longer on the menu.", ephemeral=True)
+            return
+        member = interaction.user
+        adding = role not in member.roles
+        # Answer first so a slow or rate-limited role edit never times out the interaction
+        await interaction.response.send_message(
+            f"✅ Added {role.mention}." if adding else f"➖ Removed {role.mention}.", ephemeral=True)
+        error = await self.apply(member, add=[role] if adding else [], remove=[] if adding else [role])
+        if error:
+            await interaction.followup.send(f"❌ {error}", ephemeral=True)
+
+    async def select(self, interaction, menu_id, chosen):
+        if await self.loading(interaction):
+            return
+        menu_roles = self.index.roles.get(menu_id)
+        if menu_roles is None:
+            await interaction.response.send_message("⚠️ This menu no longer exists.", ephemeral=True)
+            return
+        member, guild = interaction.user, interaction.guild
+        have = {r.id for r in member.roles}
+        add = [r for r in (guild.get_role(i) for i in (chosen & menu_roles) - have) if r]
+        remove = [r for r in (guild.get_role(i) for i in (menu_roles - chosen) & have) if r]
+        if not add and not remove:
+            await interaction.response.send_message("ℹ️ Your roles are already up to date.", ephemeral=True)
+            return
+        summary = " ".join([f"✅ {r.mention}" for r in add] + [f"➖ {r.mention}" for r in remove])
+        await interaction.response.send_message(summary, ephemeral=True)
+        error = await self.apply(member, add, remove)
+        if error:
+            await interaction.followup.send(f"❌ {error}", ephemeral=True)
+
+    def reaction_member(self, payload):
+        if payload.guild_id is None or payload.user_id == self.bot.user.id:
+            return None, None
+        role_id = self.index.reaction_role(payload.message_id, payload.emoji)
+        guild = self.bot.get_guild(payload.guild_id) if role_id else None
+        if guild is None:
+            return None, None
+        member = payload.member or guild.get_member(payload.user_id)
+        role = guild.get_role(role_id)
+        if member is None or member.bot or role is None:
+            return None, None
+        return member, role
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        member, role = self.reaction_member(payload)
+        if member and role not in member.roles:
+            await self.apply(member, add=[role])
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        member, role = self.reaction_member(payload)
+        if member and role in member.roles:
+            await self.apply(member, remove=[role])
+
+    # ---------------- Publishing ----------------
+    def make_embed(self, guild, menu):
+        lines = []
+        for item in menu["items"]:
+            emoji = f"{item['emoji']} " if item["emoji"] else ""
+            lines.append(f"{emoji}<@&{item['role_id']}>" + (f" — {item['label']}" if item["label"] else ""))
+        hint = {
+            "buttons": "Click a button to get or remove a role.",
+            "select": "Pick your roles from the menu below.",
+            "reactions": "React to get a role, remove your reaction to drop it.",
+        }[menu["style"]]
+        embed = discord.Embed(
+            title=menu["title"],
+            description="\n".join(lines) + f"\n\n{hint}" if lines else hint,
+            color=discord.Color.blurple()
+        )
+        embed.set_footer(text=f"Role menu #{menu['id']}")
+        return embed
+
+    def make_view(self, guild, menu):
+        if menu["style"] == "reactions" or not menu["items"]:
+            return None
+        view = discord.ui.View(timeout=None)
+        if menu["style"] == "buttons":
+            for item in menu["items"]:
+                role = guild.get_role(item["role_id"])
+                label = item["label"] or (role.name if role else str(item["role_id"]))
+                view.add_item(RoleMenuButton(menu["id"], item["role_id"], label[:MAX_LABEL_LENGTH], item["emoji"]))
+        else:
+            options = []
+            for item in menu["items"]:
+                role = guild.get_role(item["role_id"])
+                label = item["label"] or (role.name if role else str(item["role_id"]))
+                options.append(discord.SelectOption(label=label[:MAX_LABEL_LENGTH], value=str(item["role_id"]), emoji=item["emoji"]))
+            view.add_item(RoleMenuSelect(menu["id"], options))
+        return view
+
+    async def publish(self, guild, menu, channel=None):
+        """Edits the menu's message in place, or posts it if it was never sent or got deleted."""
+        embed, view = self.make_embed(guild, menu), self.make_view(guild, menu)
+        message = None
+        if menu["message_id"] and channel is None:
+            old_channel = guild.get_channel(menu["channel_id"])
+            if old_channel:
+                try:
+                    message = await old_channel.get_partial_message(menu["message_id"]).edit(embed=embed, view=view)
+                except discord.NotFound:
+                    message = None
+        if message is None:
+            channel = channel or guild.get_channel(menu["channel_id"])
+            if channel is None:
+                return None
+            message = await channel.send(embed=embed, view=view)
+            await set_role_menu_message(self.bot, menu["id"], channel.id, message.id)
+        if menu["style"] == "reactions":
+            # Re-adding an existing reaction is a no-op, so this only fills in new ones
+            for item in menu["items"]:
+                await message.add_reaction(item["emoji"])
+        await self.reload_menus(guild.id)
+        return message
+
+    async def refresh(self, ctx, menu_id):
+        """Republishes an already posted menu after it changed."""
+        menu = self.get_menu(ctx.guild.id, menu_id)
+        if menu and menu["message_id"]:
+            try:
+                await self.publish(ctx.guild, menu)
+            except discord.HTTPException as e:
+                await ctx.send(f"⚠️ Saved, but the posted menu could not be updated: {e}", delete_after=10)
+
+    # ---------------- Commands ----------------
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu(self, ctx):
+        await ctx.send("ℹ️ Usage: `.rolemenu create <buttons/select/reactions> [#channel] <title>`, "
+                       "`.rolemenu add <menu> <@role> [emoji] [label]`, `.rolemenu remove <menu> <@role>`, "
+                       "`.rolemenu publish <menu> [#channel]`, `.rolemenu list`, `.rolemenu delete <menu>`")
+
+    @rolemenu.command(name="create")
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu_create(self, ctx, style: str, channel: Optional[TextChannel] = None, *, title: str):
+        style = style.lower()
+        if style not in MENU_STYLES or len(title) > MAX_TITLE_LENGTH:
+            await ctx.send("❌ Example: `.rolemenu create buttons #roles Pick your pronouns` (style: buttons, select or reactions).", delete_after=5)
+            return
+        if channel is None:
+            channel_id = await get_channel_id(self.bot, ctx.guild.id, "role_channel")
+            channel = ctx.guild.get_channel(channel_id) if channel_id else ctx.channel
+        menu = await create_role_menu(self.bot, ctx.guild.id, channel.id, style, title)
+        await self.reload_menus(ctx.guild.id)
+        await ctx.send(f"✅ Created role menu `#{menu['id']}` for {channel.mention}. "
+                       f"Add roles with `.rolemenu add {menu['id']} <@role> [emoji] [label]`, then `.rolemenu publish {menu['id']}`.")
+
+    @rolemenu.command(name="add")
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu_add(self, ctx, menu_id: int, role: discord.Role, emoji: str = None, *, label: str = None):
+        menu = self.get_menu(ctx.guild.id, menu_id)
+        if menu is None:
+            await ctx.send("❌ No role menu with that id.", delete_after=5)
+            return
+        if role.is_default() or role.managed or role >= ctx.guild.me.top_role:
+            await ctx.send(f"❌ I can't give out {role.mention}; it must be below my highest role.", delete_after=5)
+            return
+        if ctx.author != ctx.guild.owner and role >= ctx.author.top_role:
+            await ctx.send(f"❌ {role.mention} is not below your highest role.", delete_after=5)
+            return
+        if menu["style"] == "reactions" and not emoji:
+            await ctx.send("❌ Reaction menus need an emoji, e.g. `.rolemenu add 1 @Gamer 🎮`.", delete_after=5)
+            return
+        existing = {item["role_id"]: item for item in menu["items"]}
+        if role.id not in existing and len(existing) >= MAX_MENU_ITEMS[menu["style"]]:
+            await ctx.send(f"❌ A {menu['style']} menu holds at most {MAX_MENU_ITEMS[menu['style']]} roles.", delete_after=5)
+            return
+        emoji = normalize_emoji(emoji)
+        if menu["style"] == "reactions" and any(i["emoji"] == emoji and i["role_id"] != role.id for i in menu["items"]):
+            await ctx.send("❌ That emoji is already used on this menu.", delete_after=5)
+            return
+
+        await add_role_menu_item(self.bot, menu_id, role.id, emoji, label[:MAX_LABEL_LENGTH] if label else None)
+        await self.reload_menus(ctx.guild.id)
+        await self.refresh(ctx, menu_id)
+        await ctx.send(f"✅ Added {role.mention} to role menu `#{menu_id}`.")
+
+    @rolemenu.command(name="remove")
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu_remove(self, ctx, menu_id: int, role: discord.Role):
+        menu = self.get_menu(ctx.guild.id, menu_id)
+        if menu is None or not await remove_role_menu_item(self.bot, menu_id, role.id):
+            await ctx.send("❌ That role is not on that menu.", delete_after=5)
+            return
+        if menu["style"] == "reactions" and menu["message_id"]:
+            emoji = next((i["emoji"] for i in menu["items"] if i["role_id"] == role.id), None)
+            channel = ctx.guild.get_channel(menu["channel_id"])
+            if emoji and channel:
+                try:
+                    await channel.get_partial_message(menu["message_id"]).clear_reaction(emoji)
+                except discord.HTTPException:
+                    pass
+        await self.reload_menus(ctx.guild.id)
+        await self.refresh(ctx, menu_id)
+        await ctx.send(f"✅ Removed {role.mention} from role menu `#{menu_id}`.")
+
+    @rolemenu.command(name="publish")
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu_publish(self, ctx, menu_id: int, channel: TextChannel = None):
+        menu = self.get_menu(ctx.guild.id, menu_id)
+        if menu is None:
+            await ctx.send("❌ No role menu with that id.", delete_after=5)
+            return
+        if not menu["items"]:
+            await ctx.send(f"❌ Add some roles first with `.rolemenu add {menu_id} <@role>`.", delete_after=5)
+            return
+        if channel and menu["message_id"]:
+            # Moving the menu: the old message goes away
+            old_channel = ctx.guild.get_channel(menu["channel_id"])
+            if old_channel:
+                try:
+                    await old_channel.get_partial_message(menu["message_id"]).delete()
+                except discord.HTTPException:
+                    pass
+        try:
+            message = await self.publish(ctx.guild, menu, channel)
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ Could not publish the menu: {e}", delete_after=10)
+            return
+        if message is None:
+            await ctx.send("❌ The menu's channel no longer exists. Pass a new one: `.rolemenu publish <menu> #channel`.", delete_after=5)
+            return
+        await ctx.send(f"✅ Role menu `#{menu_id}` is live: {message.jump_url}")
+
+    @rolemenu.command(name="list")
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu_list(self, ctx):
+        menus = self.index.guild_menus(ctx.guild.id)
+        if not menus:
+            await ctx.send("ℹ️ No role menus yet. Create one with `.rolemenu create`.")
+            return
+        lines = []
+        for menu in sorted(menus, key=lambda m: m["id"]):
+            where = f"<#{menu['channel_id']}>" if menu["message_id"] else "not published"
+            lines.append(f"`#{menu['id']}` **{menu['title']}** ({menu['style']}, {len(menu['items'])} roles) — {where}")
+        await ctx.send("🎭 Role menus:\n" + "\n".join(lines))
+
+    @rolemenu.command(name="delete")
+    @commands.has_permissions(manage_roles=True)
+    async def rolemenu_delete(self, ctx, menu_id: int):
+        menu = self.get_menu(ctx.guild.id, menu_id)
+        if menu is None or not await delete_role_menu(self.bot, ctx.guild.id, menu_id):
+            await ctx.send("❌ No role menu with that id.", delete_after=5)
+            return
+        self.index.remove_menu(menu_id)
+        channel = ctx.guild.get_channel(menu["channel_id"])
+        if menu["message_id"] and channel:
+            try:
+                await channel.get_partial_message(menu["message_id"]).delete()
+            except discord.HTTPException:
+                pass
+        await ctx.send(f"✅ Deleted role menu `#{menu_id}`.")
+
+
+async def setup(bot):
+    await bot.add_cog(RoleMenus(bot))
@@ -0,0 +1,120 @@
+# /cogs/sharedbans.py
+import discord
+from discord.ext import commands, tasks
+from db.database import add_shared_bans, remove_shared_bans, get_shared_ban, get_guild_config, set_shared_ban_mode
+from utils.sharedbans import SharedBanList
+
+SHARED_BAN_MODES = ("off", "ban", "quarantine")
+SYNC_SECONDS = 60
+
+
+class SharedBans(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.banlist = SharedBanList()
+
+    async def cog_load(self):
+        self.sync_banlist.start()
+
+    async def cog_unload(self):
+        self.sync_banlist.cancel()
+
+    @commands.Cog.listener()
+    async def on_db_ready(self):
+        count = await self.banlist.load(self.bot)
+        print(f"✅ Loaded {count} shared bans ({self.banlist.nbytes() / 1_048_576:.1f} MiB).")
+
+    @tasks.loop(seconds=SYNC_SECONDS)
+    async def sync_banlist(self):
+        if not self.banlist.loaded:
+            return
+        try:
+            changed = await self.banlist.sync(self.bot)
+            if changed:
+                print(f"🔄 Applied {changed} shared ban changes (version {self.banlist.version}).")
+        except Exception as e:
+            print(f"⚠️ Shared ban sync failed: {e}")
+
+    async def check_join(self, member):
+        """Bans or quarantines a listed member; returns True if the join was handled here."""
+        if member.bot or member.id not in self.banlist:
+            return False
+        guild = member.guild
+        config = await get_guild_config(self.bot, guild.id)
+        mode = config.get("shared_ban_mode")
+        if not mode:
+            return False
+        self.banlist.hits += 1
+        entry = await get_shared_ban(self.bot, member.id)
+        reason = f"Shared ban list: {entry['reason'] if entry and entry['reason'] else 'listed account'}"
+
+        moderation = self.bot.get_cog("Moderation")
+        try:
+            if mode == "ban":
+                await guild.ban(member, reason=reason, delete_message_seconds=0)
+            elif moderation is not None:
+                await moderation.mute_member(guild, member, None, reason)
+            else:
+                return False
+        except discord.HTTPException as e:
+            print(f"⚠️ Could not {mode} shared-banned {member} in {guild.name}: {e}")
+            return False
+        print(f"🚫 Shared ban list: {mode} {member} ({member.id}) in {guild.name}")
+        if moderation is not None:
+            await moderation.log_action(guild, guild.me, "Banned" if mode == "ban" else "Muted", member, reason)
+        return True
+
+    # ---------------- Shared Ban List ----------------
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def sharedban(self, ctx):
+        config = await get_guild_config(self.bot, ctx.guild.id)
+        mode = config.get("shared_ban_mode") or "off"
+        await ctx.send(f"ℹ️ Shared ban list: **{len(self.banlist)}** accounts, mode here is **{mode}**. "
+                       "Change it with `.sharedban mode <off/ban/quarantine>`.")
+
+    @sharedban.command(name="mode")
+    @commands.has_permissions(manage_guild=True)
+    async def sharedban_mode(self, ctx, mode: str):
+        mode = mode.lower()
+        if mode not in SHARED_BAN_MODES:
+            await ctx.send("❌ Example: `.sharedban mode ban` (or `quarantine` to mute, `off` to ignore the list).", delete_after=5)
+            return
+        await set_shared_ban_mode(self.bot, ctx.guild.id, None if mode == "off" else mode)
+        await ctx.send(f"✅ Listed accounts joining this server: {mode}.")
+
+    @sharedban.command(name="add")
+    @commands.is_owner()
+    async def sharedban_add(self, ctx, *, args: str = ""):
+        moderation = self.bot.get_cog("Moderation")
+        user_ids, _, reason = await moderation.collect_targets(ctx, args)
+        if not user_ids:
+            await ctx.send("❌ Pass IDs/mentions or attach a file of IDs.", delete_after=5)
+            return
+        added = await add_shared_bans(self.bot, user_ids, reason, ctx.author.id)
+        await self.banlist.sync(self.bot)
+        await ctx.send(f"✅ Listed {added} new accounts ({len(user_ids) - added} already listed). Reason: {reason}")
+
+    @sharedban.command(name="remove")
+    @commands.is_owner()
+    async def sharedban_remove(self, ctx, *, args: str = ""):
+        moderation = self.bot.get_cog("Moderation")
+        user_ids, _, _ = await moderation.collect_targets(ctx, args)
+        if not user_ids:
+            await ctx.send("❌ Pass IDs/mentions or attach a file of IDs.", delete_after=5)
+            return
+        removed = await remove_shared_bans(self.bot, user_ids)
+        await self.banlist.sync(self.bot)
+        await ctx.send(f"✅ Removed {removed} accounts from the shared ban list.")
+
+    @sharedban.command(name="stats")
+    @commands.is_owner()
+    async def sharedban_stats(self, ctx):
+        stats = self.banlist.stats()
+        await ctx.send(f"🚫 {stats['ids']} listed accounts at version {stats['version']} | "
+                       f"`{stats['bytes'] / 1_048_576:.1f} MiB` (filter `{stats['bloom_bytes'] / 1_048_576:.1f} MiB`) | "
+                       f"{stats['hits']} joins actioned | last sync <t:{stats['synced_at']}:R>")
+
+
+async def setup(bot):
+    await bot.add_cog(SharedBans(bot))
@@ -0,0 +1,177 @@
+# /cogs/triggers.py
+import re
+import discord
+from discord.ext import commands
+from db.database import add_trigger, remove_trigger, get_triggers
+from utils.triggers import TriggerIndex, TRIGGER_KINDS, RESPONSE_TYPES, validate_regex
+
+MAX_TRIGGER_RESPONSES = 3
+MAX_TRIGGER_PATTERN = 200
+ID_PATTERN = re.compile(r"\d{15,20}")
+
+SURDI_USER_ID = 609342457301303308
+SURDI_RESPONSE = "sst gausah ping. surdi itu gay, kriminal wanita, narsis pula, mending jauh jauh deh"
+
+
+class Triggers(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.triggers = {}   # guild_id -> trigger rows
+        self.indexes = {}    # guild_id -> TriggerIndex, rebuilt when that guild's triggers change
+
+    @commands.Cog.listener()
+    async def on_db_ready(self):
+        rows = await get_triggers(self.bot)
+        self.triggers.clear()
+        self.indexes.clear()
+        for row in rows:
+            self.triggers.setdefault(row["guild_id"], []).append(row)
+        for guild_id, triggers in self.triggers.items():
+            self.indexes[guild_id] = TriggerIndex(triggers)
+        print(f"✅ Loaded {len(rows)} triggers for {len(self.triggers)} guilds.")
+
+    async def reload_triggers(self, guild_id):
+        triggers = await get_triggers(self.bot, guild_id)
+        if triggers:
+            self.triggers[guild_id] = triggers
+            self.indexes[guild_id] = TriggerIndex(triggers)
+        else:
+            self.triggers.pop(guild_id, None)
+            self.indexes.pop(guild_id, None)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+        index = self.indexes.get(message.guild.id)
+        if index is None:
+            return
+
+        matched = index.match(message.content, message.raw_mentions, message.raw_role_mentions)
+        if not matched:
+            return
+        deleting = any(t["response_type"] == "delete" for t in matched)
+        try:
+            for trigger in [t for t in matched if t["response_type"] != "delete"][:MAX_TRIGGER_RESPONSES]:
+                if trigger["response_type"] == "reply":
+                    # Any member can fire a trigger, so its text must never ping anyone
+                    mentions = discord.AllowedMentions.none()
+                    # A reply to a message we're about to delete would fail
+                    if deleting:
+                        await message.channel.send(trigger["response"], allowed_mentions=mentions)
+                    else:
+                        await message.reply(trigger["response"], mention_author=False, allowed_mentions=mentions)
+                elif trigger["response_type"] == "react" and not deleting:
+                    await message.add_reaction(trigger["response"])
+            if deleting:
+                await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            print(f"⚠️ Trigger response failed in #{message.channel} ({message.guild.name}): {e}")
+
+    # ---------------- Trigger Commands ----------------
+    @commands.group(invoke_without_command=True)
+    @commands.has_permissions(manage_guild=True)
+    async def trigger(self, ctx):
+        await ctx.send("ℹ️ Usage: `.trigger add <user/role/keyword/regex> <target> <reply/react/delete> [response]`, "
+                       "`.trigger list`, `.trigger remove <id>`")
+
+    @trigger.command(name="add")
+    @commands.has_permissions(manage_guild=True)
+    async def trigger_add(self, ctx, kind: str, target: str, response_type: str, *, response: str = None):
+        kind, response_type = kind.lower(), response_type.lower()
+        usage = ("❌ Example: `.trigger add user @someone reply no pinging!`, `.trigger add keyword hello react 👋` "
+                 "or `.trigger add regex \"free nitro\" delete`")
+        if kind not in TRIGGER_KINDS or response_type not in RESPONSE_TYPES:
+            await ctx.send(usage, delete_after=5)
+            return
+        if response_type != "delete" and not response:
+            await ctx.send(f"❌ A {response_type} trigger needs a response.", delete_after=5)
+            return
+
+        if kind in ("user", "role"):
+            found = ID_PATTERN.search(target)
+            if not found:
+                await ctx.send(f"❌ Give a {kind} mention or id.", delete_after=5)
+                return
+            pattern = found.group(0)
+        else:
+            pattern = target.strip()
+            if kind == "keyword":
+                pattern = pattern.lower()
+            error = validate_regex(pattern) if kind == "regex" else None
+            if not pattern or len(pattern) > MAX_TRIGGER_PATTERN or error:
+                await ctx.send(f"❌ Invalid {kind}{f': {error}' if error else ''}.", delete_after=5)
+                return
+
+        if response_type == "react":
+            try:
+                await ctx.message.add_reaction(response)
+            except discord.HTTPException:
+                await ctx.send("❌ I can't react with that emoji.", delete_after=5)
+                return
+        if response_type == "delete":
+            response = None
+
+        row = await add_trigger(self.bot, ctx.guild.id, kind, pattern, response_type, response)
+        await self.reload_triggers(ctx.guild.id)
+        await ctx.send(f"✅ Trigger `#{row['id']}`: {self.describe(row)}")
+
+    def describe(self, trigger):
+        target = {"user": "<@{}>", "role": "<@&{}>", "keyword": "`{}`", "regex": "`/{}/`"}[trigger["kind"]].format(trigger["pattern"])
+        action = trigger["response_type"] + (f" `{trigger['response'][:50]}`" if trigger["response"] else "")
+        return f"{trigger['kind']} {target} → {action}"
+
+    @trigger.command(name="list")
+    @commands.has_permissions(manage_guild=True)
+    async def trigger_list(self, ctx):
+        triggers = self.triggers.get(ctx.guild.id)
+        if not triggers:
+            await ctx.send("ℹ️ No triggers set.")
+            return
+        index = self.indexes.get(ctx.guild.id)
+        disabled = {t["id"] for t in index.disabled} if index else set()
+        lines = [f"`#{t['id']}` {self.describe(t)}" + (" ⛔ disabled: unsafe or slow pattern" if t["id"] in disabled else "")
+                 for t in triggers]
+        chunk = "⚡ Triggers:"
+        for line in lines:
+            if len(chunk) + len(line) + 1 > 2000:
+                await ctx.send(chunk, allowed_mentions=discord.AllowedMentions.none())
+                chunk = ""
+            chunk += "\n" + line
+        await ctx.send(chunk, allowed_mentions=discord.AllowedMentions.none())
+
+    @trigger.command(name="remove")
+    @commands.has_permissions(manage_guild=True)
+    async def trigger_remove(self, ctx, trigger_id: int):
+        if not await remove_trigger(self.bot, ctx.guild.id, trigger_id):
+            await ctx.send("❌ No trigger with that id.", delete_after=5)
+            return
+        await self.reload_triggers(ctx.guild.id)
+        await ctx.send(f"✅ Removed trigger `#{trigger_id}`.")
+
+    # The original hard-coded trigger, now a per-guild row in the triggers table
+    @commands.command()
+    async def bully(self, ctx, target: str = None, toggle: str = None):
+        if ctx.author.id == SURDI_USER_ID:
+            await ctx.send("idih ngapain sur")
+            return
+
+        if not (target and target.lower() == "surdi" and toggle and toggle.lower() in ("on", "off")):
+            await ctx.send("❓ Use `.bully surdi on` or `.bully surdi off`")
+            return
+
+        if toggle.lower() == "on":
+            await add_trigger(self.bot, ctx.guild.id, "user", str(SURDI_USER_ID), "reply", SURDI_RESPONSE)
+            await ctx.send("👀 Bully Surdi is now **ON**.")
+        else:
+            for trigger in self.triggers.get(ctx.guild.id, ()):
+                if trigger["kind"] == "user" and trigger["pattern"] == str(SURDI_USER_ID) and trigger["response"] == SURDI_RESPONSE:
+                    await remove_trigger(self.bot, ctx.guild.id, trigger["id"])
+            await ctx.send("😇 Bully Surdi is now **OFF**.")
+        await self.reload_triggers(ctx.guild.id)
+
+
+async def setup(bot):
+    await bot.add_cog(Triggers(bot))
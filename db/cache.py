@@ -0,0 +1,66 @@
+# /db/cache.py
+import os
+from collections import OrderedDict
+
+# Marker stored for guilds that have no row, so unconfigured guilds are not re-queried
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        return self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+        }
+
+
+class GuildConfig(LRUCache):
+    """Whole `channels` rows keyed by guild_id, kept in sync by the db.database writers."""
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_size=int(os.getenv("GUILD_CONFIG_CACHE_SIZE", 10000)))
+
+    def put_row(self, guild_id, row):
+        self.set(guild_id, dict(row) if row is not None else MISSING)
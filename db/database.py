@@ -1,5 +1,10 @@
-import asyncpg
+import time
 import asyncio
+from array import array
+from db.pool import DatabasePool
+from db.migrate import run_migrations
+from db.cache import LRUCache, GuildConfig, MISSING
+from db.infraction_writer import InfractionWriter
 
 async def init_db(bot):
     from dotenv import load_dotenv
@@ -7,81 +12,149 @@ async def init_db(bot):
     load_dotenv()
     DATABASE_URL = os.getenv('DATABASE_URL')
 
-    bot.db = await asyncpg.connect(DATABASE_URL)
+    if getattr(bot, "db", None) is None:
+        bot.db = DatabasePool.from_env(DATABASE_URL)
+    await bot.db.connect()
+    guild_config_cache(bot)
+    autorole_cache(bot)
 
-    # Auto create channels table
-    await bot.db.execute("""
-    CREATE TABLE IF NOT EXISTS channels (
-        guild_id BIGINT PRIMARY KEY,
-        welcome_channel BIGINT DEFAULT NULL,
-        rules_channel BIGINT DEFAULT NULL,
-        heartbeat_channel BIGINT DEFAULT NULL,
-        role_channel BIGINT DEFAULT NULL,
-        introduction_channel BIGINT DEFAULT NULL,
-        goodbye_channel BIGINT DEFAULT NULL
-    )
-""")
+    applied = await run_migrations(bot.db)
+    for name in applied:
+        print(f"➕ Applied migration {name}.")
 
-    await bot.db.execute("""
-    CREATE TABLE IF NOT EXISTS autoroles (
-        guild_id BIGINT,
-        role_id BIGINT,
-        PRIMARY KEY (guild_id, role_id)
-    )
-""")
-
-
-    # Dynamically add missing columns to channels table
-    existing_cols = await bot.db.fetch("SELECT column_name FROM information_schema.columns WHERE table_name = 'channels'")
-    existing_cols = [col['column_name'] for col in existing_cols]
-
-    if 'log_channel' not in existing_cols:
-        await bot.db.execute("ALTER TABLE channels ADD COLUMN log_channel BIGINT DEFAULT NULL;")
-        print("➕ Added 'log_channel' column to channels table.")
-
-    if 'list_channel' not in existing_cols:
-        await bot.db.execute("ALTER TABLE channels ADD COLUMN list_channel BIGINT DEFAULT NULL;")
-        print("➕ Added 'list_channel' column to channels table.")
-
-    # Dynamically create infractions table if missing
-    table_check = await bot.db.fetch("SELECT to_regclass('public.infractions') AS exists")
-    if not table_check[0]['exists']:
-        await bot.db.execute("""
-            CREATE TABLE infractions (
-                id SERIAL PRIMARY KEY,
-                guild_id BIGINT NOT NULL,
-                user_id BIGINT NOT NULL,
-                mod_id BIGINT NOT NULL,
-                action TEXT NOT NULL,
-                reason TEXT,
-                timestamp BIGINT
-            )
-        """)
-        print("✅ Created 'infractions' table dynamically.")
+    if getattr(bot, "infraction_writer", None) is None:
+        bot.infraction_writer = InfractionWriter.from_env(bot.db)
+    bot.infraction_writer.start()
 
     print("✅ Database initialized!")
 
+async def close_db(bot):
+    # Flush queued infractions before the pool goes away
+    if getattr(bot, "infraction_writer", None) is not None:
+        await bot.infraction_writer.close()
+    if getattr(bot, "db", None) is not None:
+        await bot.db.close()
+
+def db_stats(bot):
+    return {**bot.db.stats.as_dict(), **bot.db.pool_status(), "infractions": bot.infraction_writer.stats()}
+
+def cache_stats(bot):
+    return {
+        "guild_config": guild_config_cache(bot).stats(),
+        "autoroles": autorole_cache(bot).stats(),
+        "welcome_templates": welcome_template_cache(bot).stats(),
+    }
+
+async def warm_guild_caches(bot, guild_ids):
+    """Loads channels, autoroles and welcome templates for many guilds with one query per table."""
+    guild_ids = list(guild_ids)
+    if not guild_ids:
+        return {"guilds": 0, "channels": 0, "autoroles": 0, "seconds": 0.0}
+
+    start = time.perf_counter()
+    channel_rows = await bot.db.fetch("SELECT * FROM channels WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    autorole_rows = await bot.db.fetch("SELECT guild_id, role_id FROM autoroles WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    template_rows = await bot.db.fetch("SELECT guild_id, kind, template FROM welcome_templates WHERE guild_id = ANY($1::bigint[])", guild_ids)
+
+    rows_by_guild = {r["guild_id"]: r for r in channel_rows}
+    roles_by_guild = {}
+    for r in autorole_rows:
+        roles_by_guild.setdefault(r["guild_id"], []).append(r["role_id"])
+
+    templates_by_key = {(r["guild_id"], r["kind"]): r["template"] for r in template_rows}
+
+    config = guild_config_cache(bot)
+    autoroles = autorole_cache(bot)
+    templates = welcome_template_cache(bot)
+    for guild_id in guild_ids:
+        config.put_row(guild_id, rows_by_guild.get(guild_id))
+        autoroles.set(guild_id, tuple(roles_by_guild.get(guild_id, ())))
+        for kind in ("welcome", "goodbye"):
+            templates.set((guild_id, kind), templates_by_key.get((guild_id, kind), MISSING))
+
+    return {
+        "guilds": len(guild_ids),
+        "channels": len(channel_rows),
+        "autoroles": len(autorole_rows),
+        "seconds": time.perf_counter() - start,
+    }
+
+# ─── Guild config (channels table) ─────────────────────────────────────────────
+
+def guild_config_cache(bot):
+    if getattr(bot, "guild_config", None) is None:
+        bot.guild_config = GuildConfig.from_env()
+    return bot.guild_config
+
+async def get_guild_config(bot, guild_id):
+    """Returns the guild's whole `channels` row as a dict, or {} if it has none."""
+    cache = guild_config_cache(bot)
+    row = cache.get(guild_id)
+    if row is None:
+        fetched = await bot.db.fetchrow("SELECT * FROM channels WHERE guild_id = $1", guild_id)
+        cache.put_row(guild_id, fetched)
+        row = cache.get(guild_id)
+    return {} if row is MISSING else row
+
 async def get_channel_id(bot, guild_id, channel_type):
-    row = await bot.db.fetchrow(f"SELECT {channel_type} FROM channels WHERE guild_id = $1", guild_id)
-    return row[channel_type] if row else None
+    config = await get_guild_config(bot, guild_id)
+    return config.get(channel_type)
 
 async def set_channel_id(bot, guild_id, channel_type, channel_id):
-    await bot.db.execute(f"""
+    row = await bot.db.fetchrow(f"""
         INSERT INTO channels (guild_id, {channel_type}) 
         VALUES ($1, $2)
         ON CONFLICT (guild_id) DO UPDATE 
         SET {channel_type} = EXCLUDED.{channel_type}
+        RETURNING *
     """, guild_id, channel_id)
+    guild_config_cache(bot).put_row(guild_id, row)
 
 async def remove_channel_id(bot, guild_id, column_name):
-    await bot.db.execute(f"UPDATE channels SET {column_name} = NULL WHERE guild_id = $1", guild_id)
+    row = await bot.db.fetchrow(f"UPDATE channels SET {column_name} = NULL WHERE guild_id = $1 RETURNING *", guild_id)
+    guild_config_cache(bot).put_row(guild_id, row)
 
 async def ensure_guild_exists(bot, guild_id):
-    await bot.db.execute("""
+    row = await bot.db.fetchrow("""
         INSERT INTO channels (guild_id)
         VALUES ($1)
         ON CONFLICT (guild_id) DO NOTHING
+        RETURNING *
     """, guild_id)
+    # Nothing is returned when the row already existed, so only a fresh insert touches the cache
+    if row is not None:
+        guild_config_cache(bot).put_row(guild_id, row)
+
+async def set_flood_config(bot, guild_id, rate, seconds, duplicates, action, duration=None):
+    row = await bot.db.fetchrow("""
+        INSERT INTO channels (guild_id, flood_rate, flood_seconds, flood_duplicates, flood_action, flood_duration)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (guild_id) DO UPDATE
+        SET flood_rate = EXCLUDED.flood_rate, flood_seconds = EXCLUDED.flood_seconds,
+            flood_duplicates = EXCLUDED.flood_duplicates, flood_action = EXCLUDED.flood_action,
+            flood_duration = EXCLUDED.flood_duration
+        RETURNING *
+    """, guild_id, rate, seconds, duplicates, action, duration)
+    guild_config_cache(bot).put_row(guild_id, row)
+
+async def set_join_burst_config(bot, guild_id, threshold, window):
+    row = await bot.db.fetchrow("""
+        INSERT INTO channels (guild_id, join_burst_threshold, join_burst_window)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (guild_id) DO UPDATE
+        SET join_burst_threshold = EXCLUDED.join_burst_threshold, join_burst_window = EXCLUDED.join_burst_window
+        RETURNING *
+    """, guild_id, threshold, window)
+    guild_config_cache(bot).put_row(guild_id, row)
+
+async def set_shared_ban_mode(bot, guild_id, mode):
+    row = await bot.db.fetchrow("""
+        INSERT INTO channels (guild_id, shared_ban_mode)
+        VALUES ($1, $2)
+        ON CONFLICT (guild_id) DO UPDATE SET shared_ban_mode = EXCLUDED.shared_ban_mode
+        RETURNING *
+    """, guild_id, mode)
+    guild_config_cache(bot).put_row(guild_id, row)
 
 async def heartbeat_task(bot):
     await bot.wait_until_ready()
@@ -94,38 +167,435 @@ async def heartbeat_task(bot):
                     await channel.send("💓 Heartbeat: Bot is still alive!")
         await asyncio.sleep(900)
 
+# ─── Infraction-related DB functions ───────────────────────────────────────────
+
 async def log_infraction(bot, guild_id, user_id, mod_id, action, reason, timestamp):
-    await bot.db.execute("""
-        INSERT INTO infractions (guild_id, user_id, mod_id, action, reason, timestamp)
-        VALUES ($1, $2, $3, $4, $5, $6)
-    """, guild_id, user_id, mod_id, action, reason, timestamp)
+    # Queued for the write-behind logger; reads of this member's history flush it first
+    bot.infraction_writer.add(guild_id, user_id, mod_id, action, reason, timestamp)
 
-async def get_infractions(bot, guild_id, user_id):
-    rows = await bot.db.fetch("""
-        SELECT id, guild_id, user_id, mod_id, action, reason, timestamp
-        FROM infractions
-        WHERE guild_id = $1 AND user_id = $2
-        ORDER BY timestamp DESC
+async def log_infractions(bot, records):
+    """Writes many (guild_id, user_id, mod_id, action, reason, timestamp) records in one COPY."""
+    bot.infraction_writer.add_many(records)
+    await bot.infraction_writer.flush()
+
+async def _flush_pending_for(bot, guild_id, user_id):
+    if bot.infraction_writer.has_pending(guild_id, user_id):
+        await bot.infraction_writer.flush()
+
+async def count_infractions(bot, guild_id, user_id):
+    await _flush_pending_for(bot, guild_id, user_id)
+    return await bot.db.fetchval("""
+        SELECT count(*) FROM infractions WHERE guild_id = $1 AND user_id = $2
     """, guild_id, user_id)
+
+async def get_infractions_page(bot, guild_id, user_id, before_ts=None, before_id=None, limit=5):
+    """Returns up to `limit` infractions older than the (before_ts, before_id) cursor, newest first."""
+    await _flush_pending_for(bot, guild_id, user_id)
+    if before_ts is None:
+        rows = await bot.db.fetch("""
+            SELECT id, mod_id, action, reason, timestamp
+            FROM infractions
+            WHERE guild_id = $1 AND user_id = $2
+            ORDER BY timestamp DESC, id DESC
+            LIMIT $3
+        """, guild_id, user_id, limit)
+    else:
+        rows = await bot.db.fetch("""
+            SELECT id, mod_id, action, reason, timestamp
+            FROM infractions
+            WHERE guild_id = $1 AND user_id = $2 AND (timestamp, id) < ($3, $4)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT $5
+        """, guild_id, user_id, before_ts, before_id, limit)
     return [dict(r) for r in rows]
 
+async def stream_infractions(bot, guild_id, since_ts=None, chunk_size=1000):
+    """Yields a guild's infractions oldest first in chunks, from a server-side cursor."""
+    await bot.infraction_writer.flush()
+    async with bot.db.acquire() as conn:
+        # Cursors only live inside a transaction
+        async with conn.transaction(readonly=True):
+            cursor = await conn.cursor("""
+                SELECT id, user_id, mod_id, action, reason, timestamp
+                FROM infractions
+                WHERE guild_id = $1 AND timestamp >= $2
+                ORDER BY timestamp, id
+            """, guild_id, since_ts or 0)
+            while True:
+                rows = await cursor.fetch(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+async def search_infractions(bot, guild_id, query, since_ts=None, action=None, limit=5, offset=0):
+    """Ranked full-text search over a guild's infraction reasons.
+
+    Returns (records, total) where total is the number of matches across all pages.
+    """
+    await bot.infraction_writer.flush()
+    rows = await bot.db.fetch("""
+        SELECT id, user_id, mod_id, action, reason, timestamp,
+               ts_rank_cd(reason_tsv, q) AS rank,
+               count(*) OVER () AS total
+        FROM infractions, websearch_to_tsquery('english', $2) AS q
+        WHERE guild_id = $1
+          AND reason_tsv @@ q
+          AND timestamp >= $3
+          AND ($4::text IS NULL OR action = $4)
+        ORDER BY rank DESC, timestamp DESC, id DESC
+        LIMIT $5 OFFSET $6
+    """, guild_id, query, since_ts or 0, action, limit, offset)
+    total = rows[0]["total"] if rows else 0
+    return [dict(r) for r in rows], total
+
+async def clear_infractions(bot, guild_id, user_id):
+    # Write out anything still queued first so it is deleted too
+    await bot.infraction_writer.flush()
+    await bot.db.execute("""
+        DELETE FROM infractions WHERE guild_id = $1 AND user_id = $2
+    """, guild_id, user_id)
+
 # ─── Autorole-related DB functions ─────────────────────────────────────────────
 
+def autorole_cache(bot):
+    if getattr(bot, "autoroles", None) is None:
+        bot.autoroles = LRUCache(max_size=guild_config_cache(bot).max_size)
+    return bot.autoroles
+
 async def add_autorole(bot, guild_id: int, role_id: int):
     await bot.db.execute("""
         INSERT INTO autoroles (guild_id, role_id)
         VALUES ($1, $2)
         ON CONFLICT DO NOTHING
     """, guild_id, role_id)
+    cache = autorole_cache(bot)
+    if guild_id in cache:
+        role_ids = cache.get(guild_id)
+        if role_id not in role_ids:
+            cache.set(guild_id, role_ids + (role_id,))
 
 async def remove_autorole(bot, guild_id: int, role_id: int):
     await bot.db.execute("""
         DELETE FROM autoroles
         WHERE guild_id = $1 AND role_id = $2
     """, guild_id, role_id)
+    cache = autorole_cache(bot)
+    if guild_id in cache:
+        cache.set(guild_id, tuple(r for r in cache.get(guild_id) if r != role_id))
 
 async def get_autoroles(bot, guild_id: int):
-    rows = await bot.db.fetch("SELECT role_id FROM autoroles WHERE guild_id = $1", guild_id)
-    return [r["role_id"] for r in rows]
+    cache = autorole_cache(bot)
+    role_ids = cache.get(guild_id)
+    if role_ids is None:
+        rows = await bot.db.fetch("SELECT role_id FROM autoroles WHERE guild_id = $1", guild_id)
+        role_ids = tuple(r["role_id"] for r in rows)
+        cache.set(guild_id, role_ids)
+    return list(role_ids)
+
+async def record_autorole_failures(bot, rows, failed_at):
+    """Upserts (guild_id, user_id, role_ids, error) rows, counting repeat failures."""
+    await bot.db.executemany("""
+        INSERT INTO autorole_failures (guild_id, user_id, role_ids, error, failed_at)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (guild_id, user_id) DO UPDATE
+        SET role_ids = EXCLUDED.role_ids, error = EXCLUDED.error, failed_at = EXCLUDED.failed_at,
+            attempts = autorole_failures.attempts + 1
+    """, [(guild_id, user_id, list(role_ids), error, failed_at) for guild_id, user_id, role_ids, error in rows])
+
+async def clear_autorole_failures(bot, keys):
+    await bot.db.execute("""
+        DELETE FROM autorole_failures
+        WHERE (guild_id, user_id) IN (SELECT * FROM unnest($1::bigint[], $2::bigint[]))
+    """, [k[0] for k in keys], [k[1] for k in keys])
+
+async def get_autorole_failures(bot, max_attempts):
+    rows = await bot.db.fetch("SELECT guild_id, user_id, role_ids FROM autorole_failures WHERE attempts < $1", max_attempts)
+    return [dict(r) for r in rows]
+
+# ─── Welcome template DB functions ─────────────────────────────────────────────
+
+def welcome_template_cache(bot):
+    if getattr(bot, "welcome_templates", None) is None:
+        bot.welcome_templates = LRUCache(max_size=guild_config_cache(bot).max_size * 2)
+    return bot.welcome_templates
+
+async def get_welcome_template(bot, guild_id, kind):
+    """The guild's custom template text, or None to use the default."""
+    cache = welcome_template_cache(bot)
+    template = cache.get((guild_id, kind))
+    if template is None:
+        template = await bot.db.fetchval(
+            "SELECT template FROM welcome_templates WHERE guild_id = $1 AND kind = $2", guild_id, kind)
+        cache.set((guild_id, kind), MISSING if template is None else template)
+        return template
+    return None if template is MISSING else template
+
+async def set_welcome_template(bot, guild_id, kind, template):
+    await bot.db.execute("""
+        INSERT INTO welcome_templates (guild_id, kind, template)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (guild_id, kind) DO UPDATE SET template = EXCLUDED.template
+    """, guild_id, kind, template)
+    welcome_template_cache(bot).set((guild_id, kind), template)
+
+async def remove_welcome_template(bot, guild_id, kind):
+    await bot.db.execute("DELETE FROM welcome_templates WHERE guild_id = $1 AND kind = $2", guild_id, kind)
+    welcome_template_cache(bot).set((guild_id, kind), MISSING)
+
+# ─── Scheduled action DB functions ─────────────────────────────────────────────
+
+async def add_scheduled_action(bot, guild_id, target_id, action, run_at, channel_id=None):
+    row = await bot.db.fetchrow("""
+        INSERT INTO scheduled_actions (guild_id, target_id, channel_id, action, run_at)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (guild_id, target_id, action) DO UPDATE
+        SET run_at = EXCLUDED.run_at, channel_id = EXCLUDED.channel_id
+        RETURNING id, guild_id, target_id, channel_id, action, run_at
+    """, guild_id, target_id, channel_id, action, run_at)
+    return dict(row)
+
+async def remove_scheduled_action(bot, guild_id, target_id, action):
+    await bot.db.execute("""
+        DELETE FROM scheduled_actions
+        WHERE guild_id = $1 AND target_id = $2 AND action = $3
+    """, guild_id, target_id, action)
+
+async def complete_scheduled_action(bot, action_id, run_at):
+    # run_at guards against deleting an action that was rescheduled while it ran
+    await bot.db.execute("DELETE FROM scheduled_actions WHERE id = $1 AND run_at = $2", action_id, run_at)
+
+async def get_scheduled_actions(bot):
+    rows = await bot.db.fetch("SELECT id, guild_id, target_id, channel_id, action, run_at FROM scheduled_actions")
+    return [dict(r) for r in rows]
+
+# ─── Escalation rule DB functions ──────────────────────────────────────────────
+
+async def add_escalation_rule(bot, guild_id, action, threshold, window_seconds, escalate_to, duration=None):
+    row = await bot.db.fetchrow("""
+        INSERT INTO escalation_rules (guild_id, action, threshold, window_seconds, escalate_to, duration)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (guild_id, action, threshold) DO UPDATE
+        SET window_seconds = EXCLUDED.window_seconds, escalate_to = EXCLUDED.escalate_to, duration = EXCLUDED.duration
+        RETURNING *
+    """, guild_id, action, threshold, window_seconds, escalate_to, duration)
+    return dict(row)
+
+async def remove_escalation_rule(bot, guild_id, rule_id):
+    result = await bot.db.execute("DELETE FROM escalation_rules WHERE guild_id = $1 AND id = $2", guild_id, rule_id)
+    return result != "DELETE 0"
+
+async def get_escalation_rules(bot, guild_id=None):
+    if guild_id is None:
+        rows = await bot.db.fetch("SELECT * FROM escalation_rules")
+    else:
+        rows = await bot.db.fetch("SELECT * FROM escalation_rules WHERE guild_id = $1 ORDER BY action, threshold", guild_id)
+    return [dict(r) for r in rows]
+
+async def get_recent_infractions(bot, guild_ids, since_ts):
+    """(guild_id, user_id, action, timestamp) rows for rebuilding rolling counts."""
+    await bot.infraction_writer.flush()
+    return await bot.db.fetch("""
+        SELECT guild_id, user_id, action, timestamp
+        FROM infractions
+        WHERE guild_id = ANY($1::bigint[]) AND timestamp >= $2
+        ORDER BY timestamp
+    """, list(guild_ids), since_ts)
+
+# ─── Automod rule DB functions ─────────────────────────────────────────────────
+
+async def add_automod_rule(bot, guild_id, kind, pattern, action, duration=None):
+    row = await bot.db.fetchrow("""
+        INSERT INTO automod_rules (guild_id, kind, pattern, action, duration)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (guild_id, kind, pattern) DO UPDATE
+        SET action = EXCLUDED.action, duration = EXCLUDED.duration
+        RETURNING *
+    """, guild_id, kind, pattern, action, duration)
+    return dict(row)
+
+async def remove_automod_rule(bot, guild_id, rule_id):
+    result = await bot.db.execute("DELETE FROM automod_rules WHERE guild_id = $1 AND id = $2", guild_id, rule_id)
+    return result != "DELETE 0"
+
+async def get_automod_rules(bot, guild_id=None):
+    if guild_id is None:
+        rows = await bot.db.fetch("SELECT * FROM automod_rules")
+    else:
+        rows = await bot.db.fetch("SELECT * FROM automod_rules WHERE guild_id = $1 ORDER BY kind, id", guild_id)
+    return [dict(r) for r in rows]
+
+# ─── Trigger DB functions ──────────────────────────────────────────────────────
+
+async def add_trigger(bot, guild_id, kind, pattern, response_type, response=None):
+    row = await bot.db.fetchrow("""
+        INSERT INTO triggers (guild_id, kind, pattern, response_type, response)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (guild_id, kind, pattern, response_type) DO UPDATE
+        SET response = EXCLUDED.response
+        RETURNING *
+    """, guild_id, kind, pattern, response_type, response)
+    return dict(row)
+
+async def remove_trigger(bot, guild_id, trigger_id):
+    result = await bot.db.execute("DELETE FROM triggers WHERE guild_id = $1 AND id = $2", guild_id, trigger_id)
+    return result != "DELETE 0"
+
+async def get_triggers(bot, guild_id=None):
+    if guild_id is None:
+        rows = await bot.db.fetch("SELECT * FROM triggers")
+    else:
+        rows = await bot.db.fetch("SELECT * FROM triggers WHERE guild_id = $1 ORDER BY id", guild_id)
+    return [dict(r) for r in rows]
+
+# ─── Giveaway DB functions ─────────────────────────────────────────────────────
+
+async def create_giveaway(bot, guild_id, channel_id, host_id, prize, winners, ends_at):
+    row = await bot.db.fetchrow("""
+        INSERT INTO giveaways (guild_id, channel_id, host_id, prize, winners, ends_at)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        RETURNING *
+    """, guild_id, channel_id, host_id, prize, winners, ends_at)
+    return dict(row)
+
+async def set_giveaway_message(bot, giveaway_id, message_id):
+    await bot.db.execute("UPDATE giveaways SET message_id = $2 WHERE id = $1", giveaway_id, message_id)
+
+async def get_giveaway(bot, guild_id, giveaway_or_message_id):
+    row = await bot.db.fetchrow(
+        "SELECT * FROM giveaways WHERE guild_id = $1 AND (id = $2 OR message_id = $2)",
+        guild_id, giveaway_or_message_id)
+    return dict(row) if row else None
+
+async def get_active_giveaways(bot):
+    rows = await bot.db.fetch("SELECT * FROM giveaways WHERE NOT ended")
+    return [dict(r) for r in rows]
+
+async def finish_giveaway(bot, giveaway_id, winner_ids):
+    await bot.db.execute("UPDATE giveaways SET ended = TRUE, winner_ids = $2 WHERE id = $1", giveaway_id, winner_ids)
+
+async def add_giveaway_entries(bot, entries):
+    """Batch-inserts {giveaway_id: [user_ids]} with one statement per giveaway."""
+    await bot.db.executemany("""
+        INSERT INTO giveaway_entries (giveaway_id, user_id)
+        SELECT $1, unnest($2::bigint[])
+        ON CONFLICT DO NOTHING
+    """, [(giveaway_id, user_ids) for giveaway_id, user_ids in entries.items()])
+
+async def get_giveaway_entries(bot, giveaway_id, chunk_size=5000):
+    """Entrant ids as a sorted array('Q'), read in chunks so no big list of Records is built."""
+    ids = array("Q")
+    async with bot.db.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            cursor = await conn.cursor(
+                "SELECT user_id FROM giveaway_entries WHERE giveaway_id = $1 ORDER BY user_id", giveaway_id)
+            while True:
+                rows = await cursor.fetch(chunk_size)
+                if not rows:
+                    break
+                ids.extend(row[0] for row in rows)
+    return ids
+
+# ─── Shared ban list DB functions ──────────────────────────────────────────────
+
+async def add_shared_bans(bot, user_ids, reason, added_by):
+    """Adds or re-activates users; each touched row gets a new version for delta sync."""
+    result = await bot.db.execute("""
+        INSERT INTO shared_bans (user_id, reason, added_by, added_at, version)
+        SELECT u, $2, $3, $4, nextval('shared_bans_version_seq') FROM unnest($1::bigint[]) AS u
+        ON CONFLICT (user_id) DO UPDATE
+        SET reason = EXCLUDED.reason, added_by = EXCLUDED.added_by, added_at = EXCLUDED.added_at,
+            version = EXCLUDED.version, txid = pg_current_xact_id(), removed = FALSE
+        WHERE shared_bans.removed
+    """, list(user_ids), reason, added_by, int(time.time()))
+    return int(result.split()[-1])
+
+async def remove_shared_bans(bot, user_ids):
+    result = await bot.db.execute("""
+        UPDATE shared_bans SET removed = TRUE, version = nextval('shared_bans_version_seq'), txid = pg_current_xact_id()
+        WHERE user_id = ANY($1::bigint[]) AND NOT removed
+    """, list(user_ids))
+    return int(result.split()[-1])
+
+async def get_shared_ban(bot, user_id):
+    row = await bot.db.fetchrow("SELECT * FROM shared_bans WHERE user_id = $1 AND NOT removed", user_id)
+    return dict(row) if row else None
+
+# Oldest transaction still open in this snapshot; anything it or later ones write is re-read
+SNAPSHOT_XMIN = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+async def load_shared_bans(bot, chunk_size=50000):
+    """(sync cursor, version, sorted array('Q') of listed ids), streamed so millions of rows stay compact."""
+    ids = array("Q")
+    async with bot.db.acquire() as conn:
+        async with conn.transaction(readonly=True, isolation="repeatable_read"):
+            xmin = await conn.fetchval(SNAPSHOT_XMIN)
+            version = await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM shared_bans")
+            cursor = await conn.cursor("SELECT user_id FROM shared_bans WHERE NOT removed ORDER BY user_id")
+            while True:
+                rows = await cursor.fetch(chunk_size)
+                if not rows:
+                    break
+                ids.extend(row[0] for row in rows)
+    return xmin, version, ids
+
+async def get_shared_ban_changes(bot, since_xmin):
+    """(next cursor, rows) for every transaction not known to be finished at the last sync.
+
+    Rows seen before can come back; they carry the row's current state, so applying
+    them again is harmless.
+    """
+    async with bot.db.acquire() as conn:
+        async with conn.transaction(readonly=True, isolation="repeatable_read"):
+            xmin = await conn.fetchval(SNAPSHOT_XMIN)
+            rows = await conn.fetch("""
+                SELECT user_id, removed, version FROM shared_bans
+                WHERE txid >= $1::text::xid8 ORDER BY version
+            """, str(since_xmin))
+    return xmin, rows
+
+# ─── Role menu DB functions ────────────────────────────────────────────────────
+
+async def create_role_menu(bot, guild_id, channel_id, style, title):
+    row = await bot.db.fetchrow("""
+        INSERT INTO role_menus (guild_id, channel_id, style, title)
+        VALUES ($1, $2, $3, $4)
+        RETURNING *
+    """, guild_id, channel_id, style, title)
+    return dict(row)
+
+async def set_role_menu_message(bot, menu_id, channel_id, message_id):
+    await bot.db.execute("UPDATE role_menus SET channel_id = $2, message_id = $3 WHERE id = $1", menu_id, channel_id, message_id)
+
+async def delete_role_menu(bot, guild_id, menu_id):
+    result = await bot.db.execute("DELETE FROM role_menus WHERE guild_id = $1 AND id = $2", guild_id, menu_id)
+    return result != "DELETE 0"
+
+async def add_role_menu_item(bot, menu_id, role_id, emoji=None, label=None):
+    await bot.db.execute("""
+        INSERT INTO role_menu_items (menu_id, role_id, emoji, label)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (menu_id, role_id) DO UPDATE
+        SET emoji = EXCLUDED.emoji, label = EXCLUDED.label
+    """, menu_id, role_id, emoji, label)
 
+async def remove_role_menu_item(bot, menu_id, role_id):
+    result = await bot.db.execute("DELETE FROM role_menu_items WHERE menu_id = $1 AND role_id = $2", menu_id, role_id)
+    return result != "DELETE 0"
 
+async def get_role_menus(bot, guild_id=None):
+    """Menus with their items under "items", in the order the items were added."""
+    if guild_id is None:
+        menus = await bot.db.fetch("SELECT * FROM role_menus")
+        items = await bot.db.fetch("SELECT * FROM role_menu_items ORDER BY id")
+    else:
+        menus = await bot.db.fetch("SELECT * FROM role_menus WHERE guild_id = $1 ORDER BY id", guild_id)
+        items = await bot.db.fetch("""
+            SELECT i.* FROM role_menu_items i JOIN role_menus m ON m.id = i.menu_id
+            WHERE m.guild_id = $1 ORDER BY i.id
+        """, guild_id)
+    by_id = {m["id"]: {**dict(m), "items": []} for m in menus}
+    for item in items:
+        menu = by_id.get(item["menu_id"])
+        if menu is not None:
+            menu["items"].append(dict(item))
+    return list(by_id.values())
@@ -0,0 +1,149 @@
+# /db/infraction_writer.py
+import os
+import asyncio
+import asyncpg
+from db.pool import RECONNECT_ERRORS
+
+COLUMNS = ("guild_id", "user_id", "mod_id", "action", "reason", "timestamp")
+MAX_DEAD_LETTERS = 100
+# Errors about the rows themselves, from the server or asyncpg's own encoding; retrying won't help
+DATA_ERRORS = (asyncpg.PostgresError, asyncpg.InterfaceError)
+
+
+class InfractionWriter:
+    """Write-behind buffer for the infractions table.
+
+    Records are queued in memory and written with COPY once `max_batch` records are
+    pending or every `flush_interval` seconds, whichever comes first.
+    """
+
+    def __init__(self, db, max_batch=100, flush_interval=2.0, max_pending=10000):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.buffer = []
+        self.in_flight = []
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.dead_letters = []   # most recent records the database refused, with the error
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._flush_task = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, db):
+        return cls(
+            db,
+            max_batch=int(os.getenv("INFRACTION_BATCH_SIZE", 100)),
+            flush_interval=float(os.getenv("INFRACTION_FLUSH_INTERVAL", 2)),
+        )
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, guild_id, user_id, mod_id, action, reason, timestamp):
+        self.buffer.append((guild_id, user_id, mod_id, action, reason, timestamp))
+        self._trim()
+        if len(self.buffer) >= self.max_batch and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def add_many(self, records):
+        """Queues a whole batch without triggering a size flush; the caller flushes it."""
+        self.buffer.extend(tuple(r) for r in records)
+        self._trim()
+
+    def _trim(self):
+        if len(self.buffer) > self.max_pending:
+            # The database has been unreachable for a while; keep the newest records
+            overflow = len(self.buffer) - self.max_pending
+            del self.buffer[:overflow]
+            self.dropped += overflow
+
+    def has_pending(self, guild_id, user_id):
+        """Whether a member has records queued or being written but not yet committed."""
+        return any(r[0] == guild_id and r[1] == user_id for r in (*self.in_flight, *self.buffer))
+
+    async def flush(self):
+        async with self._lock:
+            if not self.buffer:
+                return 0
+            self.in_flight, self.buffer = self.buffer, []
+            try:
+                async with self.db.acquire() as conn:
+                    try:
+                        await conn.copy_records_to_table("infractions", records=self.in_flight, columns=COLUMNS)
+                        written = len(self.in_flight)
+                    except RECONNECT_ERRORS:
+                        raise
+                    except DATA_ERRORS as e:
+                        # A bad row fails the whole COPY; find it instead of retrying the batch forever
+                        print(f"⚠️ COPY of {len(self.in_flight)} infractions failed, writing rows one by one: {e}")
+                        written = await self._write_rows(conn, self.in_flight)
+            except Exception as e:
+                # Connection trouble: keep everything not yet written for the next flush
+                self.failures += 1
+                print(f"⚠️ Could not write {len(self.in_flight)} infractions, will retry: {e}")
+                self.buffer[:0] = self.in_flight
+                return 0
+            except asyncio.CancelledError:
+                # The COPY may or may not have committed; a duplicate beats a lost infraction
+                self.buffer[:0] = self.in_flight
+                raise
+            finally:
+                self.in_flight = []
+            self.written += written
+            self.flushes += 1
+            return written
+
+    async def _write_rows(self, conn, records):
+        """Inserts records individually; rows the database rejects are dead-lettered."""
+        written = 0
+        for i, record in enumerate(records):
+            try:
+                await conn.execute("""
+                    INSERT INTO infractions (guild_id, user_id, mod_id, action, reason, timestamp)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                """, *record)
+                written += 1
+            except (asyncio.CancelledError, *RECONNECT_ERRORS):
+                # Only the rows not yet inserted go back to the buffer
+                self.in_flight = records[i:]
+                raise
+            except DATA_ERRORS as e:
+                self.rejected += 1
+                self.dead_letters.append((record, str(e)))
+                del self.dead_letters[:-MAX_DEAD_LETTERS]
+                print(f"❌ Dropped infraction for user {record[1]} in guild {record[0]}: {e}")
+        return written
+
+    async def _run(self):
+        # Stops between flushes, never during one, so close() can't cut a COPY short
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def close(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "pending": len(self.buffer) + len(self.in_flight),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,62 @@
+# /db/migrate.py
+import os
+import asyncpg
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# Arbitrary advisory lock key so two bot processes never upgrade the schema at once
+MIGRATION_LOCK_ID = 0x59554B49
+MIGRATION_TIMEOUT = 3600
+
+
+def load_migrations():
+    """Returns [(version, name, sql)] for every NNNN_name.sql file, in order."""
+    migrations = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not name.endswith(".sql"):
+            continue
+        version = int(name.split("_", 1)[0])
+        with open(os.path.join(MIGRATIONS_DIR, name), "r", encoding="utf-8") as f:
+            migrations.append((version, name, f.read()))
+    return migrations
+
+
+async def current_version(db):
+    try:
+        return await db.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    except asyncpg.exceptions.UndefinedTableError:
+        return 0
+
+
+async def run_migrations(db):
+    """Brings the schema up to date and returns the names of the migrations applied.
+
+    When the schema is already current this costs a single query.
+    """
+    migrations = load_migrations()
+    target = migrations[-1][0] if migrations else 0
+    if await current_version(db) >= target:
+        return []
+
+    applied = []
+    async with db.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+            # Index builds on big tables may take longer than the pool's statement timeout
+            await conn.execute("SET LOCAL statement_timeout = 0")
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+            # Re-read under the lock in case another process upgraded in the meantime
+            version = await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            for number, name, sql in migrations:
+                if number <= version:
+                    continue
+                await conn.execute(sql, timeout=MIGRATION_TIMEOUT)
+                await conn.execute("INSERT INTO schema_version (version, name) VALUES ($1, $2)", number, name)
+                applied.append(name)
+    return applied
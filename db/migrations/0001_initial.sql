@@ -0,0 +1,29 @@
+-- Baseline schema. Written to be safe on databases created by the old ad-hoc init_db.
+CREATE TABLE IF NOT EXISTS channels (
+    guild_id BIGINT PRIMARY KEY,
+    welcome_channel BIGINT DEFAULT NULL,
+    rules_channel BIGINT DEFAULT NULL,
+    heartbeat_channel BIGINT DEFAULT NULL,
+    role_channel BIGINT DEFAULT NULL,
+    introduction_channel BIGINT DEFAULT NULL,
+    goodbye_channel BIGINT DEFAULT NULL
+);
+
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS log_channel BIGINT DEFAULT NULL;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS list_channel BIGINT DEFAULT NULL;
+
+CREATE TABLE IF NOT EXISTS autoroles (
+    guild_id BIGINT,
+    role_id BIGINT,
+    PRIMARY KEY (guild_id, role_id)
+);
+
+CREATE TABLE IF NOT EXISTS infractions (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    mod_id BIGINT NOT NULL,
+    action TEXT NOT NULL,
+    reason TEXT,
+    timestamp BIGINT
+);
@@ -0,0 +1,10 @@
+-- Index for keyset-paginated history: (timestamp, id) is the page cursor. reason is left
+-- out of INCLUDE because long TEXT can exceed the btree row size limit; one page of heap
+-- fetches for it is cheap.
+CREATE INDEX IF NOT EXISTS infractions_history_idx
+    ON infractions (guild_id, user_id, timestamp DESC, id DESC)
+    INCLUDE (mod_id, action);
+
+-- The old (guild_id, user_id, timestamp DESC) index is a prefix of this one; keeping both
+-- only makes every insert update two indexes
+DROP INDEX IF EXISTS infractions_guild_user_ts_idx;
@@ -0,0 +1,3 @@
+-- Guild-wide scans (export, search with a time window) walk infractions in time order
+CREATE INDEX IF NOT EXISTS infractions_guild_ts_idx
+    ON infractions (guild_id, timestamp, id);
@@ -0,0 +1,7 @@
+-- Full-text search over infraction reasons for .infraction search
+ALTER TABLE infractions
+    ADD COLUMN IF NOT EXISTS reason_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(reason, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS infractions_reason_tsv_idx
+    ON infractions USING GIN (reason_tsv);
@@ -0,0 +1,14 @@
+-- Timed actions (e.g. unmutes) that must survive restarts. One pending action
+-- per (guild, target, action) so re-muting reschedules instead of stacking.
+CREATE TABLE IF NOT EXISTS scheduled_actions (
+    id BIGSERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    target_id BIGINT NOT NULL,
+    channel_id BIGINT,
+    action TEXT NOT NULL,
+    run_at BIGINT NOT NULL,
+    UNIQUE (guild_id, target_id, action)
+);
+
+CREATE INDEX IF NOT EXISTS scheduled_actions_run_at_idx
+    ON scheduled_actions (run_at);
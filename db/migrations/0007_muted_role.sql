@@ -0,0 +1,2 @@
+-- Remember each guild's Muted role so .mute never has to scan guild.roles
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS muted_role BIGINT DEFAULT NULL;
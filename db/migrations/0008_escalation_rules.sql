@@ -0,0 +1,11 @@
+-- Per-guild auto-escalation policies, e.g. 3 Warned within 1 day -> Muted for 1h
+CREATE TABLE IF NOT EXISTS escalation_rules (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    action TEXT NOT NULL,
+    threshold INT NOT NULL,
+    window_seconds BIGINT NOT NULL,
+    escalate_to TEXT NOT NULL,
+    duration TEXT,
+    UNIQUE (guild_id, action, threshold)
+);
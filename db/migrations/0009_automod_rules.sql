@@ -0,0 +1,10 @@
+-- Per-guild banned words and link domains for the automod filter
+CREATE TABLE IF NOT EXISTS automod_rules (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    kind TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    action TEXT NOT NULL DEFAULT 'delete',
+    duration TEXT,
+    UNIQUE (guild_id, kind, pattern)
+);
@@ -0,0 +1,6 @@
+-- Per-guild anti-flood settings; flood_rate NULL means the detector is off
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS flood_rate INT DEFAULT NULL;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS flood_seconds INT DEFAULT NULL;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS flood_duplicates INT DEFAULT NULL;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS flood_action TEXT DEFAULT NULL;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS flood_duration TEXT DEFAULT NULL;
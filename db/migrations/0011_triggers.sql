@@ -0,0 +1,10 @@
+-- Per-guild auto-responders: fire on a user/role mention, keyword or regex
+CREATE TABLE IF NOT EXISTS triggers (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    kind TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    response_type TEXT NOT NULL,
+    response TEXT,
+    UNIQUE (guild_id, kind, pattern, response_type)
+);
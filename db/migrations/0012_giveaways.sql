@@ -0,0 +1,19 @@
+-- Giveaways survive restarts; entries are one row per (giveaway, user)
+CREATE TABLE IF NOT EXISTS giveaways (
+    id BIGSERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT UNIQUE,
+    host_id BIGINT NOT NULL,
+    prize TEXT NOT NULL,
+    winners INT NOT NULL,
+    ends_at BIGINT NOT NULL,
+    ended BOOLEAN NOT NULL DEFAULT FALSE,
+    winner_ids BIGINT[] NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS giveaway_entries (
+    giveaway_id BIGINT NOT NULL REFERENCES giveaways(id) ON DELETE CASCADE,
+    user_id BIGINT NOT NULL,
+    PRIMARY KEY (giveaway_id, user_id)
+);
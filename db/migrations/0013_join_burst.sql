@@ -0,0 +1,3 @@
+-- Per-guild join rate above which welcomes and goodbyes are combined; NULL uses the defaults
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS join_burst_threshold INT DEFAULT NULL;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS join_burst_window INT DEFAULT NULL;
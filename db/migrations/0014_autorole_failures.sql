@@ -0,0 +1,10 @@
+-- Autorole assignments that failed after retries, picked up again by the retry loop
+CREATE TABLE IF NOT EXISTS autorole_failures (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    role_ids BIGINT[] NOT NULL,
+    error TEXT,
+    attempts INT NOT NULL DEFAULT 1,
+    failed_at BIGINT NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
@@ -0,0 +1,7 @@
+-- Per-guild custom welcome/goodbye text; guilds without a row use the built-in text
+CREATE TABLE IF NOT EXISTS welcome_templates (
+    guild_id BIGINT NOT NULL,
+    kind TEXT NOT NULL,
+    template TEXT NOT NULL,
+    PRIMARY KEY (guild_id, kind)
+);
@@ -0,0 +1,22 @@
+-- Network-wide list of known raid/scam accounts. Rows are never deleted: removal bumps
+-- the version with removed = TRUE, so every bot instance can sync deltas.
+CREATE SEQUENCE IF NOT EXISTS shared_bans_version_seq;
+
+-- Versions come from a sequence before commit, so a change can commit after a sync has
+-- already read past its version. txid records the writing transaction, which lets sync
+-- re-read everything from transactions that were still open at its last snapshot (PG 13+).
+CREATE TABLE IF NOT EXISTS shared_bans (
+    user_id BIGINT PRIMARY KEY,
+    reason TEXT,
+    added_by BIGINT,
+    added_at BIGINT NOT NULL,
+    version BIGINT NOT NULL,
+    txid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    removed BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS shared_bans_version_idx ON shared_bans (version);
+CREATE INDEX IF NOT EXISTS shared_bans_txid_idx ON shared_bans (txid);
+
+-- Per-guild reaction to a listed account joining: NULL (off), 'ban' or 'quarantine'
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS shared_ban_mode TEXT DEFAULT NULL;
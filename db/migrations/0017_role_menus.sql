@@ -0,0 +1,18 @@
+-- Self-assign role menus posted as buttons, a select menu or reactions
+CREATE TABLE IF NOT EXISTS role_menus (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT UNIQUE,
+    style TEXT NOT NULL,
+    title TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS role_menu_items (
+    id SERIAL PRIMARY KEY,
+    menu_id INT NOT NULL REFERENCES role_menus(id) ON DELETE CASCADE,
+    role_id BIGINT NOT NULL,
+    emoji TEXT,
+    label TEXT,
+    UNIQUE (menu_id, role_id)
+);
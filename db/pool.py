@@ -0,0 +1,173 @@
+# /db/pool.py
+import os
+import time
+import asyncio
+import asyncpg
+from contextlib import asynccontextmanager
+
+# Errors that mean the server (or the socket to it) went away. Not InterfaceError in
+# general: asyncpg raises subclasses of it for client-side mistakes like bad arguments.
+RECONNECT_ERRORS = (
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.AdminShutdownError,
+    ConnectionError,
+    OSError,
+)
+
+
+def is_read_only(query):
+    """Plain SELECTs can be re-sent safely; anything else may already have been applied."""
+    return query.lstrip().upper().startswith("SELECT")
+
+
+class QueryStats:
+    def __init__(self):
+        self.queries = 0
+        self.acquires = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.query_time = 0.0
+        self.max_query_time = 0.0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def record_wait(self, waited):
+        self.acquires += 1
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+    def record(self, waited, took):
+        self.queries += 1
+        self.query_time += took
+        self.max_query_time = max(self.max_query_time, took)
+        self.record_wait(waited)
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "avg_query_ms": round(self.query_time / (self.queries or 1) * 1000, 2),
+            "max_query_ms": round(self.max_query_time * 1000, 2),
+            "avg_wait_ms": round(self.wait_time / (self.acquires or 1) * 1000, 2),
+            "max_wait_ms": round(self.max_wait_time * 1000, 2),
+        }
+
+
+class DatabasePool:
+    """asyncpg pool wrapper used as `bot.db`.
+
+    Exposes the same execute/fetch/fetchrow/fetchval calls as a single connection,
+    so helpers never have to acquire or release connections themselves.
+    """
+
+    def __init__(self, dsn, min_size=2, max_size=10, statement_timeout=10.0, acquire_timeout=5.0, retries=2):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_timeout = statement_timeout
+        self.acquire_timeout = acquire_timeout
+        self.retries = retries
+        self.stats = QueryStats()
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls, dsn):
+        return cls(
+            dsn,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            statement_timeout=float(os.getenv("DB_STATEMENT_TIMEOUT", 10)),
+            acquire_timeout=float(os.getenv("DB_ACQUIRE_TIMEOUT", 5)),
+        )
+
+    async def connect(self):
+        async with self._lock:
+            if self._pool is not None and not self._pool.is_closing():
+                return
+            self._pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                command_timeout=self.statement_timeout,
+                server_settings={"statement_timeout": str(int(self.statement_timeout * 1000))},
+            )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a raw connection, e.g. for transactions, COPY or cursors."""
+        if self._pool is None:
+            await self.connect()
+        pool = self._pool
+        start = time.perf_counter()
+        conn = await pool.acquire(timeout=self.acquire_timeout)
+        self.stats.record_wait(time.perf_counter() - start)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+
+    async def _run(self, method, query, *args, timeout=None):
+        for attempt in range(self.retries + 1):
+            if self._pool is None:
+                await self.connect()
+            pool = self._pool
+            start = time.perf_counter()
+            sent = False
+            try:
+                conn = await pool.acquire(timeout=self.acquire_timeout)
+                acquired = time.perf_counter()
+                try:
+                    sent = True
+                    result = await getattr(conn, method)(query, *args, timeout=timeout)
+                finally:
+                    # A broken connection is closed on release and the pool opens a new one
+                    await pool.release(conn)
+                self.stats.record(acquired - start, time.perf_counter() - acquired)
+                return result
+            except asyncio.TimeoutError:
+                # Pool exhausted or statement too slow; reconnecting would not help
+                self.stats.errors += 1
+                raise
+            except RECONNECT_ERRORS:
+                self.stats.errors += 1
+                if attempt == self.retries or (sent and not is_read_only(query)):
+                    raise
+                self.stats.reconnects += 1
+                print(f"⚠️ Database connection lost, retrying (attempt {attempt + 1})...")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            except Exception:
+                self.stats.errors += 1
+                raise
+
+    async def execute(self, query, *args, timeout=None):
+        return await self._run("execute", query, *args, timeout=timeout)
+
+    async def executemany(self, query, args, timeout=None):
+        return await self._run("executemany", query, args, timeout=timeout)
+
+    async def fetch(self, query, *args, timeout=None):
+        return await self._run("fetch", query, *args, timeout=timeout)
+
+    async def fetchrow(self, query, *args, timeout=None):
+        return await self._run("fetchrow", query, *args, timeout=timeout)
+
+    async def fetchval(self, query, *args, timeout=None):
+        return await self._run("fetchval", query, *args, timeout=timeout)
+
+    def pool_status(self):
+        if self._pool is None:
+            return {"size": 0, "idle": 0, "max_size": self.max_size}
+        return {
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "max_size": self.max_size,
+        }
@@ -1,9 +1,13 @@
 # main.py
 import os
+import asyncio
 import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
-from db.database import init_db, heartbeat_task
+from db.database import init_db, close_db, warm_guild_caches, heartbeat_task
+from utils.scheduler import ActionScheduler
+from utils.outbox import ModLogOutbox
+from utils.autoroles import AutoroleWorker
 
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
@@ -12,12 +16,91 @@ intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 
-bot = commands.Bot(command_prefix=".", intents=intents, help_command=None)
+# Lifecycle events pass straight through; everything else waits until startup has finished
+UNGATED_EVENTS = {"ready", "connect", "disconnect", "resumed", "error"}
+STARTUP_WAIT = 30          # seconds events are held for startup steps that keep failing
+STARTUP_RETRY_MAX = 300    # longest pause between retries of a failed startup step
+
+class Bot(commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Set once caches are warm and cogs have loaded their state
+        self.startup_done = asyncio.Event()
+        self.startup_tasks = []
+
+    def dispatch(self, event_name, /, *args, **kwargs):
+        if self.startup_done.is_set() or event_name in UNGATED_EVENTS or event_name.startswith(("socket_", "shard_")):
+            return super().dispatch(event_name, *args, **kwargs)
+        # Waiters wake in arrival order, so held events keep their order
+        asyncio.create_task(self.dispatch_when_ready(event_name, args, kwargs))
+
+    async def dispatch_when_ready(self, event_name, args, kwargs):
+        await self.startup_done.wait()
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def close(self):
+        for task in self.startup_tasks:
+            task.cancel()
+        await self.outbox.drain()
+        await self.autorole_worker.close()
+        await super().close()
+        self.scheduler.stop()
+        await close_db(self)
+
+bot = Bot(command_prefix=".", intents=intents, help_command=None)
+bot.scheduler = ActionScheduler(bot)
+bot.outbox = ModLogOutbox(bot)
+bot.autorole_worker = AutoroleWorker(bot)
+
+async def startup_step(name, step):
+    """Runs one startup step until it succeeds, so a failed loader never stays empty."""
+    delay = 1
+    while True:
+        try:
+            await step()
+            return
+        except Exception as e:
+            print(f"❌ {name} failed, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX)
+
+async def warm_caches():
+    stats = await warm_guild_caches(bot, [g.id for g in bot.guilds])
+    print(f"✅ Warmed config for {stats['guilds']} guilds "
+          f"({stats['channels']} channel rows, {stats['autoroles']} autoroles) in {stats['seconds'] * 1000:.0f}ms.")
+
+async def start_scheduler():
+    pending = await bot.scheduler.start()
+    print(f"✅ Scheduler started with {pending} pending actions.")
+
+async def start_autorole_worker():
+    retrying = await bot.autorole_worker.start()
+    print(f"✅ Autorole worker started, retrying {retrying} failed assignments.")
 
 @bot.event
 async def on_ready():
-    await init_db(bot)
-    await bot.tree.sync()
+    # on_ready fires again after every gateway reconnect; startup only runs once
+    if getattr(bot, "started", False):
+        print(f"🔄 Reconnected as {bot.user}.")
+        return
+    bot.started = True
+
+    # Each step retries on its own, so one failure never skips the others. Cogs load
+    # their own state through on_db_ready; gated events wait for all of it.
+    steps = [("Cache warm-up", warm_caches), ("Scheduler start", start_scheduler),
+             ("Autorole worker start", start_autorole_worker)]
+    steps += [(listener.__qualname__, listener) for listener in bot.extra_events.get("on_db_ready", [])]
+    bot.startup_tasks = [asyncio.create_task(startup_step(name, step)) for name, step in steps]
+    _, pending = await asyncio.wait(bot.startup_tasks, timeout=STARTUP_WAIT)
+    if pending:
+        # Whatever those steps load stays empty (giveaways say "still loading") until they succeed
+        print(f"⚠️ {len(pending)} startup steps are still retrying; releasing held events.")
+    bot.startup_done.set()
+
+    try:
+        await bot.tree.sync()
+    except discord.HTTPException as e:
+        print(f"⚠️ Could not sync application commands: {e}")
     print(f"✅ Logged in as {bot.user}!")
     bot.loop.create_task(heartbeat_task(bot))
     update_status.start()
@@ -31,9 +114,16 @@ async def update_status():
 
 @bot.event
 async def setup_hook():
+    # Runs before the gateway connects, so the pool and schema exist before any event
+    await init_db(bot)
     for cog in [
         "cogs.general",
         "cogs.moderation",
+        "cogs.automod",
+        "cogs.sharedbans",
+        "cogs.triggers",
+        "cogs.giveaway",
+        "cogs.rolemenus",
         "cogs.events",
         "cogs.game",
         "cogs.character_management"
@@ -0,0 +1,54 @@
+from utils.antiflood import FloodDetector, HASH_RING_SIZE
+
+
+def test_flood_after_rate_is_used_up():
+    detector = FloodDetector()
+    verdicts = [detector.check(1, 1, f"msg {i}", 5, 10, 0, now=100.0) for i in range(6)]
+    assert verdicts == [None] * 5 + ["flood"]
+    # The flag resets the bucket, so the next message starts a fresh burst
+    assert detector.check(1, 1, "again", 5, 10, 0, now=100.0) is None
+
+
+def test_tokens_refill_over_time():
+    detector = FloodDetector()
+    for i in range(5):
+        assert detector.check(1, 1, f"msg {i}", 5, 10, 0, now=100.0) is None
+    # 2 seconds at 5 per 10 seconds earns one message back
+    assert detector.check(1, 1, "later", 5, 10, 0, now=102.0) is None
+    assert detector.check(1, 1, "too soon", 5, 10, 0, now=102.0) == "flood"
+
+
+def test_duplicates_are_normalized_and_windowed():
+    detector = FloodDetector()
+    assert detector.check(1, 1, "Buy now", 100, 10, 3, now=0.0) is None
+    assert detector.check(1, 1, "  buy NOW ", 100, 10, 3, now=1.0) is None
+    assert detector.check(1, 1, "buy now", 100, 10, 3, now=2.0) == "duplicate"
+    # Copies older than the window do not count
+    for t in (20.0, 31.0):
+        assert detector.check(1, 1, "buy now", 100, 10, 3, now=t) is None
+
+
+def test_duplicate_ring_only_remembers_recent_messages():
+    detector = FloodDetector()
+    assert detector.check(1, 1, "same", 1000, 10, 2, now=0.0) is None
+    for i in range(HASH_RING_SIZE):
+        assert detector.check(1, 1, f"other {i}", 1000, 10, 2, now=0.0) is None
+    assert detector.check(1, 1, "same", 1000, 10, 2, now=0.0) is None
+
+
+def test_users_and_guilds_are_separate():
+    detector = FloodDetector()
+    for user_id in range(3):
+        assert detector.check(1, user_id, "hi", 1, 10, 2, now=0.0) is None
+    assert detector.check(2, 0, "hi", 1, 10, 2, now=0.0) is None
+
+
+def test_idle_and_excess_users_are_evicted():
+    detector = FloodDetector(idle_seconds=60, max_users=3)
+    for user_id in range(5):
+        detector.check(1, user_id, "", 5, 10, 0, now=0.0)
+    assert list(detector.states) == [(1, 2), (1, 3), (1, 4)]
+    detector.check(1, 3, "", 5, 10, 0, now=30.0)
+    detector.check(1, 9, "", 5, 10, 0, now=61.0)
+    assert list(detector.states) == [(1, 3), (1, 9)]
+    assert detector.stats()["evicted"] == 4
@@ -0,0 +1,66 @@
+import re
+from utils.automod import trie_pattern, compile_words, CompiledRuleSet, AutomodFilter
+
+
+def rule(kind, pattern, action="delete", guild_id=1):
+    return {"guild_id": guild_id, "kind": kind, "pattern": pattern, "action": action, "duration": None}
+
+
+def test_trie_pattern_matches_exactly_the_words():
+    words = ["bad", "bads", "badge", "bar", "b", "cat", "a.b"]
+    regex = re.compile("(?:" + trie_pattern(words) + ")$")
+    for word in words:
+        assert regex.match(word), word
+    for word in ["ba", "badg", "ca", "axb", "bat", ""]:
+        assert not regex.match(word), word
+
+
+def test_compile_words_is_whole_word_and_case_insensitive():
+    matcher = compile_words(["spam", "scam"])
+    assert matcher.search("this is SPAM")
+    assert matcher.search("scam!")
+    assert not matcher.search("spammer")
+    assert not matcher.search("antiscam")
+
+
+def test_compile_words_without_words():
+    assert compile_words([]) is None
+    assert compile_words([""]) is None
+
+
+def test_most_severe_rule_wins():
+    ruleset = CompiledRuleSet([rule("word", "foo"), rule("word", "bar", "mute"), rule("word", "baz", "warn")])
+    assert ruleset.check("foo baz")["pattern"] == "baz"
+    assert ruleset.check("foo bar baz")["action"] == "mute"
+    assert ruleset.check("nothing here") is None
+
+
+def test_link_rules_match_parent_domains():
+    ruleset = CompiledRuleSet([rule("link", "www.example.com", "warn")])
+    assert ruleset.check("see https://example.com/x")["action"] == "warn"
+    assert ruleset.check("see http://cdn.EXAMPLE.com./x")
+    assert ruleset.check("see https://user@example.com")
+    assert ruleset.check("see https://notexample.com") is None
+    assert ruleset.check("example.com without a scheme") is None
+
+
+def test_wildcard_link_rule_is_the_fallback():
+    ruleset = CompiledRuleSet([rule("link", "*"), rule("link", "evil.com", "mute")])
+    assert ruleset.check("https://anything.org")["action"] == "delete"
+    assert ruleset.check("https://a.evil.com/x")["action"] == "mute"
+
+
+def test_filter_recompiles_only_after_rules_change():
+    automod = AutomodFilter()
+    automod.load([rule("word", "foo"), rule("word", "bar", guild_id=2)])
+    assert automod.check(1, "foo")["pattern"] == "foo"
+    assert automod.check(1, "bar") is None
+    automod.check(1, "foo")
+    assert automod.compiles == 1
+    automod.set_rules(1, [rule("word", "bar")])
+    assert automod.check(1, "foo") is None
+    assert automod.check(1, "bar")
+    assert automod.compiles == 2
+    automod.set_rules(1, [])
+    assert automod.check(1, "bar") is None
+    assert automod.check(3, "foo") is None
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+import utils.autoroles as autoroles
+from utils.autoroles import AutoroleWorker
+
+
+class FakeMember:
+    def __init__(self, guild, user_id, delay):
+        self.guild = guild
+        self.id = user_id
+        self.roles = []
+        self.delay = delay
+
+    async def add_roles(self, *roles, reason=None):
+        await asyncio.sleep(self.delay)
+        self.roles.extend(roles)
+
+
+def make_guild(count, delay):
+    guild = SimpleNamespace(id=1, name="g", members={})
+    guild.get_member = guild.members.get
+    guild.get_role = lambda role_id: role_id
+    for user_id in range(count):
+        guild.members[user_id] = FakeMember(guild, user_id, delay)
+    return guild
+
+
+def test_close_persists_in_progress_and_queued_members_once(monkeypatch):
+    recorded = []
+
+    async def record_autorole_failures(bot, rows, timestamp):
+        recorded.extend(rows)
+
+    monkeypatch.setattr(autoroles, "record_autorole_failures", record_autorole_failures)
+    guild = make_guild(6, delay=0.2)
+
+    async def main():
+        worker = AutoroleWorker(SimpleNamespace(get_guild=lambda guild_id: guild), per_guild=2)
+        for member in guild.members.values():
+            worker.enqueue(member, [10])
+        await asyncio.sleep(0.05)   # two drains are now inside add_roles
+        await worker.close()
+        return worker
+
+    worker = asyncio.run(main())
+    assert sorted(user_id for _, user_id, _, _ in recorded) == list(range(6))
+    assert not worker.queues and not worker.workers
+
+
+def test_drain_assigns_everyone(monkeypatch):
+    guild = make_guild(5, delay=0)
+
+    async def main():
+        worker = AutoroleWorker(SimpleNamespace(get_guild=lambda guild_id: guild), per_guild=2)
+        for member in guild.members.values():
+            worker.enqueue(member, [10])
+        await asyncio.gather(*worker.workers[1])
+        return worker
+
+    worker = asyncio.run(main())
+    assert worker.assigned == 5
+    assert all(m.roles == [10] for m in guild.members.values())
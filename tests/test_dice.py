@@ -0,0 +1,89 @@
+import random
+import pytest
+from utils.dice import (parse, roll, simulate, summarize, format_histogram, DiceError,
+                        MAX_DICE, MAX_SIDES, MAX_TERMS, MAX_SIM_DICE)
+
+
+def test_parse_terms():
+    terms = parse("4d6kh3 - d% + 2")
+    assert [(t.sign, t.count, t.sides, t.keep, t.keep_n) for t in terms] == [
+        (1, 4, 6, "kh", 3), (-1, 1, 100, None, 0), (1, 2, 0, None, 0)]
+    assert parse("3D6!")[0].explode
+    assert parse("2d20k1")[0].keep == "kh"
+
+
+@pytest.mark.parametrize("expression", [
+    "", "   ", "2d6 3", "d", "0d6", "2d0", "2d6+", "2d6x", "1d1!", "3d6kh4", "3d6dl0", "+-2",
+    "40d6dl40", "40d6dh40", "1d20dl1",
+])
+def test_rejects_bad_expressions(expression):
+    with pytest.raises(DiceError):
+        parse(expression)
+
+
+def test_adjacent_terms_need_an_operator():
+    # Must not run together into 2d63
+    with pytest.raises(DiceError):
+        parse("2d6 3")
+    assert parse("2d63")[0].sides == 63
+
+
+def test_limits():
+    assert parse(f"{MAX_DICE}d6")
+    with pytest.raises(DiceError):
+        parse(f"{MAX_DICE + 1}d6")
+    with pytest.raises(DiceError):
+        parse(f"{MAX_DICE // 2}d6+{MAX_DICE // 2 + 1}d6")
+    assert parse(f"d{MAX_SIDES}")
+    with pytest.raises(DiceError):
+        parse(f"d{MAX_SIDES + 1}")
+    assert parse("+".join(["1"] * MAX_TERMS))
+    with pytest.raises(DiceError):
+        parse("+".join(["1"] * (MAX_TERMS + 1)))
+
+
+def test_keep_and_drop_bounds():
+    assert parse("40d6kh40")[0].keep_n == 40
+    assert parse("40d6dl39")[0].keep_n == 39
+    result = roll("40d6dh39", random.Random(19))
+    assert len(result.dice()) == 1
+    assert summarize(result.dice())["count"] == 1
+
+
+def test_roll_totals_and_keeps():
+    rng = random.Random(19)
+    for _ in range(200):
+        result = roll("4d6kh3+2", rng)
+        (term, kept, dropped), _ = result.parts
+        assert len(kept) == 3 and len(dropped) == 1
+        assert min(kept) >= max(dropped)
+        assert result.total == sum(kept) + 2
+        assert 5 <= result.total <= 20
+    result = roll("3d6dh1", rng)
+    kept, dropped = result.parts[0][1:]
+    assert max(kept) <= min(dropped)
+
+
+def test_exploding_dice_are_bounded():
+    # Every roll of a d2 that comes up 2 explodes; a long enough pool always runs past the budget
+    with pytest.raises(DiceError):
+        roll(f"{MAX_DICE}d2!", random.Random(1))
+    result = roll("20d6!", random.Random(1))
+    assert len(result.dice()) >= 20
+
+
+def test_simulate():
+    totals = simulate("2d6+1", 1000, random.Random(19))
+    assert len(totals) == 1000
+    assert min(totals) >= 3 and max(totals) <= 13
+    with pytest.raises(DiceError):
+        simulate("100d6", MAX_SIM_DICE // 100 + 1)
+
+
+def test_summarize_histogram():
+    summary = summarize([1, 2, 2, 3, 10], bins=5)
+    assert summary["min"] == 1 and summary["max"] == 10 and summary["count"] == 5
+    assert sum(c for _, _, c in summary["histogram"]) == 5
+    assert summary["histogram"][0] == (1, 2, 3)
+    assert format_histogram(summary["histogram"]).splitlines()[0].endswith(" 3")
+    assert summarize([7])["histogram"] == [(7, 7, 1)]
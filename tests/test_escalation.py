@@ -0,0 +1,72 @@
+from utils.escalation import EscalationEngine
+
+
+def rule(action, threshold, window, escalate_to="mute", guild_id=1):
+    return {"guild_id": guild_id, "action": action, "threshold": threshold, "window_seconds": window,
+            "escalate_to": escalate_to, "duration": None}
+
+
+def test_rule_fires_once_when_threshold_is_reached():
+    engine = EscalationEngine()
+    engine.set_rules(1, [rule("warn", 3, 60)])
+    assert engine.record(1, 5, "warn", 0) is None
+    assert engine.record(1, 5, "warn", 10) is None
+    assert engine.record(1, 5, "warn", 20)["threshold"] == 3
+    assert engine.record(1, 5, "warn", 30) is None
+    assert engine.triggered == 1
+
+
+def test_entries_expire_at_the_window_edge():
+    engine = EscalationEngine()
+    engine.set_rules(1, [rule("warn", 2, 60)])
+    assert engine.record(1, 5, "warn", 0) is None
+    # Exactly one window later the first warn no longer counts
+    assert engine.record(1, 5, "warn", 60) is None
+    assert engine.record(1, 5, "warn", 119)["threshold"] == 2
+
+
+def test_highest_threshold_wins_across_windows():
+    engine = EscalationEngine()
+    engine.set_rules(1, [rule("warn", 2, 60, "mute"), rule("warn", 4, 3600, "ban")])
+    fired = [engine.record(1, 5, "warn", t) for t in (0, 100, 200, 300)]
+    assert [r and r["escalate_to"] for r in fired] == [None, None, None, "ban"]
+    assert engine.record(1, 5, "warn", 310)["escalate_to"] == "mute"
+
+
+def test_untracked_actions_users_and_guilds():
+    engine = EscalationEngine()
+    engine.set_rules(1, [rule("warn", 1, 60)])
+    assert engine.record(1, 5, "kick", 0) is None
+    assert engine.record(2, 5, "warn", 0) is None
+    assert engine.record(1, 6, "warn", 0)
+    assert (1, 5, "kick") not in engine.counts and (2, 5, "warn") not in engine.counts
+
+
+def test_rule_change_then_rebuild():
+    engine = EscalationEngine()
+    engine.set_rules(1, [rule("warn", 3, 60)])
+    engine.set_rules(2, [rule("warn", 3, 60, guild_id=2)])
+    for t in (0, 10):
+        engine.record(1, 5, "warn", t)
+        engine.record(2, 5, "warn", t)
+    engine.set_rules(1, [rule("warn", 3, 600)])
+    assert (1, 5, "warn") not in engine.counts and (2, 5, "warn") in engine.counts
+    assert engine.guild_window(1) == 600
+    engine.rebuild(1, [{"user_id": 5, "action": "warn", "timestamp": t} for t in (0, 10)])
+    assert engine.record(1, 5, "warn", 300)["window_seconds"] == 600
+
+
+def test_load_reset_and_prune():
+    engine = EscalationEngine()
+    engine.load([rule("warn", 2, 60), rule("mute", 2, 600, "ban")],
+                [{"guild_id": 1, "user_id": 5, "action": "warn", "timestamp": 0},
+                 {"guild_id": 1, "user_id": 6, "action": "mute", "timestamp": 0}])
+    assert engine.loaded and engine.max_window() == 600
+    engine.reset(1, 5)
+    assert engine.record(1, 5, "warn", 10) is None
+    engine.prune(50)
+    assert list(engine.counts) == [(1, 6, "mute"), (1, 5, "warn")]
+    engine.prune(100)
+    assert list(engine.counts) == [(1, 6, "mute")]
+    engine.prune(700)
+    assert not engine.counts
@@ -0,0 +1,89 @@
+import random
+from array import array
+from utils.idset import CompactIdSet
+
+
+def test_matches_a_plain_set():
+    rng = random.Random(18)
+    ids = CompactIdSet(merge_at=64)
+    expected = set()
+    for _ in range(5000):
+        value = rng.randrange(1, 500)
+        if rng.random() < 0.7:
+            assert ids.add(value) == (value not in expected)
+            expected.add(value)
+        else:
+            assert ids.discard(value) == (value in expected)
+            expected.discard(value)
+        assert len(ids) == len(expected)
+    assert all(v in ids for v in expected)
+    assert not any(v in ids for v in range(500) if v not in expected)
+    assert list(ids) == sorted(expected)
+
+
+def test_pending_ids_merge_at_threshold():
+    ids = CompactIdSet([5, 1, 3, 3], merge_at=3)
+    assert list(ids.ids) == [1, 3, 5]
+    ids.add(4)
+    ids.add(2)
+    assert ids.pending == {2, 4}
+    ids.add(0)
+    assert not ids.pending
+    assert list(ids.ids) == [0, 1, 2, 3, 4, 5]
+
+
+def test_update_skips_present_ids():
+    ids = CompactIdSet([1, 2])
+    ids.update([2, 3, 3, 4])
+    assert len(ids) == 4
+    assert ids[0] == 1 and ids[-1] == 4
+
+
+def test_full_snowflake_range():
+    big = 2 ** 64 - 1
+    ids = CompactIdSet([big, 0])
+    assert big in ids and 0 in ids
+    assert big - 1 not in ids
+    assert ids.nbytes() == 16
+
+
+def test_from_sorted_wraps_without_copying():
+    source = array("Q", [1, 2, 3])
+    ids = CompactIdSet.from_sorted(source)
+    assert ids.ids is source
+    assert 2 in ids and 4 not in ids
+
+
+def test_removals_never_change_the_array_in_place():
+    ids = CompactIdSet(range(10), merge_at=3)
+    snapshot = ids.ids
+    assert ids.discard(4) and ids.discard(7)
+    assert not ids.discard(4) and 4 not in ids
+    assert len(ids) == 8
+    ids.discard(0)   # third change reaches merge_at
+    assert list(snapshot) == list(range(10))
+    assert list(ids.ids) == [1, 2, 3, 5, 6, 8, 9]
+
+
+def test_removed_ids_can_come_back():
+    ids = CompactIdSet([1, 2, 3])
+    ids.discard(2)
+    assert ids.add(2) and 2 in ids and not ids.removed
+    ids.discard(3)
+    ids.update([3, 4])
+    assert list(ids) == [1, 2, 3, 4]
+
+
+def test_compact_merges_adds_and_removals_in_one_pass():
+    rng = random.Random(24)
+    start = sorted(rng.sample(range(10_000), 2000))
+    ids = CompactIdSet(start, merge_at=10**9)
+    expected = set(start)
+    for value in rng.sample(start, 500):
+        ids.discard(value)
+        expected.discard(value)
+    for value in rng.sample(range(10_000, 20_000), 500):
+        ids.add(value)
+        expected.add(value)
+    ids.compact()
+    assert list(ids.ids) == sorted(expected)
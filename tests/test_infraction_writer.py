@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager
+import asyncpg
+from db.infraction_writer import InfractionWriter
+
+
+class FakeConnection:
+    def __init__(self, delay=0.0, bad_user=None):
+        self.delay = delay
+        self.bad_user = bad_user
+        self.rows = []
+
+    async def copy_records_to_table(self, table, records, columns):
+        await asyncio.sleep(self.delay)
+        if any(r[1] == self.bad_user for r in records):
+            raise asyncpg.DataError("bad row")
+        self.rows.extend(records)
+
+    async def execute(self, query, *record):
+        if record[1] == self.bad_user:
+            raise asyncpg.DataError("bad row")
+        self.rows.append(record)
+
+
+class FakeDatabase:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def record(user_id):
+    return (1, user_id, 2, "warn", "reason", 0)
+
+
+def test_close_during_a_slow_copy_keeps_every_record():
+    async def main():
+        conn = FakeConnection(delay=0.2)
+        writer = InfractionWriter(FakeDatabase(conn), flush_interval=0.05)
+        writer.start()
+        writer.add_many([record(i) for i in range(5)])
+        await asyncio.sleep(0.1)   # the periodic flush is now inside COPY
+        assert writer.in_flight
+        await writer.close()
+        return conn, writer
+
+    conn, writer = asyncio.run(main())
+    assert len(conn.rows) == 5
+    assert writer.stats()["written"] == 5 and writer.stats()["pending"] == 0
+
+
+def test_cancelled_flush_requeues_the_batch():
+    async def main():
+        writer = InfractionWriter(FakeDatabase(FakeConnection(delay=1)))
+        writer.add_many([record(i) for i in range(3)])
+        task = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return writer
+
+    writer = asyncio.run(main())
+    assert writer.buffer == [record(i) for i in range(3)]
+    assert not writer.in_flight
+
+
+def test_bad_row_is_dead_lettered_and_the_rest_written():
+    async def main():
+        conn = FakeConnection(bad_user=1)
+        writer = InfractionWriter(FakeDatabase(conn))
+        writer.add_many([record(i) for i in range(3)])
+        assert await writer.flush() == 2
+        return conn, writer
+
+    conn, writer = asyncio.run(main())
+    assert [r[1] for r in conn.rows] == [0, 2]
+    assert writer.rejected == 1 and writer.dead_letters[0][0] == record(1)
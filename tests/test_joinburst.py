@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+from utils.joinburst import BurstQueue
+
+WINDOW = 0.1
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_passes_through_below_threshold():
+    async def main():
+        queue = BurstQueue(on_batch=None)
+        guild = SimpleNamespace(id=1, name="g")
+        assert all(queue.submit(guild, i, 3, WINDOW) for i in range(3))
+        await asyncio.sleep(WINDOW * 1.5)
+        assert all(queue.submit(guild, i, 3, WINDOW) for i in range(3))
+        assert queue.stats() == {"batching": 0, "passed": 6, "batched": 0, "flushes": 0}
+    run(main())
+
+
+def test_batches_above_threshold_until_a_quiet_window():
+    async def main():
+        batches = []
+
+        async def on_batch(guild, items):
+            batches.append((guild.id, items))
+
+        queue = BurstQueue(on_batch)
+        guild = SimpleNamespace(id=1, name="g")
+        other = SimpleNamespace(id=2, name="h")
+        handled = [queue.submit(guild, i, 2, WINDOW) for i in range(5)]
+        assert handled == [True, True, False, False, False]
+        assert queue.submit(other, "x", 2, WINDOW)
+
+        await asyncio.sleep(WINDOW * 1.5)
+        assert batches == [(1, [2, 3, 4])]
+        # Still in batch mode for the next window
+        assert not queue.submit(guild, 5, 2, WINDOW)
+        await asyncio.sleep(WINDOW)
+        assert batches == [(1, [2, 3, 4]), (1, [5])]
+
+        await asyncio.sleep(WINDOW * 1.5)
+        assert not queue.tasks and not queue.batches
+        assert queue.stats()["flushes"] == 2
+    run(main())
+
+
+def test_failed_batch_does_not_stop_the_queue():
+    async def main():
+        calls = []
+
+        async def on_batch(guild, items):
+            calls.append(items)
+            raise RuntimeError("boom")
+
+        queue = BurstQueue(on_batch)
+        guild = SimpleNamespace(id=1, name="g")
+        for i in range(3):
+            queue.submit(guild, i, 1, WINDOW)
+        await asyncio.sleep(WINDOW * 1.5)
+        queue.submit(guild, 3, 1, WINDOW)
+        await asyncio.sleep(WINDOW)
+        assert calls == [[1, 2], [3]]
+        await asyncio.sleep(WINDOW * 1.5)
+        assert not queue.tasks
+    run(main())
@@ -0,0 +1,122 @@
+import asyncio
+import random
+from array import array
+import utils.sharedbans as sharedbans
+from utils.idset import CompactIdSet
+from utils.sharedbans import BloomFilter, SharedBanList, MIN_BLOOM_BITS
+
+
+def snowflakes(count, seed):
+    rng = random.Random(seed)
+    return [rng.getrandbits(63) for _ in range(count)]
+
+
+def test_bloom_has_no_false_negatives():
+    ids = snowflakes(50_000, 1)
+    bloom = BloomFilter(len(ids))
+    for user_id in ids:
+        bloom.add(user_id)
+    assert all(user_id in bloom for user_id in ids)
+
+
+def test_bloom_false_positive_rate_at_capacity():
+    ids = snowflakes(50_000, 2)
+    bloom = BloomFilter(len(ids))
+    for user_id in ids:
+        bloom.add(user_id)
+    listed = set(ids)
+    probes = [p for p in snowflakes(200_000, 3) if p not in listed]
+    rate = sum(p in bloom for p in probes) / len(probes)
+    # ~1.4% expected at 16 bits per id; rounding the size up only lowers it
+    assert rate < 0.03
+
+
+def test_bloom_handles_sequential_ids():
+    start = 1_200_000_000_000_000_000
+    bloom = BloomFilter(10_000)
+    for user_id in range(start, start + 10_000):
+        bloom.add(user_id)
+    probes = range(start + 10_000, start + 110_000)
+    assert sum(p in bloom for p in probes) / len(probes) < 0.03
+
+
+def test_bloom_size():
+    assert len(BloomFilter(1).bits) * 8 == MIN_BLOOM_BITS
+    bits = len(BloomFilter(1_000_000).bits) * 8
+    assert bits >= 16_000_000 and bits & (bits - 1) == 0
+
+
+def banlist_with(ids):
+    banlist = SharedBanList()
+    banlist.ids = CompactIdSet.from_sorted(array("Q", sorted(ids)))
+    asyncio.run(banlist.rebuild_bloom())
+    return banlist
+
+
+def test_lookups_are_exact_despite_false_positives():
+    ids = snowflakes(20_000, 4)
+    banlist = banlist_with(ids)
+    listed = set(ids)
+    probes = [p for p in snowflakes(100_000, 5) if p not in listed]
+    # Some probes pass the filter; the exact check must still reject every one
+    assert any(p in banlist.bloom for p in probes)
+    assert not any(p in banlist for p in probes)
+    assert all(user_id in banlist for user_id in ids)
+
+
+def test_lookups_without_a_filter():
+    banlist = SharedBanList()
+    banlist.ids.add(42)
+    assert 42 in banlist and 43 not in banlist
+
+
+def test_sync_applies_changes(monkeypatch):
+    changes = []
+
+    async def get_shared_ban_changes(bot, since):
+        rows, changes[:] = list(changes), []
+        return since + 1, rows
+
+    monkeypatch.setattr(sharedbans, "get_shared_ban_changes", get_shared_ban_changes)
+    banlist = banlist_with([1, 2, 3])
+
+    async def main():
+        changes.extend([{"user_id": 9, "removed": False, "version": 4},
+                        {"user_id": 2, "removed": True, "version": 5},
+                        {"user_id": 3, "removed": False, "version": 3},
+                        {"user_id": 7, "removed": True, "version": 2}])
+        assert await banlist.sync(None) == 2
+        assert banlist.version == 5 and banlist.cursor == 1
+        assert 9 in banlist and 2 not in banlist and 1 in banlist
+        # Re-reading rows that were already applied changes nothing
+        changes.extend([{"user_id": 9, "removed": False, "version": 4},
+                        {"user_id": 2, "removed": True, "version": 5}])
+        assert await banlist.sync(None) == 0
+        assert len(banlist) == 3
+    asyncio.run(main())
+
+
+def test_filter_rebuilt_during_a_sync_misses_nothing(monkeypatch):
+    ids = snowflakes(300_000, 6)
+    removed, added = ids[:5000], snowflakes(5000, 7)
+    rows = ([{"user_id": u, "removed": True, "version": 1} for u in removed]
+            + [{"user_id": u, "removed": False, "version": 2} for u in added])
+
+    async def get_shared_ban_changes(bot, since):
+        return since, rows
+
+    monkeypatch.setattr(sharedbans, "get_shared_ban_changes", get_shared_ban_changes)
+    banlist = SharedBanList()
+    banlist.ids = CompactIdSet.from_sorted(array("Q", sorted(ids)))
+
+    async def main():
+        build = asyncio.create_task(banlist.rebuild_bloom())
+        await asyncio.sleep(0)   # the filter is now being built in a thread
+        assert banlist._building is not None
+        await banlist.sync(None)
+        await build
+
+    asyncio.run(main())
+    assert banlist.bloom is not None
+    assert all(u in banlist for u in ids[5000:] + added)
+    assert not any(u in banlist for u in removed)
@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import utils.templates as templates
+from utils.templates import (compile_template, check_template, member_list, TemplateCache, TemplateError,
+                             DEFAULT_TEMPLATES, EXCLAMATION, EMBED_DESCRIPTION_LIMIT)
+
+VALUES = {"member": "<@1>", "member_name": "bob", "guild": "Guild", "count": 5, "time": "<t:0:t>", "greeting": "Hi"}
+CHANNELS = {"rules_channel": 11, "role_channel": None, "introduction_channel": 33}
+
+
+def member(user_id, name="m"):
+    return SimpleNamespace(id=user_id, name=name, mention=f"<@{user_id}>")
+
+
+def test_literal_braces_survive_compilation():
+    render = compile_template("{{literal}} {member} }}{{", {})
+    assert render(VALUES) == "{literal} <@1> }{"
+
+
+def test_dynamic_values_are_not_formatted_again():
+    render = compile_template("{guild} / {member_name}", {})
+    assert render({**VALUES, "guild": "{member} {0} {{x}}", "member_name": "{count}"}) == "{member} {0} {{x}} / {count}"
+
+
+def test_channel_placeholders():
+    render = compile_template("{rules} {roles} {intro} {roles_line}", CHANNELS)
+    assert render(VALUES) == (f"<#11> the roles channel <#33> "
+                              f"{EXCLAMATION} Get yourself a role in the roles channel.")
+
+
+@pytest.mark.parametrize("source", ["{nope}", "{member!r}", "{member:>10}", "{0}", "{", "}", "{member"])
+def test_rejects_bad_templates(source):
+    with pytest.raises(TemplateError):
+        compile_template(source, {})
+
+
+def test_default_welcome_keeps_the_original_wording():
+    text = compile_template(DEFAULT_TEMPLATES["welcome"], CHANNELS)(VALUES)
+    assert text == (
+        "Hi\n\n`Welcome to Guild`\n\n"
+        f"{EXCLAMATION} Read the rules in <#11>\n\n"
+        f"{EXCLAMATION} Get yourself a role in the roles channel.\n\n"
+        f"{EXCLAMATION} Introduce yourself in <#33>\n\n"
+        "**Start having fun!** 🎉\n\n"
+        "Enjoy your stay! If you have any questions, feel free to ask. | Today at <t:0:t>"
+    )
+
+
+def test_member_list():
+    assert member_list([member(1)]) == "<@1>"
+    assert member_list([member(1), member(2), member(3)]) == "<@1>, <@2> and <@3>"
+    assert member_list([member(i) for i in range(4)], limit=2) == "<@0>, <@1> and 2 others"
+    assert member_list([member(i) for i in range(3)], limit=2) == "<@0>, <@1> and 1 other"
+    assert member_list([member(1, "ann")], mention=False) == "**ann**"
+
+
+def test_check_template_bounds_the_largest_batch():
+    check_template(DEFAULT_TEMPLATES["welcome"])
+    check_template(DEFAULT_TEMPLATES["goodbye"])
+    check_template("{member} " * 5)
+    with pytest.raises(TemplateError):
+        check_template("{member} " * 100)
+    with pytest.raises(TemplateError):
+        check_template("{unknown}")
+
+
+def test_cache_rebuilds_when_source_or_channels_change():
+    cache = TemplateCache()
+    config = {"rules_channel": 1}
+    first = cache.get(1, "welcome", "{rules}", config)
+    assert cache.get(1, "welcome", "{rules}", dict(config)) is first
+    assert cache.get(1, "welcome", "{rules}", {"rules_channel": 2})(VALUES) == "<#2>"
+    assert cache.get(1, "welcome", "{guild}", {"rules_channel": 2})(VALUES) == "Guild"
+    assert cache.builds == 3
+
+
+def test_render_is_capped_at_the_embed_limit(monkeypatch):
+    async def get_guild_config(bot, guild_id):
+        return {}
+
+    async def get_welcome_template(bot, guild_id, kind):
+        return "{guild}" * 100
+
+    monkeypatch.setattr(templates, "get_guild_config", get_guild_config)
+    monkeypatch.setattr(templates, "get_welcome_template", get_welcome_template)
+    bot = SimpleNamespace(template_cache=None)
+    guild = SimpleNamespace(id=1, name="x" * 100, member_count=5)
+    text = asyncio.run(templates.render_template(bot, guild, "welcome", [member(1)]))
+    assert len(text) == EMBED_DESCRIPTION_LIMIT
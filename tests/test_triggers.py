@@ -0,0 +1,38 @@
+import pytest
+from utils.triggers import TriggerIndex, validate_regex
+
+
+def trigger(trigger_id, kind, pattern):
+    return {"id": trigger_id, "guild_id": 1, "kind": kind, "pattern": pattern}
+
+
+@pytest.mark.parametrize("pattern", [r"\bfree nitro\b", r"\w{1,30}@\w{1,30}", r"disc[o0]rd\.gift", r"(foo|bar)"])
+def test_accepts_bounded_patterns(pattern):
+    assert validate_regex(pattern) is None
+
+
+@pytest.mark.parametrize("pattern", [
+    r"(a+)+$", r"(\w*)*x", r"(foo|bar)+", r"(a)\1", r"a{1000}", r".*a.*b.*c.*d", r"x*", r"(", r"a{2,1}",
+])
+def test_rejects_unsafe_patterns(pattern):
+    assert validate_regex(pattern)
+
+
+def test_every_matching_trigger_fires_once():
+    index = TriggerIndex([
+        trigger(1, "regex", r"free\s{1,3}nitro"),
+        trigger(2, "regex", r"nitro"),
+        trigger(3, "keyword", "Nitro"),
+        trigger(4, "user", "10"),
+        trigger(5, "role", "20"),
+        trigger(6, "keyword", "gift"),
+    ])
+    found = index.match("FREE  NITRO here", user_ids=[10, 10], role_ids=[20])
+    assert sorted(t["id"] for t in found) == [1, 2, 3, 4, 5]
+    assert index.match("") == []
+
+
+def test_stored_unsafe_patterns_load_disabled():
+    index = TriggerIndex([trigger(1, "regex", r"(a+)+$"), trigger(2, "regex", "ab")])
+    assert [t["id"] for t in index.disabled] == [1]
+    assert [t["id"] for t in index.match("aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaab")] == [2]
@@ -0,0 +1,134 @@
+# /utils/autoroles.py
+import time
+import asyncio
+from collections import deque
+from utils.concurrency import with_backoff
+from db.database import record_autorole_failures, clear_autorole_failures, get_autorole_failures
+
+MAX_FAILURE_ATTEMPTS = 5
+
+
+class AutoroleWorker:
+    """Assigns autoroles from per-guild background queues instead of inside on_member_join.
+
+    Each guild gets at most `per_guild` concurrent add_roles calls, retried with backoff on
+    429/5xx. Assignments that still fail are written to autorole_failures and retried every
+    `retry_interval` seconds until they succeed or hit MAX_FAILURE_ATTEMPTS.
+    """
+
+    def __init__(self, bot, per_guild=2, retries=4, retry_interval=600):
+        self.bot = bot
+        self.per_guild = per_guild
+        self.retries = retries
+        self.retry_interval = retry_interval
+        self.queues = {}     # guild_id -> deque of (user_id, role_ids)
+        self.workers = {}    # guild_id -> set of running drain tasks
+        self.failed = set()  # (guild_id, user_id) with a row in autorole_failures
+        self.assigned = 0
+        self.failures = 0
+        self._retry_task = None
+
+    async def start(self):
+        """Queues persisted failures for retry and starts the periodic retry loop."""
+        count = await self.retry_failures()
+        if self._retry_task is None:
+            self._retry_task = asyncio.create_task(self._retry_loop())
+        return count
+
+    async def close(self):
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            self._retry_task = None
+        # Stop the drains before reading the queues; a cancelled drain puts its member back
+        workers = [task for tasks in self.workers.values() for task in tasks]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.workers.clear()
+        # Whatever is still queued is persisted so the next start picks it up
+        rows = [(guild_id, user_id, role_ids, "Interrupted by shutdown")
+                for guild_id, queue in self.queues.items() for user_id, role_ids in queue]
+        self.queues.clear()
+        if rows:
+            await self.record_failures(rows)
+
+    def enqueue(self, member, role_ids):
+        if not role_ids:
+            return
+        guild_id = member.guild.id
+        self.queues.setdefault(guild_id, deque()).append((member.id, list(role_ids)))
+        workers = self.workers.setdefault(guild_id, set())
+        workers -= {t for t in workers if t.done()}
+        if len(workers) < self.per_guild:
+            workers.add(asyncio.create_task(self._drain(guild_id)))
+
+    async def _drain(self, guild_id):
+        queue = self.queues.get(guild_id)
+        while queue:
+            user_id, role_ids = queue.popleft()
+            guild = self.bot.get_guild(guild_id)
+            member = guild.get_member(user_id) if guild else None
+            if member is None:
+                continue
+            try:
+                await self.assign(member, role_ids)
+            except asyncio.CancelledError:
+                queue.appendleft((user_id, role_ids))
+                raise
+            except Exception as e:
+                # Anything, including a DB error while clearing a failure, must not end the drain
+                self.failures += 1
+                print(f"⚠️ Could not assign autoroles to {member} in {guild.name}: {e}")
+                await self.record_failures([(guild_id, user_id, role_ids, str(e))])
+
+    async def assign(self, member, role_ids):
+        """Adds whichever of `role_ids` the member is missing; raises after retries run out."""
+        roles = [member.guild.get_role(rid) for rid in role_ids]
+        roles = [r for r in roles if r is not None and r not in member.roles]
+        if roles:
+            await with_backoff(member.add_roles, *roles, reason="Autorole", retries=self.retries)
+            self.assigned += 1
+        key = (member.guild.id, member.id)
+        if key in self.failed:
+            self.failed.discard(key)
+            await clear_autorole_failures(self.bot, [key])
+
+    async def record_failures(self, rows):
+        """Persists (guild_id, user_id, role_ids, error) rows for the retry loop."""
+        try:
+            await record_autorole_failures(self.bot, rows, int(time.time()))
+            self.failed.update((guild_id, user_id) for guild_id, user_id, _, _ in rows)
+        except Exception as e:
+            print(f"⚠️ Could not save {len(rows)} autorole failures: {e}")
+
+    async def retry_failures(self):
+        rows = await get_autorole_failures(self.bot, MAX_FAILURE_ATTEMPTS)
+        gone = []
+        for row in rows:
+            self.failed.add((row["guild_id"], row["user_id"]))
+            guild = self.bot.get_guild(row["guild_id"])
+            member = guild.get_member(row["user_id"]) if guild else None
+            if member is None:
+                gone.append((row["guild_id"], row["user_id"]))
+                continue
+            self.enqueue(member, row["role_ids"])
+        if gone:
+            self.failed.difference_update(gone)
+            await clear_autorole_failures(self.bot, gone)
+        return len(rows) - len(gone)
+
+    async def _retry_loop(self):
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            try:
+                await self.retry_failures()
+            except Exception as e:
+                print(f"⚠️ Autorole retry failed: {e}")
+
+    def stats(self):
+        return {
+            "queued": sum(len(q) for q in self.queues.values()),
+            "assigned": self.assigned,
+            "failures": self.failures,
+            "pending_retry": len(self.failed),
+        }
@@ -0,0 +1,56 @@
+# /utils/concurrency.py
+import time
+import asyncio
+import discord
+
+# Discord responses worth retrying: rate limited or a server-side hiccup
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def with_backoff(func, *args, retries=3, base_delay=1.0, **kwargs):
+    """Awaits func(*args, **kwargs), retrying 429/5xx responses with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return await func(*args, **kwargs)
+        except discord.HTTPException as e:
+            if e.status not in RETRYABLE_STATUSES or attempt == retries:
+                raise
+            retry_after = None
+            if e.response is not None:
+                retry_after = e.response.headers.get("Retry-After")
+            await asyncio.sleep(float(retry_after) if retry_after else base_delay * 2 ** attempt)
+
+
+async def run_bounded(items, worker, limit=5, on_progress=None, progress_interval=5.0):
+    """Runs `await worker(item)` for every item with at most `limit` in flight.
+
+    Returns a list of (item, error) for the items that failed. `on_progress(done, total)`
+    is awaited at most every `progress_interval` seconds while work is running.
+    """
+    items = list(items)
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    failures = []
+    done = 0
+    last_progress = time.monotonic()
+
+    async def run_worker():
+        nonlocal done, last_progress
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await worker(item)
+            except Exception as e:
+                failures.append((item, e))
+            done += 1
+            if on_progress and time.monotonic() - last_progress >= progress_interval:
+                last_progress = time.monotonic()
+                await on_progress(done, len(items))
+
+    await asyncio.gather(*(run_worker() for _ in range(min(limit, len(items)))))
+    return failures
@@ -0,0 +1,201 @@
+# /utils/dice.py
+import re
+import time
+import random
+from functools import lru_cache
+
+MAX_DICE = 10_000          # dice rolled by one expression, explosions included
+MAX_SIDES = 1_000_000
+MAX_TERMS = 20
+MAX_EXPLOSION_ROUNDS = 100
+MAX_SIM_DICE = 2_000_000   # dice rolled across all runs of a stats simulation
+TIME_LIMIT = 0.5           # seconds
+
+TERM_PATTERN = re.compile(r"\s*([+-])?\s*(?:(\d*)d(\d+|%)(!)?(?:(kh|kl|dh|dl|k)(\d+))?|(\d+))", re.IGNORECASE)
+
+
+class DiceError(ValueError):
+    pass
+
+
+class DiceTerm:
+    __slots__ = ("sign", "count", "sides", "explode", "keep", "keep_n", "text")
+
+    def __init__(self, sign, count, sides, explode=False, keep=None, keep_n=0, text=""):
+        self.sign = sign
+        self.count = count
+        self.sides = sides
+        self.explode = explode
+        self.keep = keep
+        self.keep_n = keep_n
+        self.text = text
+
+
+@lru_cache(maxsize=512)
+def parse(expression):
+    """Parses e.g. `8d6+4`, `4d6kh3`, `3d6!` or `d20` into a tuple of terms.
+
+    Constants are DiceTerms with sides=0. Results are cached, so repeated rolls of the
+    same expression skip the regex work.
+    """
+    expression = expression.strip().lower()
+    if not expression:
+        raise DiceError("empty expression")
+    terms = []
+    pos = 0
+    while pos < len(expression):
+        match = TERM_PATTERN.match(expression, pos)
+        if not match or (pos > 0 and not match.group(1)):
+            raise DiceError(f"can't read `{expression[pos:pos + 10]}`")
+        sign = -1 if match.group(1) == "-" else 1
+        if match.group(7) is not None:
+            terms.append(DiceTerm(sign, int(match.group(7)), 0, text=match.group(7)))
+        else:
+            count = int(match.group(2) or 1)
+            sides = 100 if match.group(3) == "%" else int(match.group(3))
+            keep, keep_n = match.group(5), int(match.group(6) or 0)
+            if keep == "k":
+                keep = "kh"
+            if count < 1 or sides < 1:
+                raise DiceError("dice need at least one die and one side")
+            if sides > MAX_SIDES:
+                raise DiceError(f"dice can have at most {MAX_SIDES:,} sides")
+            if match.group(4) and sides == 1:
+                raise DiceError("a one-sided die can't explode")
+            # Keeping all dice is a no-op, but dropping all of them would leave nothing to total
+            if keep and not 0 < keep_n <= (count if keep in ("kh", "kl") else count - 1):
+                raise DiceError(f"can't keep or drop {keep_n} of {count} dice")
+            text = match.group(0).strip().lstrip("+-").strip()
+            terms.append(DiceTerm(sign, count, sides, bool(match.group(4)), keep, keep_n, text))
+        pos = match.end()
+        if len(terms) > MAX_TERMS:
+            raise DiceError(f"at most {MAX_TERMS} terms")
+    if sum(t.count for t in terms if t.sides) > MAX_DICE:
+        raise DiceError(f"at most {MAX_DICE:,} dice per roll")
+    return tuple(terms)
+
+
+class RollResult:
+    def __init__(self):
+        self.total = 0
+        self.parts = []   # (term, kept dice, dropped dice)
+
+    def dice(self):
+        return [value for _, kept, _ in self.parts for value in kept]
+
+
+def roll_dice(count, sides, rng=random):
+    # One choices() call per pool instead of a randint() call per die
+    return rng.choices(range(1, sides + 1), k=count)
+
+
+def roll_term(term, budget, deadline, rng=random):
+    """Rolls one dice term; returns (kept, dropped, dice used)."""
+    rolls = roll_dice(term.count, term.sides, rng)
+    used = term.count
+    if term.explode:
+        extra = rolls.count(term.sides)
+        rounds = 0
+        while extra:
+            rounds += 1
+            used += extra
+            if used > budget or rounds > MAX_EXPLOSION_ROUNDS:
+                raise DiceError("too many exploding dice")
+            new = roll_dice(extra, term.sides, rng)
+            rolls.extend(new)
+            extra = new.count(term.sides)
+    if time.perf_counter() > deadline:
+        raise DiceError("roll took too long")
+
+    if not term.keep:
+        return rolls, [], used
+    # kh/dl keep from the top, kl/dh from the bottom
+    ordered = sorted(rolls, reverse=term.keep in ("kh", "dl"))
+    keep_count = term.keep_n if term.keep in ("kh", "kl") else len(rolls) - term.keep_n
+    return ordered[:keep_count], ordered[keep_count:], used
+
+
+def roll(expression, rng=random):
+    terms = parse(expression)
+    deadline = time.perf_counter() + TIME_LIMIT
+    result = RollResult()
+    budget = MAX_DICE
+    for term in terms:
+        if not term.sides:
+            result.total += term.sign * term.count
+            result.parts.append((term, [term.count], []))
+            continue
+        kept, dropped, used = roll_term(term, budget, deadline, rng)
+        budget -= used
+        result.total += term.sign * sum(kept)
+        result.parts.append((term, kept, dropped))
+    return result
+
+
+def simulate(expression, runs, rng=random):
+    """Rolls `expression` `runs` times and returns the list of totals."""
+    terms = parse(expression)
+    per_run = sum(t.count for t in terms if t.sides)
+    if per_run * runs > MAX_SIM_DICE:
+        raise DiceError(f"at most {MAX_SIM_DICE:,} dice across all runs")
+    deadline = time.perf_counter() + TIME_LIMIT * 4
+    constant = sum(t.sign * t.count for t in terms if not t.sides)
+    totals = [constant] * runs
+    for term in terms:
+        if not term.sides:
+            continue
+        if not term.explode and not term.keep:
+            # Plain pools: roll every run's dice in one batch and sum slices
+            pool = roll_dice(term.count * runs, term.sides, rng)
+            for i in range(runs):
+                totals[i] += term.sign * sum(pool[i * term.count:(i + 1) * term.count])
+            if time.perf_counter() > deadline:
+                raise DiceError("simulation took too long")
+            continue
+        for i in range(runs):
+            kept, _, _ = roll_term(term, MAX_DICE, deadline, rng)
+            totals[i] += term.sign * sum(kept)
+    return totals
+
+
+def summarize(values, bins=10):
+    """min/max/mean plus a histogram of (low, high, count) buckets."""
+    low, high = min(values), max(values)
+    mean = sum(values) / len(values)
+    span = high - low + 1
+    width = -(-span // min(bins, span))
+    bins = -(-span // width)
+    counts = [0] * bins
+    for value in values:
+        counts[(value - low) // width] += 1
+    buckets = [(low + i * width, min(high, low + (i + 1) * width - 1), c) for i, c in enumerate(counts)]
+    return {"min": low, "max": high, "mean": mean, "count": len(values), "histogram": buckets}
+
+
+def format_histogram(buckets, bar_width=20):
+    peak = max(c for _, _, c in buckets) or 1
+    label_width = max(len(f"{lo}-{hi}" if lo != hi else str(lo)) for lo, hi, _ in buckets)
+    lines = []
+    for lo, hi, count in buckets:
+        label = f"{lo}-{hi}" if lo != hi else str(lo)
+        lines.append(f"{label:>{label_width}} {'█' * round(count / peak * bar_width):<{bar_width}} {count}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Microbenchmark: python -m utils.dice
+    def bench(label, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<34} {elapsed / repeat * 1000:8.3f} ms")
+
+    bench("1000d20 roll()", lambda: roll("1000d20"), 200)
+    bench("1000d20 per-die randint loop", lambda: sum(random.randint(1, 20) for _ in range(1000)), 200)
+    bench("10000d6 roll()", lambda: roll("10000d6"), 50)
+    bench("10000d6 per-die randint loop", lambda: sum(random.randint(1, 6) for _ in range(10000)), 50)
+    bench("4d6kh3 roll()", lambda: roll("4d6kh3"), 10000)
+    bench("8d6+4 simulate 10k runs", lambda: simulate("8d6+4", 10000), 5)
+    bench("4d6kh3 simulate 10k runs", lambda: simulate("4d6kh3", 10000), 5)
+    bench("summarize 100k values", lambda: summarize(simulate("3d6", 100000)), 2)
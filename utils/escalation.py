@@ -0,0 +1,101 @@
+# /utils/escalation.py
+from collections import deque
+
+
+class EscalationEngine:
+    """Rolling per-(guild, user, action) infraction counts checked against escalation rules.
+
+    Counts are kept as one timestamp deque per distinct rule window, so each recorded
+    action costs an append plus trimming expired entries, and every threshold check is
+    a len() call. Only actions that some rule counts are tracked.
+    """
+
+    def __init__(self):
+        self.rules = {}      # (guild_id, action) -> rules sorted by threshold, highest first
+        self.windows = {}    # (guild_id, action) -> distinct window lengths
+        self.counts = {}     # (guild_id, user_id, action) -> {window: deque of timestamps}
+        self.loaded = False
+        self.triggered = 0
+        self._records = 0
+
+    def set_rules(self, guild_id, rules):
+        for key in [k for k in self.rules if k[0] == guild_id]:
+            del self.rules[key]
+            del self.windows[key]
+        for rule in rules:
+            self.rules.setdefault((guild_id, rule["action"]), []).append(rule)
+        for key, guild_rules in self.rules.items():
+            if key[0] == guild_id:
+                guild_rules.sort(key=lambda r: r["threshold"], reverse=True)
+                self.windows[key] = sorted({r["window_seconds"] for r in guild_rules})
+        # Counts kept for old windows would not match the new rules; rebuild() refills them
+        for key in [k for k in self.counts if k[0] == guild_id]:
+            if set(self.counts[key]) != set(self.windows.get((guild_id, key[2]), ())):
+                del self.counts[key]
+
+    def guild_window(self, guild_id):
+        return max((w[-1] for k, w in self.windows.items() if k[0] == guild_id), default=0)
+
+    def rebuild(self, guild_id, history):
+        """Recounts one guild from (guild_id, user_id, action, timestamp) rows, e.g. after its rules changed."""
+        for key in [k for k in self.counts if k[0] == guild_id]:
+            del self.counts[key]
+        for row in history:
+            self._add(guild_id, row["user_id"], row["action"], row["timestamp"])
+
+    def load(self, rules, history):
+        """Replaces all rules and rebuilds counts from (guild_id, user_id, action, timestamp) rows."""
+        by_guild = {}
+        for rule in rules:
+            by_guild.setdefault(rule["guild_id"], []).append(rule)
+        self.rules.clear()
+        self.windows.clear()
+        self.counts.clear()
+        for guild_id, guild_rules in by_guild.items():
+            self.set_rules(guild_id, guild_rules)
+        for row in history:
+            self._add(row["guild_id"], row["user_id"], row["action"], row["timestamp"])
+        self.loaded = True
+
+    def max_window(self):
+        return max((w[-1] for w in self.windows.values()), default=0)
+
+    def _add(self, guild_id, user_id, action, timestamp):
+        windows = self.windows.get((guild_id, action))
+        if not windows:
+            return None
+        key = (guild_id, user_id, action)
+        per_window = self.counts.get(key)
+        if per_window is None:
+            per_window = self.counts[key] = {w: deque() for w in windows}
+        for window, stamps in per_window.items():
+            stamps.append(timestamp)
+            cutoff = timestamp - window
+            while stamps and stamps[0] <= cutoff:
+                stamps.popleft()
+        return per_window
+
+    def record(self, guild_id, user_id, action, timestamp):
+        """Counts one action and returns the rule whose threshold it just reached, if any."""
+        per_window = self._add(guild_id, user_id, action, timestamp)
+        self._records += 1
+        if self._records % 10000 == 0:
+            self.prune(timestamp)
+        if per_window is None:
+            return None
+        for rule in self.rules[(guild_id, action)]:
+            if len(per_window[rule["window_seconds"]]) == rule["threshold"]:
+                self.triggered += 1
+                return rule
+        return None
+
+    def reset(self, guild_id, user_id):
+        for key in [k for k in self.counts if k[0] == guild_id and k[1] == user_id]:
+            del self.counts[key]
+
+    def prune(self, now):
+        """Drops users whose every window has expired so memory tracks active offenders only."""
+        for key in list(self.counts):
+            per_window = self.counts[key]
+            if all(not stamps or stamps[-1] <= now - window for window, stamps in per_window.items()):
+                del self.counts[key]
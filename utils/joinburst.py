@@ -0,0 +1,66 @@
+# /utils/joinburst.py
+import time
+import asyncio
+from collections import deque
+
+
+class BurstQueue:
+    """Passes events through one at a time until a guild exceeds `threshold` per `window`.
+
+    Above that rate the guild switches to batch mode: events are collected and handed to
+    `on_batch(guild, items)` once per window, until a window passes with nothing queued.
+    """
+
+    def __init__(self, on_batch):
+        self.on_batch = on_batch
+        self.recent = {}    # guild_id -> deque of monotonic timestamps within the window
+        self.batches = {}   # guild_id -> items waiting for the next flush
+        self.tasks = {}
+        self.passed = 0
+        self.batched = 0
+        self.flushes = 0
+
+    def submit(self, guild, item, threshold, window):
+        """Returns True if the caller should handle `item` now, False if it was batched."""
+        now = time.monotonic()
+        recent = self.recent.setdefault(guild.id, deque())
+        recent.append(now)
+        while recent[0] <= now - window:
+            recent.popleft()
+
+        batch = self.batches.get(guild.id)
+        if batch is None and len(recent) <= threshold:
+            self.passed += 1
+            return True
+        if batch is None:
+            batch = self.batches[guild.id] = []
+            self.tasks[guild.id] = asyncio.create_task(self._flush_loop(guild, window))
+        batch.append(item)
+        self.batched += 1
+        return False
+
+    async def _flush_loop(self, guild, window):
+        try:
+            while True:
+                await asyncio.sleep(window)
+                items = self.batches.get(guild.id)
+                # No await between this check and the pop below, so nothing can slip in
+                if not items:
+                    break
+                self.batches[guild.id] = []
+                self.flushes += 1
+                try:
+                    await self.on_batch(guild, items)
+                except Exception as e:
+                    print(f"⚠️ Could not send a batch of {len(items)} in {guild.name}: {e}")
+        finally:
+            self.batches.pop(guild.id, None)
+            self.tasks.pop(guild.id, None)
+
+    def stats(self):
+        return {
+            "batching": len(self.batches),
+            "passed": self.passed,
+            "batched": self.batched,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,96 @@
+# /utils/outbox.py
+import asyncio
+from collections import deque, OrderedDict
+from utils.concurrency import with_backoff
+
+MAX_CONTENT = 2000
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+
+def pack_messages(items):
+    """Packs (content, embed) items into as few messages as Discord's limits allow."""
+    messages = []
+    lines, embeds, embed_chars = [], [], 0
+    for content, embed in items:
+        content_len = sum(len(line) + 1 for line in lines) + (len(content) if content else 0)
+        embed_len = len(embed) if embed else 0
+        too_long = content and content_len > MAX_CONTENT
+        too_many = embed and (len(embeds) == MAX_EMBEDS or embed_chars + embed_len > MAX_EMBED_CHARS)
+        if (lines or embeds) and (too_long or too_many):
+            messages.append(("\n".join(lines) or None, embeds))
+            lines, embeds, embed_chars = [], [], 0
+        if content:
+            lines.append(content[:MAX_CONTENT])
+        if embed:
+            embeds.append(embed)
+            embed_chars += embed_len
+    if lines or embeds:
+        messages.append(("\n".join(lines) or None, embeds))
+    return messages
+
+
+class ModLogOutbox:
+    """Per-guild queue of log-channel messages drained by a background worker.
+
+    Commands enqueue and return immediately. Each worker waits `coalesce_delay` so a burst
+    of actions is packed into multi-embed messages, then sends with retry on 429/5xx.
+    """
+
+    def __init__(self, bot, coalesce_delay=1.0, max_queue=1000):
+        self.bot = bot
+        self.coalesce_delay = coalesce_delay
+        self.max_queue = max_queue
+        self.queues = {}
+        self.workers = {}
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def enqueue(self, guild_id, channel_id, content=None, embed=None):
+        if not channel_id:
+            return
+        queue = self.queues.setdefault(guild_id, deque())
+        if len(queue) >= self.max_queue:
+            queue.popleft()
+            self.dropped += 1
+        queue.append((channel_id, content, embed))
+        worker = self.workers.get(guild_id)
+        if worker is None or worker.done():
+            self.workers[guild_id] = asyncio.create_task(self._drain(guild_id))
+
+    async def _drain(self, guild_id):
+        queue = self.queues[guild_id]
+        while queue:
+            await asyncio.sleep(self.coalesce_delay)
+            by_channel = OrderedDict()
+            while queue:
+                channel_id, content, embed = queue.popleft()
+                by_channel.setdefault(channel_id, []).append((content, embed))
+
+            for channel_id, items in by_channel.items():
+                channel = self.bot.get_channel(channel_id)
+                if channel is None:
+                    self.dropped += len(items)
+                    continue
+                for content, embeds in pack_messages(items):
+                    try:
+                        await with_backoff(channel.send, content=content, embeds=embeds, retries=5)
+                        self.sent += 1
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"⚠️ Could not post mod log to #{channel} ({guild_id}): {e}")
+
+    async def drain(self, timeout=10):
+        """Waits for queued messages to be sent, e.g. before shutdown."""
+        workers = [w for w in self.workers.values() if not w.done()]
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    def stats(self):
+        return {
+            "queued": sum(len(q) for q in self.queues.values()),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
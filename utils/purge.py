@@ -0,0 +1,137 @@
+# /utils/purge.py
+import re
+import time
+import asyncio
+import discord
+from datetime import timedelta
+from discord.utils import utcnow
+
+# Discord refuses bulk deletes of messages older than 14 days; keep a margin for clock skew
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_SIZE = 100
+SINGLE_DELETE_DELAY = 1.0
+LINK_PATTERN = re.compile(r"https?://\S+|discord(?:\.gg|(?:app)?\.com/invite)/\S+", re.IGNORECASE)
+
+
+class PurgeFilter:
+    """All set conditions must match for a message to be purged."""
+
+    def __init__(self, author_ids=None, pattern=None, attachments=False, links=False, bots=False, after=None, before=None):
+        self.author_ids = set(author_ids or ())
+        self.pattern = pattern
+        self.attachments = attachments
+        self.links = links
+        self.bots = bots
+        self.after = after
+        self.before = before
+
+    def matches(self, message):
+        if self.author_ids and message.author.id not in self.author_ids:
+            return False
+        if self.bots and not message.author.bot:
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.links and not LINK_PATTERN.search(message.content):
+            return False
+        if self.pattern and not self.pattern.search(message.content):
+            return False
+        return True
+
+    def describe(self):
+        parts = []
+        if self.author_ids:
+            parts.append("from " + ", ".join(f"<@{i}>" for i in self.author_ids))
+        if self.bots:
+            parts.append("from bots")
+        if self.attachments:
+            parts.append("with attachments")
+        if self.links:
+            parts.append("with links")
+        if self.pattern:
+            parts.append(f"matching `{self.pattern.pattern}`")
+        if self.after:
+            parts.append(f"after <t:{int(self.after.timestamp())}:f>")
+        if self.before:
+            parts.append(f"before <t:{int(self.before.timestamp())}:f>")
+        return " ".join(parts) or "any"
+
+
+class PurgeResult:
+    def __init__(self):
+        self.scanned = 0
+        self.matched = 0
+        self.deleted = 0
+        self.failed = 0
+
+
+async def purge_channel(channel, purge_filter, limit, scan_limit, dry_run=False, skip_ids=(), on_progress=None, progress_interval=3.0):
+    """Streams channel history newest first and deletes up to `limit` matching messages.
+
+    Messages younger than 14 days are bulk-deleted 100 at a time; older ones go through a
+    throttled single-delete queue that runs while the scan continues.
+    """
+    result = PurgeResult()
+    bulk = []
+    old_messages = asyncio.Queue()
+    bulk_cutoff = utcnow() - BULK_DELETE_MAX_AGE
+    last_progress = time.monotonic()
+
+    async def delete_old():
+        while True:
+            message = await old_messages.get()
+            if message is None:
+                return
+            try:
+                await message.delete()
+                result.deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                result.failed += 1
+            await asyncio.sleep(SINGLE_DELETE_DELAY)
+
+    async def flush_bulk():
+        batch = bulk[:]
+        bulk.clear()
+        try:
+            if len(batch) == 1:
+                await batch[0].delete()
+            else:
+                await channel.delete_messages(batch)
+            result.deleted += len(batch)
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            result.failed += len(batch)
+
+    old_worker = None if dry_run else asyncio.create_task(delete_old())
+    try:
+        async for message in channel.history(limit=scan_limit, before=purge_filter.before, after=purge_filter.after, oldest_first=False):
+            result.scanned += 1
+            if message.id in skip_ids or not purge_filter.matches(message):
+                continue
+            result.matched += 1
+            if not dry_run:
+                if message.created_at > bulk_cutoff:
+                    bulk.append(message)
+                    if len(bulk) >= BULK_DELETE_SIZE:
+                        await flush_bulk()
+                else:
+                    old_messages.put_nowait(message)
+            if on_progress and time.monotonic() - last_progress >= progress_interval:
+                last_progress = time.monotonic()
+                await on_progress(result)
+            if result.matched >= limit:
+                break
+        if bulk:
+            await flush_bulk()
+    finally:
+        if old_worker:
+            old_messages.put_nowait(None)
+            # Older messages trickle out one per second; keep reporting while they drain
+            while not old_worker.done():
+                await asyncio.wait({old_worker}, timeout=progress_interval)
+                if on_progress and not old_worker.done():
+                    await on_progress(result)
+    return result
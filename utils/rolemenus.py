@@ -0,0 +1,64 @@
+# /utils/rolemenus.py
+import discord
+
+MENU_STYLES = ("buttons", "select", "reactions")
+# Discord caps a message at 25 buttons, a select at 25 options and reactions at 20
+MAX_MENU_ITEMS = {"buttons": 25, "select": 25, "reactions": 20}
+
+
+def normalize_emoji(emoji):
+    """The form reactions report emojis in, so stored emojis compare equal to payload.emoji."""
+    return str(discord.PartialEmoji.from_str(emoji.strip())) if emoji else None
+
+
+class RoleMenuIndex:
+    """Every role menu held in dicts so a click or reaction resolves without a query.
+
+    `roles` answers "is this role on this menu" for buttons and selects, which carry the
+    menu id in their custom_id; `reactions` maps (message_id, emoji) straight to a role.
+    """
+
+    def __init__(self):
+        self.menus = {}       # menu_id -> menu row with "items"
+        self.roles = {}       # menu_id -> set of role ids
+        self.reactions = {}   # (message_id, emoji) -> role_id
+
+    def load(self, menus):
+        self.menus.clear()
+        self.roles.clear()
+        self.reactions.clear()
+        for menu in menus:
+            self.set_menu(menu)
+
+    def set_menu(self, menu):
+        self.remove_menu(menu["id"])
+        self.menus[menu["id"]] = menu
+        self.roles[menu["id"]] = {item["role_id"] for item in menu["items"]}
+        if menu["style"] == "reactions" and menu["message_id"]:
+            for item in menu["items"]:
+                if item["emoji"]:
+                    self.reactions[(menu["message_id"], item["emoji"])] = item["role_id"]
+
+    def remove_menu(self, menu_id):
+        menu = self.menus.pop(menu_id, None)
+        self.roles.pop(menu_id, None)
+        if menu and menu["message_id"]:
+            for item in menu["items"]:
+                self.reactions.pop((menu["message_id"], item["emoji"]), None)
+        return menu
+
+    def has_role(self, menu_id, role_id):
+        return role_id in self.roles.get(menu_id, ())
+
+    def reaction_role(self, message_id, emoji):
+        return self.reactions.get((message_id, str(emoji)))
+
+    def guild_menus(self, guild_id):
+        return [m for m in self.menus.values() if m["guild_id"] == guild_id]
+
+    def stats(self):
+        return {
+            "menus": len(self.menus),
+            "roles": sum(len(r) for r in self.roles.values()),
+            "reactions": len(self.reactions),
+        }
@@ -0,0 +1,119 @@
+# /utils/scheduler.py
+import time
+import heapq
+import asyncio
+from db.database import add_scheduled_action, remove_scheduled_action, complete_scheduled_action, get_scheduled_actions
+
+
+class ActionScheduler:
+    """Runs persisted timed actions (e.g. unmutes) from a single background task.
+
+    Pending actions sit in a heap ordered by run_at, so the task only ever sleeps
+    until the next one is due. Cogs register a handler per action name; handlers
+    receive the scheduled_actions row as a dict.
+    """
+
+    def __init__(self, bot, concurrency=10):
+        self.bot = bot
+        self.handlers = {}
+        self.fired = 0
+        self.failed = 0
+        self._heap = []      # (run_at, id)
+        self._entries = {}   # id -> row; heap items whose id/run_at no longer match are stale
+        self._keys = {}      # (guild_id, target_id, action) -> id
+        self._wakeup = asyncio.Event()
+        self._limit = asyncio.Semaphore(concurrency)
+        self._task = None
+
+    def register(self, action, handler):
+        self.handlers[action] = handler
+
+    async def start(self):
+        """Loads every pending action; overdue ones run as soon as the task starts."""
+        rows = await get_scheduled_actions(self.bot)
+        for row in rows:
+            self._push(row)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return len(rows)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _push(self, row):
+        key = (row["guild_id"], row["target_id"], row["action"])
+        self._entries[row["id"]] = row
+        self._keys[key] = row["id"]
+        heapq.heappush(self._heap, (row["run_at"], row["id"]))
+        if self._heap[0][1] == row["id"]:
+            self._wakeup.set()
+
+    def _pop_entry(self, key):
+        action_id = self._keys.pop(key, None)
+        if action_id is not None:
+            self._entries.pop(action_id, None)
+        return action_id
+
+    async def schedule(self, guild_id, target_id, action, run_at, channel_id=None):
+        row = await add_scheduled_action(self.bot, guild_id, target_id, action, run_at, channel_id)
+        self._pop_entry((guild_id, target_id, action))
+        self._push(row)
+        return row
+
+    async def cancel(self, guild_id, target_id, action):
+        """Drops a pending action; returns True if one was scheduled."""
+        found = self._pop_entry((guild_id, target_id, action)) is not None
+        await remove_scheduled_action(self.bot, guild_id, target_id, action)
+        return found
+
+    def is_scheduled(self, guild_id, target_id, action):
+        return (guild_id, target_id, action) in self._keys
+
+    def _discard_stale(self):
+        while self._heap:
+            run_at, action_id = self._heap[0]
+            entry = self._entries.get(action_id)
+            if entry is not None and entry["run_at"] == run_at:
+                return
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            self._discard_stale()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, action_id = heapq.heappop(self._heap)
+            entry = self._entries.pop(action_id)
+            self._keys.pop((entry["guild_id"], entry["target_id"], entry["action"]), None)
+            asyncio.create_task(self._fire(entry))
+
+    async def _fire(self, entry):
+        async with self._limit:
+            handler = self.handlers.get(entry["action"])
+            try:
+                if handler is None:
+                    print(f"⚠️ No handler registered for scheduled action '{entry['action']}'.")
+                else:
+                    await handler(entry)
+                self.fired += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Scheduled {entry['action']} for {entry['target_id']} failed: {e}")
+            finally:
+                await complete_scheduled_action(self.bot, entry["id"], entry["run_at"])
+
+    def stats(self):
+        return {"pending": len(self._entries), "fired": self.fired, "failed": self.failed}
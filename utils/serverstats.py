@@ -0,0 +1,88 @@
+# /utils/serverstats.py
+import time
+import discord
+
+
+def channel_kind(channel):
+    if isinstance(channel, discord.CategoryChannel):
+        return "categories"
+    if isinstance(channel, discord.StageChannel):
+        return "stage"
+    if isinstance(channel, discord.VoiceChannel):
+        return "voice"
+    if isinstance(channel, discord.ForumChannel):
+        return "forums"
+    if isinstance(channel, discord.TextChannel):
+        return "text"
+    return None
+
+
+class GuildStats:
+    __slots__ = ("text", "voice", "stage", "categories", "forums", "threads", "roles",
+                 "humans", "bots", "boosts", "built_at", "partial")
+
+    def __init__(self, guild):
+        self.text = self.voice = self.stage = self.categories = self.forums = 0
+        for channel in guild.channels:
+            kind = channel_kind(channel)
+            if kind:
+                setattr(self, kind, getattr(self, kind) + 1)
+        self.threads = len(guild.threads)
+        self.roles = len(guild.roles)
+        self.bots = sum(1 for m in guild.members if m.bot)
+        self.humans = len(guild.members) - self.bots
+        self.boosts = guild.premium_subscription_count or 0
+        self.built_at = time.time()
+        # Until the member list is chunked, bot/human counts only cover cached members
+        self.partial = not guild.chunked
+
+
+class ServerStatsCache:
+    """Per-guild GuildStats built on first use and then kept current from gateway events.
+
+    Event handlers are no-ops for guilds nobody has asked about yet, so idle guilds
+    cost nothing.
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self.builds = 0
+
+    def get(self, guild, refresh=False):
+        stats = self.snapshots.get(guild.id)
+        if stats is None or refresh or (stats.partial and guild.chunked):
+            stats = self.snapshots[guild.id] = GuildStats(guild)
+            self.builds += 1
+        return stats
+
+    def discard(self, guild_id):
+        self.snapshots.pop(guild_id, None)
+
+    def channel(self, channel, delta):
+        stats = self.snapshots.get(channel.guild.id)
+        kind = channel_kind(channel)
+        if stats and kind:
+            setattr(stats, kind, max(0, getattr(stats, kind) + delta))
+
+    def thread(self, thread, delta):
+        stats = self.snapshots.get(thread.guild.id)
+        if stats:
+            stats.threads = max(0, stats.threads + delta)
+
+    def role(self, role, delta):
+        stats = self.snapshots.get(role.guild.id)
+        if stats:
+            stats.roles = max(0, stats.roles + delta)
+
+    def member(self, member, delta):
+        stats = self.snapshots.get(member.guild.id)
+        if stats:
+            if member.bot:
+                stats.bots = max(0, stats.bots + delta)
+            else:
+                stats.humans = max(0, stats.humans + delta)
+
+    def guild_update(self, guild):
+        stats = self.snapshots.get(guild.id)
+        if stats:
+            stats.boosts = guild.premium_subscription_count or 0
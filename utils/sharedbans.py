@@ -0,0 +1,177 @@
+# /utils/sharedbans.py
+import time
+import asyncio
+from bisect import bisect_left
+from utils.idset import CompactIdSet
+from db.database import load_shared_bans, get_shared_ban_changes
+
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+BLOOM_BITS_PER_ID = 16   # two probes at 16 bits/id gives ~1.4% false positives
+MIN_BLOOM_BITS = 1 << 16
+
+
+class BloomFilter:
+    """Two-probe Bloom filter over a bytearray; both probes come from one multiplicative hash."""
+
+    def __init__(self, capacity):
+        bits = max(MIN_BLOOM_BITS, 1 << (capacity * BLOOM_BITS_PER_ID - 1).bit_length())
+        self.capacity = capacity
+        self.width = bits.bit_length() - 1
+        self.mask = bits - 1
+        self.bits = bytearray(bits // 8)
+
+    def add(self, value):
+        h = (value * HASH_MULTIPLIER) & MASK64
+        a = h >> (64 - self.width)
+        b = (h >> (64 - 2 * self.width)) & self.mask
+        self.bits[a >> 3] |= 1 << (a & 7)
+        self.bits[b >> 3] |= 1 << (b & 7)
+
+    def __contains__(self, value):
+        h = (value * HASH_MULTIPLIER) & MASK64
+        a = h >> (64 - self.width)
+        if not self.bits[a >> 3] >> (a & 7) & 1:
+            return False
+        b = (h >> (64 - 2 * self.width)) & self.mask
+        return bool(self.bits[b >> 3] >> (b & 7) & 1)
+
+
+class SharedBanList:
+    """In-memory mirror of shared_bans: a CompactIdSet (sorted array('Q')) behind a Bloom filter.
+
+    Most joins are not listed, and the filter rejects those without touching the array.
+    Filter hits fall back to the exact bisect, so false positives never ban anyone. A full
+    load streams the ids once; after that `sync` applies only rows written since the oldest
+    transaction that was still open at the previous read.
+    """
+
+    def __init__(self):
+        self.ids = CompactIdSet()
+        self.bloom = None
+        self.version = 0
+        self.cursor = 0         # snapshot xmin of the last read, see get_shared_ban_changes
+        self.loaded = False
+        self.synced_at = 0.0
+        self.hits = 0
+        self._building = None   # ids added while a filter is built in the background
+
+    def __contains__(self, user_id):
+        bloom = self.bloom
+        if bloom is not None:
+            # BloomFilter.__contains__ inlined; this runs on every join
+            h = (user_id * HASH_MULTIPLIER) & MASK64
+            a = h >> (64 - bloom.width)
+            if not bloom.bits[a >> 3] >> (a & 7) & 1:
+                return False
+            b = (h >> (64 - 2 * bloom.width)) & bloom.mask
+            if not bloom.bits[b >> 3] >> (b & 7) & 1:
+                return False
+        ids = self.ids
+        if ids.pending and user_id in ids.pending:
+            return True
+        if ids.removed and user_id in ids.removed:
+            return False
+        array_ids = ids.ids
+        i = bisect_left(array_ids, user_id)
+        return i < len(array_ids) and array_ids[i] == user_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    async def load(self, bot):
+        self.cursor, self.version, ids = await load_shared_bans(bot)
+        self.ids = CompactIdSet.from_sorted(ids)
+        self.bloom = None
+        self.loaded = True
+        self.synced_at = time.time()
+        await self.rebuild_bloom()
+        return len(self.ids)
+
+    async def rebuild_bloom(self):
+        """Builds a right-sized filter in a worker thread; lookups stay exact meanwhile."""
+        if self._building is not None:
+            return
+        self._building = []
+        # Pending ids go into the array first; ids added from here on are collected in
+        # _building. CompactIdSet never changes its array in place, so the thread reads a
+        # fixed snapshot.
+        self.ids.compact()
+        snapshot = self.ids.ids
+        try:
+            def build():
+                bloom = BloomFilter(max(len(snapshot) * 2, 1024))
+                for user_id in snapshot:
+                    bloom.add(user_id)
+                return bloom
+            bloom = await asyncio.to_thread(build)
+            for user_id in self._building:
+                bloom.add(user_id)
+            self.bloom = bloom
+        finally:
+            self._building = None
+
+    async def sync(self, bot):
+        """Applies changes since the last read; returns how many ids were added or removed."""
+        self.cursor, rows = await get_shared_ban_changes(bot, self.cursor)
+        changed = 0
+        for row in rows:
+            user_id = row["user_id"]
+            if row["removed"]:
+                # Removed ids keep their filter bits; the exact check still says no
+                changed += self.ids.discard(user_id)
+            elif self.ids.add(user_id):
+                changed += 1
+                if self.bloom is not None:
+                    self.bloom.add(user_id)
+                if self._building is not None:
+                    self._building.append(user_id)
+            self.version = max(self.version, row["version"])
+        self.ids.compact()
+        self.synced_at = time.time()
+        if self.bloom is not None and len(self.ids) > self.bloom.capacity:
+            asyncio.create_task(self.rebuild_bloom())
+        return changed
+
+    def nbytes(self):
+        return self.ids.nbytes() + (len(self.bloom.bits) if self.bloom is not None else 0)
+
+    def stats(self):
+        return {
+            "ids": len(self.ids),
+            "version": self.version,
+            "bytes": self.nbytes(),
+            "bloom_bytes": len(self.bloom.bits) if self.bloom is not None else 0,
+            "hits": self.hits,
+            "synced_at": int(self.synced_at),
+        }
+
+
+if __name__ == "__main__":
+    # Microbenchmark: python -m utils.sharedbans
+    import random
+    from array import array
+
+    async def main():
+        for count in (100_000, 1_000_000, 5_000_000):
+            ids = array("Q", sorted({random.getrandbits(62) for _ in range(count)}))
+            banlist = SharedBanList()
+            banlist.ids = CompactIdSet.from_sorted(ids)
+            start = time.perf_counter()
+            await banlist.rebuild_bloom()
+            build = time.perf_counter() - start
+
+            misses = [random.getrandbits(62) for _ in range(200_000)]
+            hits = list(ids[:100_000])
+            start = time.perf_counter()
+            for user_id in misses:
+                user_id in banlist
+            miss_ns = (time.perf_counter() - start) / len(misses) * 1e9
+            start = time.perf_counter()
+            for user_id in hits:
+                user_id in banlist
+            hit_ns = (time.perf_counter() - start) / len(hits) * 1e9
+            print(f"{len(ids):>9,} ids: {banlist.nbytes() / 1_048_576:6.1f} MiB | filter built in {build:.1f}s | "
+                  f"{miss_ns:.0f} ns per unlisted lookup, {hit_ns:.0f} ns per listed lookup")
+
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+# /utils/triggers.py
+import re
+import time
+try:
+    from re import _parser as sre_parse
+except ImportError:   # Python < 3.11
+    import sre_parse
+from utils.automod import compile_words
+
+TRIGGER_KINDS = ("user", "role", "keyword", "regex")
+RESPONSE_TYPES = ("reply", "react", "delete")
+
+# Regexes only see the start of a message, which bounds how long backtracking can take
+MAX_REGEX_SCAN = 500
+# Estimated worst-case steps per search (scan length x repeat widths): one open-ended
+# repeat plus some bounded ones
+MAX_REGEX_COST = 4 * MAX_REGEX_SCAN ** 2
+MAX_REGEX_REPEAT = 100
+# A search slower than this disables the trigger until the guild's triggers are reloaded
+SLOW_REGEX_SECONDS = 0.05
+REPEAT_OPS = ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+
+
+class TriggerIndex:
+    """One guild's triggers arranged for constant-cost lookup per message.
+
+    Mention triggers are dict lookups on the message's raw mention ids and keywords share
+    one trie-compiled matcher. Regex triggers are searched one by one so overlapping
+    patterns all fire; validate_regex keeps each of them cheap in the worst case.
+    """
+
+    def __init__(self, triggers):
+        self.users = {}
+        self.roles = {}
+        self.keywords = {}
+        self.regexes = []    # (trigger, compiled pattern)
+        self.disabled = []   # regex triggers switched off for being slow
+        for trigger in triggers:
+            kind, pattern = trigger["kind"], trigger["pattern"]
+            if kind == "user":
+                self.users.setdefault(int(pattern), []).append(trigger)
+            elif kind == "role":
+                self.roles.setdefault(int(pattern), []).append(trigger)
+            elif kind == "keyword":
+                self.keywords.setdefault(pattern.lower(), []).append(trigger)
+            elif kind == "regex":
+                # Triggers saved before the current checks existed may not pass them
+                if validate_regex(pattern):
+                    self.disabled.append(trigger)
+                else:
+                    self.regexes.append((trigger, re.compile(pattern, re.IGNORECASE)))
+        self.keyword_matcher = compile_words(self.keywords)
+
+    def match(self, content, user_ids=(), role_ids=()):
+        """Returns matching triggers in firing order, each at most once."""
+        found = {}
+        for user_id in user_ids:
+            for trigger in self.users.get(user_id, ()):
+                found.setdefault(trigger["id"], trigger)
+        for role_id in role_ids:
+            for trigger in self.roles.get(role_id, ()):
+                found.setdefault(trigger["id"], trigger)
+        if self.keyword_matcher and content:
+            for m in self.keyword_matcher.finditer(content):
+                for trigger in self.keywords.get(m.group(0).lower(), ()):
+                    found.setdefault(trigger["id"], trigger)
+        if self.regexes and content:
+            text = content[:MAX_REGEX_SCAN]
+            for trigger, regex in list(self.regexes):
+                start = time.perf_counter()
+                if regex.search(text):
+                    found.setdefault(trigger["id"], trigger)
+                if time.perf_counter() - start > SLOW_REGEX_SECONDS:
+                    self.regexes.remove((trigger, regex))
+                    self.disabled.append(trigger)
+                    print(f"⚠️ Disabled slow regex trigger #{trigger['id']} in guild {trigger['guild_id']}: /{trigger['pattern']}/")
+        return list(found.values())
+
+
+def regex_cost(parsed):
+    """Worst-case steps per starting position; raises ValueError for backtracking traps."""
+    cost = 1
+    for op, av in parsed:
+        name = str(op)
+        if name in REPEAT_OPS:
+            low, high, sub = av
+            unbounded = high == sre_parse.MAXREPEAT
+            if not unbounded and high > MAX_REGEX_REPEAT:
+                raise ValueError(f"repeat counts above {MAX_REGEX_REPEAT} are not supported")
+            nodes = [str(o) for o, _ in _flatten(sub)]
+            if high > 1 and "BRANCH" in nodes:
+                raise ValueError("alternation inside a repeated group is not supported, use a `[...]` class")
+            if unbounded and any(n in REPEAT_OPS for n in nodes):
+                raise ValueError("nested quantifiers like `(a+)+` are not supported")
+            inner = regex_cost(sub)
+            cost *= (MAX_REGEX_SCAN if unbounded else max(high, 1)) * inner
+        elif name == "SUBPATTERN":
+            cost *= regex_cost(av[-1])
+        elif name == "ATOMIC_GROUP":
+            cost *= regex_cost(av)
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            cost *= regex_cost(av[1])
+        elif name == "BRANCH":
+            cost *= sum(regex_cost(branch) for branch in av[1])
+        elif name in ("GROUPREF", "GROUPREF_EXISTS"):
+            raise ValueError("backreferences are not supported")
+    return cost
+
+
+def _flatten(parsed):
+    """Yields (op, av) for every node under `parsed`, looking through groups."""
+    for op, av in parsed:
+        yield op, av
+        name = str(op)
+        if name == "SUBPATTERN":
+            yield from _flatten(av[-1])
+        elif name == "ATOMIC_GROUP":
+            yield from _flatten(av)
+
+
+def validate_regex(pattern):
+    """Returns an error message, or None if `pattern` is safe to run on every message."""
+    try:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        cost = regex_cost(sre_parse.parse(pattern, re.IGNORECASE))
+    except re.error as e:
+        return str(e)
+    except ValueError as e:
+        return str(e)
+    if cost * MAX_REGEX_SCAN > MAX_REGEX_COST:
+        return "too many open-ended repeats; bound them, e.g. `.{0,20}` instead of `.*`"
+    if compiled.match(""):
+        return "pattern matches an empty message"
+    return None